@@ -1,25 +1,102 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import hashlib
 import io
 import os
 from datetime import datetime
 
+from bom import (EXPORT_FORMATS, LARGE_EXPORT_ROWS, ON_HAND_COLUMN, SUMMARY_LABEL, BomCache, BomDataset, Inventory,
+                 BUCKETS, DEFAULT_LEAD_DAYS, OrderRules, QuoteBook, allocated_lines, bucket_schedule, consolidate,
+                 consolidated_lines, content_key, master_quotes, projected_stock, read_order_rules,
+                 read_category_tree, read_lead_times, read_product_master, read_quotes, savings_summary,
+                 export_bytes, net_plan, plan_hash, purchase_orders, purchase_orders_workbook, purchase_orders_zip,
+                 read_bom_excel_cached, read_demand_file, read_inventory_file, split_memory, supplier_summary)
+
 # 设置页面标题
 st.set_page_config(page_title="电磁炉物料清单管理系统", layout="wide")
 
 # 页面标题
 st.title("电磁炉物料清单管理系统")
 
-# 加载Excel文件
+# 磁盘缓存（按文件内容哈希，重启后仍然有效）
+@st.cache_resource
+def get_bom_cache():
+    return BomCache()
+
+# 加载Excel文件（xlsx 流式解析，只读取计划用到的列）
 @st.cache_data(ttl=60)  # 缓存1分钟
 def load_excel_file(file):
     try:
-        df = pd.read_excel(file)
+        df = read_bom_excel_cached(file, get_bom_cache())
         return df, None
     except Exception as e:
         return None, str(e)
 
+# 构建物料清单数据集（索引、展开引擎、稀疏矩阵，每个数据集只构建一次）
+@st.cache_resource(max_entries=4)
+def build_dataset(df_parent, df_child, master_key=None, _master=None):
+    # master_key 标识商品档案（文件内容），不同档案补齐的结果分别缓存
+    return BomDataset(df_parent, df_child, _master)
+
+# 库存文件（按文件内容缓存，汇总索引每个文件只构建一次）
+@st.cache_resource(max_entries=4)
+def load_inventory(file_bytes, file_name):
+    file = io.BytesIO(file_bytes)
+    file.name = file_name
+    return Inventory(read_inventory_file(file))
+
+# 商品分类树（product_cate.xlsx + product.xlsx），默认使用程序目录下的文件
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATEGORY_FILES = (os.path.join(APP_DIR, "product_cate.xlsx"), os.path.join(APP_DIR, "product.xlsx"))
+
+@st.cache_resource(max_entries=4)
+def load_category_tree(category_data, product_data):
+    # 参数为文件字节，按内容缓存
+    return read_category_tree(io.BytesIO(category_data), io.BytesIO(product_data) if product_data else None)
+
+@st.cache_resource(max_entries=4)
+def load_product_master(product_data):
+    # 商品档案哈希索引，按文件内容缓存
+    return read_product_master(io.BytesIO(product_data))
+
+@st.cache_resource(max_entries=4)
+def build_model_tree(tree_key, dataset_key, _tree, _dataset):
+    # 键为分类文件和数据集的内容哈希；对象被缓存淘汰后 id() 可能被复用，不能作为键
+    # 只含当前物料清单型号的分类树视图，附带每个型号的单件成本
+    model_tree = _tree.for_models(_dataset.products)
+    try:
+        costs = _dataset.unit_costs(model_tree.product_names)
+    except Exception:
+        # 成本只用于分类的平均成本显示，算不出时不影响选型号
+        costs = np.full(len(model_tree.product_names), np.nan)
+    return model_tree, costs
+
+# 导出文件按计划内容哈希缓存，只在用户点击时生成
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_export_file(plan_key, export_format, _data, _footer_rows=()):
+    return export_bytes(_data, export_format, sheet_name="物料需求计划", footer_rows=_footer_rows)
+
+@st.cache_resource(max_entries=4)
+def build_quote_book(quote_key, _quote_data, _quote_name, _master=None):
+    # 报价文件与商品档案（默认供应商 + 参考成本）合并为一张报价表
+    quotes = read_quotes(_named_bytes(_quote_data, _quote_name)) if _quote_data is not None else None
+    return QuoteBook.combine(quotes, master_quotes(_master) if _master is not None else None)
+
+def _named_bytes(data, name):
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    return buffer
+
+@st.cache_resource(max_entries=4)
+def load_order_rules(file_bytes, file_name):
+    return OrderRules(read_order_rules(_named_bytes(file_bytes, file_name)))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_purchase_order_files(plan_key, _lines):
+    orders = purchase_orders(_lines)
+    return purchase_orders_workbook(orders), purchase_orders_zip(orders)
+
 # 初始化session_state
 if "processed_data" not in st.session_state:
     st.session_state.processed_data = None
@@ -37,13 +114,73 @@ with st.sidebar:
     st.header("操作面板")
     upload_option = st.radio(
         "选择上传方式",
-        ["上传Excel文件", "使用示例数据"]
+        ["上传Excel文件", "上传物料清单父子件（单个文件）", "使用示例数据"]
     )
     
     # 添加重置按钮
     if st.button("重置应用"):
         reset_app()
     
+    # 解析缓存
+    with st.expander("解析缓存"):
+        bom_cache = get_bom_cache()
+        cache_entries = bom_cache.entries()
+        st.caption(f"{len(cache_entries)} 个文件，共 {sum(e['size'] for e in cache_entries) / 1024 / 1024:.1f} MB"
+                   f"（上限 {bom_cache.max_bytes / 1024 / 1024:.0f} MB）")
+        if cache_entries:
+            st.dataframe(pd.DataFrame({
+                "文件哈希": [e["key"][:12] for e in cache_entries],
+                "大小(KB)": [round(e["size"] / 1024, 1) for e in cache_entries],
+                "最近使用": [datetime.fromtimestamp(e["last_used"]).strftime("%Y-%m-%d %H:%M") for e in cache_entries],
+            }), hide_index=True, use_container_width=True)
+        if st.button("清空缓存"):
+            bom_cache.clear()
+            load_excel_file.clear()
+            st.experimental_rerun()
+    
+    # 商品分类
+    with st.expander("商品分类"):
+        category_upload = st.file_uploader("商品分类文件（product_cate.xlsx）", type=['xlsx'], key='category_file')
+        product_upload = st.file_uploader("商品文件（product.xlsx）", type=['xlsx'], key='product_file')
+        category_tree = None
+        category_key = None
+        product_data = None
+        if product_upload is not None:
+            product_data = product_upload.getvalue()
+        elif category_upload is None and os.path.exists(DEFAULT_CATEGORY_FILES[1]):
+            with open(DEFAULT_CATEGORY_FILES[1], "rb") as fh:
+                product_data = fh.read()
+        try:
+            if category_upload is not None:
+                category_data = category_upload.getvalue()
+                category_tree = load_category_tree(category_data, product_data)
+            elif os.path.exists(DEFAULT_CATEGORY_FILES[0]):
+                with open(DEFAULT_CATEGORY_FILES[0], "rb") as fh:
+                    category_data = fh.read()
+                category_tree = load_category_tree(category_data, product_data)
+            if category_tree is not None:
+                category_key = content_key(category_data, content_key(product_data) if product_data else None)
+        except Exception as e:
+            st.error(f"无法加载商品分类: {e}")
+        if category_tree is not None:
+            st.caption(f"分类 {category_tree.size} 个，商品 {len(category_tree.product_names)} 个")
+        else:
+            st.caption("未加载商品分类，型号以平铺列表选择")
+        
+        # 商品档案：补齐子件缺失的成本单价、默认供应商，并按基准批发价计算成品毛利
+        product_master = None
+        if product_data is not None:
+            try:
+                product_master = load_product_master(product_data)
+            except Exception as e:
+                st.error(f"无法加载商品档案: {e}")
+        use_master = product_master is not None and st.checkbox(
+            "用商品档案补齐成本单价和默认供应商", value=True,
+            help="子件缺少成本单价时取商品档案的参考成本，缺少默认供应商时取档案中的默认供应商")
+        # 商品档案以文件内容哈希区分
+        product_key = content_key(product_data) if product_master is not None else None
+        master_args = (product_key, product_master) if use_master else ()
+    
     # 帮助信息
     st.markdown("---")
     st.subheader("帮助信息")
@@ -56,6 +193,7 @@ with st.sidebar:
     5. 下载Excel结果
     
     **文件格式要求:**
+    - 物料清单父子件（单个文件）可直接上传，自动拆分父件和子件
     - 父件文件需包含: 物料清单编码, 父件商品
     - 子件文件需包含: 物料清单编码, 子件商品, 规格型号, 需用数量, 成本单价, 成本金额, 默认供应商
     """)
@@ -142,7 +280,8 @@ if upload_option == "上传Excel文件":
                     # 存储处理后的数据
                     st.session_state.processed_data = {
                         "parent": df_parent,
-                        "child": df_child
+                        "child": df_child,
+                        "dataset": build_dataset(df_parent, df_child, *master_args)
                     }
                     
                     st.success("文件上传成功！请继续进行生产计划设置。")
@@ -152,6 +291,41 @@ if upload_option == "上传Excel文件":
                 if child_error:
                     st.error(f"无法加载子件文件: {child_error}")
 
+elif upload_option == "上传物料清单父子件（单个文件）":
+    st.subheader("上传物料清单父子件")
+    st.info("ERP 导出的物料清单父子件文件：每行子件都带有父件列（物料清单编码、父件商品等），系统会自动拆分为父件表和子件表。")
+    combined_file = st.file_uploader("选择物料清单父子件Excel文件", type=['xlsx', 'xls'], key='combined',
+                                     accept_multiple_files=False)
+    
+    if combined_file is not None:
+        with st.spinner("正在处理上传的文件..."):
+            df_combined, combined_error = load_excel_file(combined_file)
+            
+            if df_combined is None:
+                st.error(f"无法加载物料清单父子件文件: {combined_error}")
+            else:
+                required_columns = ["物料清单编码", "父件商品", "子件商品", "需用数量", "成本单价", "成本金额"]
+                missing_cols = [col for col in required_columns if col not in df_combined.columns]
+                if missing_cols:
+                    st.error(f"文件缺少必要列: {', '.join(missing_cols)}")
+                else:
+                    dataset = build_dataset(None, df_combined, *master_args)
+                    before, after = split_memory(df_combined)
+                    st.subheader("父件数据预览（自动拆分）")
+                    st.dataframe(dataset.parent.head(), use_container_width=True)
+                    st.subheader("子件数据预览（自动拆分）")
+                    st.dataframe(dataset.child.head(), use_container_width=True)
+                    st.caption(f"父件 {len(dataset.parent)} 个，子件 {len(dataset.child)} 行；"
+                               f"拆分后内存 {after / 1024 / 1024:.1f} MB（合并表 {before / 1024 / 1024:.1f} MB）")
+                    
+                    st.session_state.processed_data = {
+                        "parent": dataset.parent,
+                        "child": dataset.child,
+                        "dataset": dataset
+                    }
+                    
+                    st.success("文件上传成功！请继续进行生产计划设置。")
+
 else:
     # 使用示例数据
     try:
@@ -193,172 +367,588 @@ else:
         # 存储处理后的数据
         st.session_state.processed_data = {
             "parent": df_parent,
-            "child": df_child
+            "child": df_child,
+            "dataset": build_dataset(df_parent, df_child, *master_args)
         }
         
         st.success("示例数据加载成功！请继续进行生产计划设置。")
     except Exception as e:
         st.error(f"加载示例数据时出错: {e}")
 
+# 数据质量检查
+if st.session_state.processed_data is not None:
+    quality_report = st.session_state.processed_data["dataset"].quality_report()
+    if quality_report.issue_count:
+        st.warning(f"数据质量检查发现 {quality_report.issue_count} 行问题，计划结果可能受影响。")
+    with st.expander("数据质量检查"):
+        st.dataframe(quality_report.summary, use_container_width=True, hide_index=True)
+        if any(st.session_state.processed_data["dataset"].filled.values()):
+            st.caption("检查的是商品档案补齐前的原始数据，补齐的成本单价、默认供应商仍计为缺失。")
+        if quality_report.issue_count:
+            checks = [c for c, n in zip(quality_report.summary["检查项"], quality_report.summary["问题行数"]) if n]
+            selected_check = st.selectbox("查看明细", checks)
+            details = quality_report.details
+            st.dataframe(details[details["检查项"] == selected_check], use_container_width=True, hide_index=True)
+            if st.button("生成质量报告文件"):
+                st.session_state.quality_file = {
+                    "report": dataset.content_key,
+                    "data": quality_report.to_xlsx_bytes(),
+                    "time": datetime.now().strftime("%Y%m%d_%H%M%S")
+                }
+            quality_file = st.session_state.get("quality_file")
+            if quality_file is not None and quality_file["report"] == dataset.content_key:
+                st.download_button(
+                    label="下载数据质量报告",
+                    data=quality_file["data"],
+                    file_name=f"物料清单数据质量报告_{quality_file['time']}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+# 成品毛利（需要商品档案中的基准批发价）
+if st.session_state.processed_data is not None and product_master is not None:
+    dataset = st.session_state.processed_data["dataset"]
+    if any(dataset.filled.values()):
+        st.caption("已用商品档案补齐：" + "，".join(f"{col} {n} 行" for col, n in dataset.filled.items()))
+    with st.expander("成品毛利"):
+        margins = dataset.margins(master=product_master)
+        priced = margins[margins["基准批发价"].notna()].assign(毛利率=lambda df: df["毛利率"] * 100)
+        st.caption(f"{len(margins)} 个成品，{len(priced)} 个有基准批发价，"
+                   f"其中 {int((priced['毛利'] < 0).sum())} 个成本高于批发价")
+        st.dataframe(priced.sort_values("毛利率"), use_container_width=True, hide_index=True,
+                     column_config={"毛利率": st.column_config.NumberColumn("毛利率", format="%.1f%%")})
+
+# 全部物料清单成本汇总（拓扑顺序一次算出，随数据集缓存）
+if st.session_state.processed_data is not None:
+    with st.expander("成本汇总（全部物料清单）"):
+        rollup = st.session_state.processed_data["dataset"].cost_rollup()
+        status_counts = rollup["状态"].value_counts()
+        st.caption("，".join(f"{status} {n} 个" for status, n in status_counts.items())
+                   + "；展开成本与父件成本金额相差超过 1% 视为偏差")
+        only_drift = st.checkbox("只看偏差及无法核对的物料清单", value=bool(status_counts.get("偏差", 0)))
+        shown = rollup[rollup["状态"] != "一致"] if only_drift else rollup
+        st.dataframe(shown.assign(差异率=shown["差异率"] * 100), use_container_width=True, hide_index=True,
+                     column_config={"差异率": st.column_config.NumberColumn("差异率", format="%.1f%%")})
+
+# 反查：零件或供应商被哪些型号使用（含经由半成品的间接使用）
+if st.session_state.processed_data is not None:
+    with st.expander("反查零件 / 供应商"):
+        dataset = st.session_state.processed_data["dataset"]
+        try:
+            where_used = dataset.where_used()
+        except Exception as e:
+            where_used = None
+            st.error(f"无法构建反查索引: {e}")
+        cyclic = dataset.matrix(True).cyclic
+        if cyclic:
+            st.warning(f"{len(cyclic)} 个物料清单存在循环引用，无法展开，未计入反查: {', '.join(map(str, cyclic[:20]))}"
+                       + (" 等" if len(cyclic) > 20 else ""))
+        if where_used is not None:
+            lookup_kind = st.radio("反查对象", ["零件", "供应商"], horizontal=True, key="where_used_kind")
+            lookup_query = st.text_input("搜索零件（子件商品、规格型号）" if lookup_kind == "零件" else "搜索供应商", "",
+                                         key="where_used_query")
+            if lookup_kind == "零件":
+                matches = where_used.search_parts(lookup_query, limit=200)
+            else:
+                matches = where_used.search_suppliers(lookup_query, limit=200)
+            if not matches:
+                st.warning("没有匹配的" + lookup_kind + "。")
+            else:
+                selected = st.selectbox("选择" + lookup_kind, matches, key="where_used_selected")
+                if lookup_kind == "零件":
+                    usage = where_used.part_usage(selected)
+                    st.caption(f"{len(usage)} 个物料清单使用该零件，"
+                               f"其中 {int((~usage['是否半成品']).sum())} 个成品、{int((~usage['直接使用']).sum())} 个经由半成品间接使用")
+                else:
+                    usage = where_used.supplier_usage(selected)
+                    st.caption(f"该供应商的 {len(where_used.supplier_parts(selected))} 种零件用于 {len(usage)} 个物料清单")
+                st.dataframe(usage, use_container_width=True, hide_index=True)
+
 # 生产计划设置
+plan_mode = "单一型号"
 if st.session_state.processed_data is not None:
     st.header("设置生产计划")
-    
-    parent_data = st.session_state.processed_data["parent"]
+    plan_mode = st.radio("计划方式", ["单一型号", "批量计划"], horizontal=True)
+
+# 单一型号生产计划
+if st.session_state.processed_data is not None and plan_mode == "单一型号":
+    dataset = st.session_state.processed_data["dataset"]
     
     # 获取所有父件商品名称
-    parent_products = parent_data["父件商品"].unique().tolist()
+    parent_products = dataset.products
     
     # 创建生产计划设置界面
-    selected_product = st.selectbox("选择要生产的电磁炉型号", parent_products)
+    if category_tree is not None:
+        # 按分类逐级筛选，搜索在服务端完成，下拉框只包含筛选后的型号
+        model_tree, model_costs = build_model_tree(category_key, dataset.content_key, category_tree, dataset)
+        model_counts = model_tree.rollup(np.ones(len(model_tree.product_names)))
+        cost_totals = model_tree.rollup(model_costs)
+        category_node, level = None, 0
+        while True:
+            options = [n for n in model_tree.child_nodes(category_node) if model_counts[n] > 0]
+            if not options:
+                break
+            labels = {f"{model_tree.names[n]}（{int(model_counts[n])}）": n for n in options}
+            choice = st.selectbox("商品分类" if level == 0 else f"第 {level + 1} 级分类", ["全部"] + list(labels),
+                                  key=f"category_level_{level}")
+            if choice not in labels:
+                break
+            category_node, level = labels[choice], level + 1
+        if category_node is not None:
+            st.caption(f"{model_tree.paths[category_node]}：{int(model_counts[category_node])} 个型号，"
+                       f"单件成本平均 {cost_totals[category_node] / model_counts[category_node]:.2f}")
+        model_query = st.text_input("搜索型号或分类", "")
+        candidates = model_tree.search(model_query, category_node, limit=200)
+        if not candidates:
+            st.warning("没有匹配的型号。")
+        selected_product = st.selectbox("选择要生产的电磁炉型号", candidates)
+    else:
+        selected_product = st.selectbox("选择要生产的电磁炉型号", parent_products)
     production_quantity = st.number_input("生产数量", min_value=1, value=10, step=1)
+    explode_levels = st.checkbox("展开多级物料清单", value=True,
+                                 help="子件中的半成品（本身也有物料清单）继续展开到最底层零件，并合并相同零件")
     
     if st.button("生成物料需求计划"):
         with st.spinner("正在生成物料需求计划..."):
             try:
-                # 筛选选定的父件
-                selected_parent = parent_data[parent_data["父件商品"] == selected_product].iloc[0]
-                parent_code = selected_parent["物料清单编码"]
-                
-                # 筛选对应的子件
-                child_data = st.session_state.processed_data["child"]
+                # 生成计划（数值列保持数值类型，合计单独保存）
+                plan = dataset.plan(selected_product, production_quantity, multilevel=explode_levels)
                 
-                # 查找与选定父件相关的所有子件
-                selected_children = child_data[child_data["物料清单编码"] == parent_code].copy()
-                
-                if selected_children.empty:
+                if plan.lines.empty:
                     st.error(f"未找到与'{selected_product}'相关的子件数据。")
                 else:
-                    # 强制转换需用数量列为数值型
-                    try:
-                        selected_children["需用数量"] = pd.to_numeric(selected_children["需用数量"], errors='coerce')
-                        selected_children["成本单价"] = pd.to_numeric(selected_children["成本单价"], errors='coerce')
-                        selected_children["成本金额"] = pd.to_numeric(selected_children["成本金额"], errors='coerce')
-                    except Exception as e:
-                        st.warning(f"数据类型转换警告: {e}，某些计算可能不准确")
-                    
-                    # 计算总需求量
-                    selected_children["需用数量_总计"] = selected_children["需用数量"] * production_quantity
-                    selected_children["成本金额_总计"] = selected_children["成本金额"] * production_quantity
-                    
-                    # 准备输出数据
-                    try:
-                        output_columns = ["子件商品", "规格型号", "需用数量", "成本单价", "成本金额", "需用数量_总计", "成本金额_总计", "默认供应商"]
-                        available_columns = [col for col in output_columns if col in selected_children.columns]
-                        output_data = selected_children[available_columns].copy()
-                        
-                        # 如果缺少某些列，添加空列
-                        for col in output_columns:
-                            if col not in output_data.columns:
-                                output_data[col] = np.nan
-                                
-                    except Exception as e:
-                        st.warning(f"选择列时出现问题: {e}，将使用所有可用列")
-                        output_data = selected_children.copy()
-                    
-                    # 添加总计行
-                    total_cost = output_data["成本金额_总计"].sum()
-                    total_row_data = {}
-                    
-                    # 初始化所有列
-                    for col in output_data.columns:
-                        total_row_data[col] = [""] if col != "成本金额_总计" else [total_cost]
-                    
-                    # 设置特殊列
-                    total_row_data["子件商品"] = [""]
-                    total_row_data["规格型号"] = [""]
-                    if "需用数量" in total_row_data:
-                        total_row_data["需用数量"] = [np.nan]
-                    if "成本单价" in total_row_data:
-                        total_row_data["成本单价"] = [np.nan]
-                    if "成本金额" in total_row_data:
-                        total_row_data["成本金额"] = [np.nan]
-                    if "需用数量_总计" in total_row_data:
-                        total_row_data["需用数量_总计"] = ["成本金额汇总："]
-                    if "默认供应商" in total_row_data:
-                        total_row_data["默认供应商"] = [""]
-                    
-                    total_row = pd.DataFrame(total_row_data)
-                    
-                    # 转换所有列为对象类型，避免Arrow转换问题
-                    for col in total_row.columns:
-                        total_row[col] = total_row[col].astype('object')
-                    
-                    # 将所有输出数据列转换为object类型避免Arrow问题
-                    for col in output_data.columns:
-                        output_data[col] = output_data[col].astype('object')
-                    
-                    # 合并数据
-                    try:
-                        output_data = pd.concat([output_data, total_row], ignore_index=True)
-                    except Exception as e:
-                        st.error(f"合并数据时出错: {e}")
-                        st.write("总计行:", total_row)
-                        st.write("输出数据:", output_data.dtypes)
-                    
                     # 存储生产计划数据
                     st.session_state.production_plan = {
                         "product": selected_product,
                         "quantity": production_quantity,
-                        "output_data": output_data
+                        "plan": plan,
+                        "hash": plan_hash(plan.lines)
                     }
                     
                     # 显示生成的物料需求计划
                     st.subheader(f"{selected_product} - 生产数量: {production_quantity}台")
-                    
-                    # 使用st.table代替st.dataframe来避免Arrow兼容性问题
-                    st.table(output_data)
+                    st.dataframe(plan.lines, use_container_width=True, hide_index=True)
+                    st.write(f"{SUMMARY_LABEL}{plan.total_cost:.2f}")
+                    if product_master is not None:
+                        margin = product_master.margins([dataset.resolve(selected_product)], [plan.product],
+                                                        [plan.total_cost / production_quantity]).iloc[0]
+                        if pd.notna(margin["基准批发价"]):
+                            st.write(f"基准批发价 {margin['基准批发价']:.2f}，单件毛利 {margin['毛利']:.2f}"
+                                     f"（毛利率 {margin['毛利率']:.1%}）")
                     
                     # 提供下载链接
                     st.success("物料需求计划生成成功！")
-                    
-                    # 按供应商分类
-                    if "默认供应商" in selected_children.columns:
-                        if st.checkbox("按供应商分类显示"):
-                            st.subheader("按供应商分类的物料需求")
-                            suppliers = selected_children["默认供应商"].dropna().unique()
-                            
-                            for supplier in suppliers:
-                                supplier_data = selected_children[selected_children["默认供应商"] == supplier].copy()
-                                supplier_total = supplier_data["成本金额_总计"].sum()
-                                
-                                st.write(f"供应商: {supplier} - 总成本: {supplier_total:.2f}")
-                                display_cols = ["子件商品", "规格型号", "需用数量_总计", "成本单价", "成本金额_总计"]
-                                available_display_cols = [col for col in display_cols if col in supplier_data.columns]
-                                st.table(supplier_data[available_display_cols])
             
             except Exception as e:
                 st.error(f"生成物料需求计划时出错: {e}")
                 import traceback
                 st.error(traceback.format_exc())
 
+# 批量生产计划
+if st.session_state.processed_data is not None and plan_mode == "批量计划":
+    dataset = st.session_state.processed_data["dataset"]
+    parent_products = dataset.products
+    
+    demand_source = st.radio("需求来源", ["在页面中填写", "上传CSV/Excel文件", "文字描述"], horizontal=True)
+    demand_df = None
+    if demand_source == "在页面中填写":
+        demand_df = st.data_editor(
+            pd.DataFrame({"型号": parent_products[:1], "生产数量": [10] * min(1, len(parent_products)),
+                          "完工日期": [(pd.Timestamp.today().normalize() + pd.Timedelta(days=30)).date()]
+                          * min(1, len(parent_products))}),
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "型号": st.column_config.SelectboxColumn("型号", options=parent_products, required=True),
+                "生产数量": st.column_config.NumberColumn("生产数量", min_value=1, step=1, required=True),
+                "完工日期": st.column_config.DateColumn("完工日期", help="用于采购排程，可留空"),
+            },
+            key="batch_demand_editor",
+        )
+    elif demand_source == "文字描述":
+        # 本地解析数量和型号描述，按型号名称和商品分类模糊匹配，每个描述可改选候选型号
+        order_text = st.text_area("用一句话描述生产需求", key="order_text",
+                                  placeholder="我要做 10 台商用电磁炉，20 台 3.5KW双平旋钮（3300W)")
+        if order_text.strip():
+            parsed = dataset.model_index(category_tree).parse(order_text, limit=10)
+            rows = []
+            for i, (description, quantity, matches) in enumerate(parsed):
+                if not description:
+                    st.warning(f"数量 {quantity:g} 没有写型号，请补上型号名称或分类。")
+                    continue
+                if matches.empty:
+                    st.warning(f"“{description}”没有匹配的型号")
+                    continue
+                col1, col2 = st.columns([3, 1])
+                labels = {(f"{m}（{p}）" if p else m): m for m, p in zip(matches["型号"], matches["分类"])}
+                choice = col1.selectbox(f"“{description}”", list(labels), key=f"order_text_model_{i}_{description}")
+                model = labels[choice]
+                qty = col2.number_input("生产数量", min_value=1, value=int(quantity or 1), step=1,
+                                        key=f"order_text_qty_{i}_{description}_{quantity}")
+                rows.append((model, qty))
+            if not parsed:
+                st.warning("没有识别出型号，请写明型号名称或分类。")
+            demand_df = pd.DataFrame(rows, columns=["型号", "生产数量"])
+    else:
+        demand_file = st.file_uploader("选择需求文件", type=['csv', 'xlsx', 'xls'], key='batch_demand',
+                                       help="需包含 型号（或 父件商品/物料清单编码）和 生产数量（或 数量）两列，"
+                                            "可选 完工日期 列用于采购排程")
+        if demand_file is not None:
+            try:
+                demand_df = read_demand_file(demand_file)
+                st.dataframe(demand_df, use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"无法读取需求文件: {e}")
+    
+    batch_explode = st.checkbox("展开多级物料清单", value=True, key="batch_explode",
+                                help="子件中的半成品（本身也有物料清单）继续展开到最底层零件")
+    
+    if st.button("生成批量物料需求计划"):
+        demand_df = None if demand_df is None else demand_df.dropna(subset=["型号", "生产数量"])
+        if demand_df is None or demand_df.empty:
+            st.error("请先填写或上传生产需求。")
+        else:
+            with st.spinner("正在生成批量物料需求计划..."):
+                orders = list(zip(demand_df["型号"], demand_df["生产数量"]))
+                # 同一数据集的批量计划增量更新：只重新计算数量有变化的型号
+                batch_key = (dataset.content_key, batch_explode)
+                batch = st.session_state.get("incremental_batch")
+                if batch is None or st.session_state.get("incremental_batch_key") != batch_key:
+                    batch = dataset.incremental_batch(multilevel=batch_explode)
+                    st.session_state.incremental_batch = batch
+                    st.session_state.incremental_batch_key = batch_key
+                batch.update(orders)
+                plan, unresolved = batch.plan(), batch.unresolved
+                
+                if unresolved:
+                    st.warning(f"以下型号未找到物料清单，已忽略: {', '.join(map(str, unresolved))}")
+                
+                total_quantity = plan.quantity
+                st.subheader(f"批量计划 - {demand_df['型号'].nunique()} 个型号，共 {total_quantity} 台")
+                st.dataframe(plan.lines, use_container_width=True, hide_index=True)
+                st.write(f"{SUMMARY_LABEL}{plan.total_cost:.2f}")
+                
+                st.session_state.production_plan = {
+                    "product": plan.product,
+                    "quantity": total_quantity,
+                    "plan": plan,
+                    "hash": plan_hash(plan.lines)
+                }
+                st.success("批量物料需求计划生成成功！")
+
+# 采购排程：按完工日期和供应商交货周期倒排最迟下单日期
+if st.session_state.processed_data is not None and plan_mode == "批量计划":
+    with st.expander("采购排程（按交货周期倒排）"):
+        dated = None
+        if demand_df is not None and "完工日期" in demand_df.columns:
+            dated = demand_df.dropna(subset=["型号", "生产数量", "完工日期"])
+        if dated is None or dated.empty:
+            st.caption("在需求中填写完工日期后，按供应商交货周期计算每个零件的最迟下单日期。")
+        else:
+            lead_file = st.file_uploader("供应商交货周期文件（可选）", type=['csv', 'xlsx', 'xls'], key='lead_times',
+                                         help="需包含 供应商 和 交货周期（天）两列")
+            lead_times = {}
+            if lead_file is not None:
+                try:
+                    lead_times = read_lead_times(lead_file)
+                except Exception as e:
+                    st.error(f"无法读取交货周期文件: {e}")
+            suppliers = list(dataset.matrix(batch_explode).suppliers)
+            lead_df = st.data_editor(
+                pd.DataFrame({"供应商": suppliers,
+                              "交货周期": [lead_times.get(s, DEFAULT_LEAD_DAYS) for s in suppliers]}),
+                use_container_width=True, hide_index=True, disabled=["供应商"],
+                column_config={"交货周期": st.column_config.NumberColumn("交货周期（天）", min_value=0, step=1)},
+                key=f"lead_time_editor_{lead_file.file_id if lead_file else ''}",
+            )
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                assembly_days = st.number_input("装配天数", min_value=0, value=2, step=1,
+                                                help="零件需在完工日期前这么多天到货")
+            with col2:
+                bucket = st.radio("汇总周期", list(BUCKETS), horizontal=True, key="schedule_bucket")
+            with col3:
+                bucket_by = st.radio("汇总对象", ["默认供应商", "子件商品"], horizontal=True, key="schedule_by")
+            schedule, unresolved = dataset.schedule(
+                list(zip(dated["型号"], dated["生产数量"], dated["完工日期"])),
+                dict(zip(lead_df["供应商"], lead_df["交货周期"].fillna(DEFAULT_LEAD_DAYS).astype(int))),
+                multilevel=batch_explode, assembly_days=assembly_days)
+            if unresolved:
+                st.warning(f"以下型号未找到物料清单，已忽略: {', '.join(map(str, unresolved))}")
+            late = schedule[schedule["状态"] == "已逾期"]
+            if len(late):
+                st.warning(f"{len(late)} 行的最迟下单日期已过，需加急或调整完工日期。")
+            st.dataframe(schedule, use_container_width=True, hide_index=True)
+            st.markdown("##### 下单金额" + ("（按周，周一开始）" if BUCKETS[bucket] == "W" else "（按天）"))
+            st.dataframe(bucket_schedule(schedule, BUCKETS[bucket], by=bucket_by), use_container_width=True)
+
+# 库存扣减：只订购扣除现有库存后的缺口
+if st.session_state.production_plan is not None:
+    st.header("库存扣减")
+    gross_plan = st.session_state.production_plan["plan"]
+    use_stock = st.checkbox("扣除现有库存，只订购缺少的部分",
+                            help="上传库存文件或直接在表格中填写现存量；修改后净需求立即重新计算")
+    if use_stock:
+        stock_file = st.file_uploader("上传库存文件（可选）", type=['csv', 'xlsx', 'xls'], key='stock',
+                                      help="需包含 子件商品 和 现存量（或 库存数量/数量）列，可选 规格型号、仓库")
+        inventory = Inventory.empty()
+        if stock_file is not None:
+            try:
+                inventory = load_inventory(stock_file.getvalue(), stock_file.name)
+                st.caption(f"库存记录 {inventory.sku_count} 条")
+            except Exception as e:
+                st.error(f"无法读取库存文件: {e}")
+        projected = st.session_state.get("projected_stock")
+        if projected is not None and len(projected):
+            inventory = inventory.plus(projected)
+            st.caption(f"含合并下单的预计结余 {len(projected)} 条")
+            if st.button("清除预计结余"):
+                st.session_state.projected_stock = None
+                st.experimental_rerun()
+        
+        stock_columns = [c for c in ["子件商品", "规格型号", "子件预出仓库", "需用数量_总计"] if c in gross_plan.lines.columns]
+        stock_table = gross_plan.lines[stock_columns].rename(columns={"需用数量_总计": "毛需求数量"})
+        # 库存按计划行顺序分配，同一零件、同一仓库的库存只分给一行
+        stock_table[ON_HAND_COLUMN] = inventory.allocate(gross_plan.lines)
+        # 编辑器按计划、库存文件和预计结余区分，换计划后重新取库存
+        stock_key = (st.session_state.production_plan["hash"][:12] + (stock_file.file_id if stock_file else "")
+                     + (f"_{len(projected)}" if projected is not None else ""))
+        edited_stock = st.data_editor(
+            stock_table,
+            use_container_width=True,
+            hide_index=True,
+            disabled=stock_columns,
+            column_config={ON_HAND_COLUMN: st.column_config.NumberColumn(ON_HAND_COLUMN, min_value=0,
+                                                                         help="分配给该行的库存，可逐行修改")},
+            key=f"stock_editor_{stock_key}",
+        )
+        netted = net_plan(gross_plan, edited_stock[ON_HAND_COLUMN].fillna(0).to_numpy())
+        shortage = netted.lines["需用数量_总计"] > 0
+        st.write(f"需订购零件 {int(shortage.sum())} 种（共 {len(netted.lines)} 种），"
+                 f"净需求{SUMMARY_LABEL}{netted.total_cost:.2f}（毛需求 {gross_plan.total_cost:.2f}）")
+        if "默认供应商" in netted.lines.columns:
+            st.dataframe(supplier_summary(purchase_orders(netted.lines[shortage])),
+                         use_container_width=True, hide_index=True)
+        st.session_state.production_plan["net_plan"] = netted
+        st.session_state.production_plan["net_hash"] = plan_hash(netted.lines)
+    else:
+        st.session_state.production_plan["net_plan"] = None
+
+# 当前用于采购和导出的计划（启用库存扣减时为净需求计划）
+def active_plan():
+    production_plan = st.session_state.production_plan
+    if production_plan.get("net_plan") is not None:
+        return production_plan["net_plan"], production_plan["net_hash"]
+    return production_plan["plan"], production_plan["hash"]
+
+# 调价模拟：情景只保存调价差异，每次调整只重算使用被调零件的物料清单
+if st.session_state.processed_data is not None:
+    with st.expander("调价模拟"):
+        dataset = st.session_state.processed_data["dataset"]
+        scenario = st.session_state.get("price_scenario")
+        try:
+            where_used = dataset.where_used()
+            if scenario is None or st.session_state.get("price_scenario_dataset") != dataset.content_key:
+                scenario = st.session_state.price_scenario = dataset.price_scenario()
+                st.session_state.price_scenario_dataset = dataset.content_key
+        except Exception as e:
+            scenario = None
+            st.error(f"无法建立调价情景: {e}")
+        cyclic = dataset.matrix(True).cyclic
+        if cyclic:
+            st.caption(f"{len(cyclic)} 个循环引用的物料清单无法展开，不参与调价模拟。")
+        if scenario is not None:
+            scenario_kind = st.radio("调价对象", ["零件", "供应商的全部零件"], horizontal=True, key="scenario_kind")
+            if scenario_kind == "零件":
+                scenario_query = st.text_input("搜索零件", "", key="scenario_query")
+                # 半成品在多级矩阵中已展开为零件，不作为调价对象
+                matches = where_used.search_parts(scenario_query, limit=len(where_used.part_keys))
+                part_choices = scenario.priceable(matches)
+                scenario_parts = st.multiselect("调价零件", part_choices[:200], key="scenario_parts")
+            else:
+                scenario_supplier = st.selectbox("供应商", list(where_used.suppliers), key="scenario_supplier")
+                scenario_parts = scenario.priceable(where_used.supplier_parts(scenario_supplier)) \
+                    if scenario_supplier else []
+            price_change = st.slider("成本单价调整（%）", min_value=-50, max_value=100, value=0, step=1,
+                                     key="scenario_percent")
+        
+            # 与上次的情景比较，只更新有变化的零件
+            factor = 1 + price_change / 100
+            wanted = {scenario.matrix.part_keys.get_loc(p): factor for p in scenario_parts} if price_change else {}
+            for part in [p for p in scenario.changes if p not in wanted]:
+                scenario.reset(part)
+            for part, value in wanted.items():
+                if scenario.changes.get(part) != ("按比例", value):
+                    scenario.set_factor(part, value)
+        
+            impact = scenario.impact()
+            if not scenario.changes:
+                st.caption("选择零件并调整单价后，显示受影响型号的新成本。")
+            else:
+                st.caption(f"调价零件 {len(scenario.changes)} 种，影响物料清单 {len(impact)} 个")
+                st.dataframe(impact.assign(变化率=impact["变化率"] * 100), use_container_width=True, hide_index=True,
+                             column_config={"变化率": st.column_config.NumberColumn("变化率", format="%.2f%%")})
+                if st.session_state.production_plan is not None:
+                    before, after = scenario.plan_delta(active_plan()[0])
+                    st.write(f"当前计划成本金额：{before:.2f} → {after:.2f}（{after - before:+.2f}）")
+
+# 按供应商生成采购订单
+if st.session_state.production_plan is not None:
+    current_plan, plan_key = active_plan()
+    plan_lines = current_plan.lines
+    if current_plan is not st.session_state.production_plan["plan"]:
+        # 净需求为 0 的零件不下单
+        plan_lines = plan_lines[plan_lines["需用数量_总计"] > 0]
+    
+    # 多供应商比价：每个零件选采购金额最低的供应商（考虑最小订购量和价格阶梯）
+    with st.expander("多供应商比价"):
+        quote_upload = st.file_uploader("供应商报价（供应商、子件商品、规格型号、单价、最小订购量、数量下限）",
+                                        type=['xlsx', 'csv'], key='quote_file')
+        use_master_quotes = product_master is not None and st.checkbox(
+            "商品档案的默认供应商和参考成本也作为报价", value=True, key='quote_master')
+        quote_book = None
+        if quote_upload is not None or use_master_quotes:
+            quote_data = quote_upload.getvalue() if quote_upload is not None else None
+            quote_key = (hashlib.sha256(quote_data).hexdigest() if quote_data is not None else None,
+                         product_key if use_master_quotes else None)
+            try:
+                quote_book = build_quote_book(quote_key, quote_data, quote_upload.name if quote_upload else None,
+                                              product_master if use_master_quotes else None)
+            except Exception as e:
+                st.error(f"无法读取报价: {e}")
+        if quote_book is None:
+            st.caption("上传报价文件或使用商品档案后比价")
+        elif "默认供应商" in plan_lines.columns:
+            allocation = quote_book.allocate(plan_lines)
+            summary = savings_summary(allocation)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("报价条数", len(quote_book))
+            col2.metric("更换供应商的零件", int(summary["更换供应商的零件"].sum()))
+            col3.metric("节省金额", f"{allocation['节省金额'].sum():.2f}")
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+            if st.checkbox("只显示有节省的零件", value=True, key='quote_saved_only'):
+                allocation = allocation[allocation["节省金额"].abs() > 1e-9]
+            st.dataframe(allocation, use_container_width=True, hide_index=True)
+            if st.checkbox("采购订单按比价结果下单", key='quote_apply'):
+                plan_lines = allocated_lines(quote_book.allocate(plan_lines))
+                plan_key = (plan_key, quote_key)
+    
+    # 合并下单：多个计划的相同供应商+零件合并，按起订量、包装数量、价格阶梯取整，结余计入预计库存
+    with st.expander("合并下单（起订量、包装数量）"):
+        open_plans = st.session_state.setdefault("open_plans", {})
+        col1, col2 = st.columns(2)
+        if col1.button("加入待下单计划", disabled=plan_key in open_plans):
+            open_plans[plan_key] = (f"{st.session_state.production_plan['product']}×"
+                                    f"{st.session_state.production_plan['quantity']}", plan_lines)
+        if col2.button("清空待下单计划", disabled=not open_plans):
+            open_plans.clear()
+        rules_upload = st.file_uploader("起订量和包装数量（供应商可省略、子件商品、规格型号、最小订购量、包装数量）",
+                                        type=['xlsx', 'csv'], key='order_rules_file')
+        order_rules = None
+        if rules_upload is not None:
+            try:
+                order_rules = load_order_rules(rules_upload.getvalue(), rules_upload.name)
+            except Exception as e:
+                st.error(f"无法读取起订量文件: {e}")
+        if not open_plans:
+            st.caption("把当前计划加入待下单计划后合并下单")
+        else:
+            st.caption("待下单计划：" + "、".join(name for name, _ in open_plans.values())
+                       + ("；价格阶梯取自多供应商比价的报价" if quote_book is not None else ""))
+            consolidated = consolidate(list(open_plans.values()), order_rules, quote_book)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("合并后订单行", len(consolidated))
+            col2.metric("订购金额", f"{consolidated['成本金额_总计'].sum():.2f}")
+            col3.metric("预计结余零件", int((consolidated["预计结余"] > 1e-9).sum()))
+            st.dataframe(consolidated, use_container_width=True, hide_index=True)
+            if st.checkbox("采购订单按合并结果下单", key='consolidate_apply'):
+                plan_lines = consolidated_lines(consolidated)
+                plan_key = ("合并下单", tuple(open_plans), quote_key if quote_book is not None else None,
+                            rules_upload.file_id if rules_upload is not None else None)
+            if st.button("结余计入预计库存", help="预计结余在库存扣减中作为现存量，用于后续计划"):
+                leftover = projected_stock(consolidated)
+                previous = st.session_state.get("projected_stock")
+                st.session_state.projected_stock = leftover if previous is None \
+                    else pd.concat([previous, leftover], ignore_index=True)
+                open_plans.clear()
+                st.experimental_rerun()
+    
+    if "默认供应商" in plan_lines.columns and st.checkbox("按供应商分类显示"):
+        st.subheader("按供应商分类的物料需求")
+        orders = purchase_orders(plan_lines)
+        st.dataframe(supplier_summary(orders), use_container_width=True, hide_index=True)
+        
+        supplier = st.selectbox("查看供应商订单", list(orders))
+        if supplier is not None:
+            st.write(f"供应商: {supplier} - 总成本: {orders[supplier]['成本金额_总计'].sum():.2f}")
+            st.dataframe(orders[supplier], use_container_width=True, hide_index=True)
+        
+        plan_name = st.session_state.production_plan["product"]
+        plan_quantity = st.session_state.production_plan["quantity"]
+        if st.button("生成采购订单文件"):
+            with st.spinner("正在生成采购订单文件..."):
+                workbook_data, zip_data = build_purchase_order_files(plan_key, plan_lines)
+                st.session_state.purchase_order_files = {
+                    "key": plan_key,
+                    "workbook": workbook_data,
+                    "zip": zip_data,
+                    "time": datetime.now().strftime("%Y%m%d_%H%M%S")
+                }
+        
+        order_files = st.session_state.get("purchase_order_files")
+        if order_files is not None and order_files["key"] == plan_key:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="下载采购订单（每个供应商一个工作表）",
+                    data=order_files["workbook"],
+                    file_name=f"{plan_name}_采购订单_{plan_quantity}台_{order_files['time']}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+            with col2:
+                st.download_button(
+                    label="下载采购订单（每个供应商一个文件，zip）",
+                    data=order_files["zip"],
+                    file_name=f"{plan_name}_采购订单_{plan_quantity}台_{order_files['time']}.zip",
+                    mime="application/zip"
+                )
+
 # 导出数据
 if st.session_state.production_plan is not None:
     st.header("导出数据")
     
-    output_data = st.session_state.production_plan["output_data"]
+    plan, plan_key = active_plan()
+    output_data = plan.lines
     product_name = st.session_state.production_plan["product"]
     quantity = st.session_state.production_plan["quantity"]
     
-    # 创建Excel文件用于下载
-    output = io.BytesIO()
+    large_export = len(output_data) > LARGE_EXPORT_ROWS
+    export_format = st.radio("导出格式", list(EXPORT_FORMATS), index=1 if large_export else 0, horizontal=True,
+                             help="数据量很大时建议使用 CSV 或 Parquet")
+    if large_export:
+        st.info(f"计划共 {len(output_data)} 行，导出为 xlsx 较慢，建议使用 CSV 或 Parquet。")
     
-    try:
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            output_data.to_excel(writer, index=False, sheet_name="物料需求计划")
-        
-        # 提供下载链接
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{product_name}_物料需求计划_{quantity}台_{current_time}.xlsx"
-        
+    # 只在点击时生成导出文件
+    export_key = (plan_key, export_format)
+    if st.button("生成导出文件"):
+        try:
+            with st.spinner("正在生成导出文件..."):
+                st.session_state.export_file = {
+                    "key": export_key,
+                    "data": build_export_file(plan_key, export_format, output_data, plan.footer_rows()),
+                    "time": datetime.now().strftime("%Y%m%d_%H%M%S")
+                }
+        except Exception as e:
+            st.error(f"生成导出文件时出错: {e}")
+    
+    export_file = st.session_state.get("export_file")
+    if export_file is not None and export_file["key"] == export_key:
+        extension, mime = EXPORT_FORMATS[export_format]
         st.download_button(
-            label="下载Excel文件",
-            data=output.getvalue(),
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            label=f"下载{export_format}文件",
+            data=export_file["data"],
+            file_name=f"{product_name}_物料需求计划_{quantity}台_{export_file['time']}{extension}",
+            mime=mime
         )
-    except Exception as e:
-        st.error(f"生成Excel文件时出错: {e}")
 
 # 页脚
 st.markdown("---")
@@ -0,0 +1,44 @@
+"""合并下单的耗时
+
+用法: python benchmarks/bench_consolidate.py [子件xlsx] [父件xlsx]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bom import BomDataset, Inventory, OrderRules, consolidate, net_plan, projected_stock, read_bom_excel  # noqa: E402
+
+
+def _ms(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    child_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "物料清单父子件.xlsx")
+    parent_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "物料清单父件.xlsx")
+    dataset = BomDataset(read_bom_excel(parent_path), read_bom_excel(child_path))
+    plans = [dataset.plan(m, 3) for m in dataset.products[:20]]
+    named = [(p.product, p.lines) for p in plans]
+
+    # 每个零件都按 100 一包订购，使大部分零件有预计结余
+    lines = pd.concat([lines for _, lines in named], ignore_index=True)
+    rules = OrderRules(pd.DataFrame({"子件商品": lines["子件商品"], "规格型号": lines["规格型号"],
+                                     "最小订购量": 0, "包装数量": 100}))
+    print(f"合并 {len(named)} 个计划（{len(lines)} 行）：{_ms(lambda: consolidate(named, rules)):.2f} ms")
+
+    consolidated = consolidate(named, rules)
+    inventory = Inventory.empty().plus(projected_stock(consolidated))
+    print(f"预计结余 {len(inventory.stock)} 行；计入库存后重算下一份计划："
+          f"{_ms(lambda: net_plan(plans[0], inventory)):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""物料清单查找延迟：全表布尔筛选 vs BomIndex
+
+用法: python benchmarks/bench_index.py [子件xlsx] [父件xlsx]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bom import BomIndex, read_bom_excel  # noqa: E402
+
+
+def lookup_mask(parent, child, product):
+    selected_parent = parent[parent["父件商品"] == product].iloc[0]
+    code = selected_parent["物料清单编码"]
+    return child[child["物料清单编码"] == code]
+
+
+def lookup_index(index, product):
+    return index.children(index.code_for(product))
+
+
+def main():
+    child_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "物料清单父子件.xlsx")
+    parent_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "物料清单父件.xlsx")
+    child = read_bom_excel(child_path)
+    parent = read_bom_excel(parent_path)
+
+    start = time.perf_counter()
+    index = BomIndex(parent, child)
+    build = time.perf_counter() - start
+    print(f"子件 {len(child)} 行，父件 {len(index.products)} 个；索引构建 {build * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    print(f"{'查找次数':>8}{'布尔筛选(ms)':>16}{'索引(ms)':>12}{'单次筛选(us)':>16}{'单次索引(us)':>16}{'加速':>8}")
+    for n in (1, 100, 10000):
+        products = [rng.choice(index.products) for _ in range(n)]
+
+        start = time.perf_counter()
+        for product in products:
+            lookup_mask(parent, child, product)
+        mask = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for product in products:
+            lookup_index(index, product)
+        indexed = time.perf_counter() - start
+
+        print(f"{n:>8}{mask * 1000:>16.2f}{indexed * 1000:>12.2f}"
+              f"{mask / n * 1e6:>16.1f}{indexed / n * 1e6:>16.1f}{mask / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""对比 pd.read_excel 与流式读取在物料清单父子件上的耗时和峰值内存
+
+用法: python benchmarks/bench_loader.py [xlsx路径]
+每种方式在独立子进程中运行，峰值内存取 ru_maxrss。
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FILE = os.path.join(ROOT, "物料清单父子件.xlsx")
+
+RUNNER = r"""
+import resource, sys, time, warnings
+sys.path.insert(0, {root!r})
+warnings.simplefilter("ignore")
+import pandas as pd
+from bom import read_bom_excel
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {method!r} == "pd.read_excel":
+    df = pd.read_excel({path!r})
+else:
+    df = read_bom_excel({path!r})
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, base, peak, len(df), df.memory_usage(deep=True).sum())
+"""
+
+
+def run(method, path):
+    code = RUNNER.format(root=ROOT, method=method, path=path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    elapsed, base, peak, rows, frame = out.stdout.split()
+    return float(elapsed), int(base) / 1024, int(peak) / 1024, int(rows), int(frame) / 1024 / 1024
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FILE
+    print(f"文件: {os.path.basename(path)} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    print(f"{'方式':<16}{'耗时(s)':>10}{'峰值RSS(MB)':>14}{'增量(MB)':>12}{'行数':>8}{'DataFrame(MB)':>15}")
+    for method in ("pd.read_excel", "read_bom_excel"):
+        elapsed, base, peak, rows, frame = run(method, path)
+        print(f"{method:<16}{elapsed:>10.2f}{peak:>14.1f}{peak - base:>12.1f}{rows:>8}{frame:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
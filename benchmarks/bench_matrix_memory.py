@@ -0,0 +1,41 @@
+"""物料清单内存占用：对象列 DataFrame vs 稀疏矩阵 + 整数字典
+
+用法: python benchmarks/bench_matrix_memory.py [子件xlsx] [父件xlsx]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bom import BomExplosion, BomIndex, BomMatrix, read_bom_excel  # noqa: E402
+
+
+def mb(n):
+    return n / 1024 / 1024
+
+
+def main():
+    child_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "物料清单父子件.xlsx")
+    parent_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "物料清单父件.xlsx")
+    child = read_bom_excel(child_path)
+    parent = read_bom_excel(parent_path)
+
+    start = time.perf_counter()
+    explosion = BomExplosion(BomIndex(parent, child))
+    matrices = {level: BomMatrix.from_explosion(explosion, multilevel=level) for level in (False, True)}
+    build = time.perf_counter() - start
+
+    print(f"子件 DataFrame: {len(child)} 行, {mb(child.memory_usage(deep=True).sum()):.2f} MB")
+    for name, size in child.memory_usage(deep=True).items():
+        print(f"  {name:<8}{mb(size):>8.2f} MB")
+    for level, matrix in matrices.items():
+        label = "多级展开" if level else "直接子件"
+        print(f"稀疏矩阵（{label}）: {matrix.shape[0]}x{matrix.shape[1]}, 非零 {matrix.nnz}, "
+              f"供应商 {len(matrix.suppliers)}, {mb(matrix.memory_usage()):.2f} MB")
+    print(f"构建耗时（含展开引擎）: {build * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""文字下单解析的耗时：索引构建一次，之后每句解析和检索
+
+用法: python benchmarks/bench_parse.py [子件xlsx] [父件xlsx]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bom import BomDataset, read_bom_excel, read_category_tree  # noqa: E402
+
+SENTENCES = [
+    "我要做 10 台商用电磁炉",
+    "做20台3.5KW双平旋钮（3300W)和5台出口双电磁 110V",
+    "5KW380V双平旋钮 x 30，家用双灶两台",
+    "帮我生产一百台阁兰喜双电磁左凹右平2500W",
+]
+
+
+def main():
+    child_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "物料清单父子件.xlsx")
+    parent_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "物料清单父件.xlsx")
+    dataset = BomDataset(read_bom_excel(parent_path), read_bom_excel(child_path))
+    tree = read_category_tree(os.path.join(ROOT, "product_cate.xlsx"), os.path.join(ROOT, "product.xlsx"))
+
+    start = time.perf_counter()
+    index = dataset.model_index(tree)
+    build = (time.perf_counter() - start) * 1000
+    print(f"型号 {len(index.models)} 个：构建索引 {build:.1f} ms")
+
+    for sentence in SENTENCES:
+        start = time.perf_counter()
+        orders, unmatched = index.orders(sentence)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{elapsed:6.2f} ms  {sentence} -> {orders}{'，未匹配 ' + '、'.join(unmatched) if unmatched else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""5000 行计划的渲染耗时：对象列 + 合计行 + st.table vs 数值列 + st.dataframe
+
+用法: python benchmarks/bench_render.py [行数]
+浏览器端绘制无法在无头环境中测量，这里统计服务端的准备、Arrow 序列化和整个脚本运行耗时，
+以及发送到浏览器的数据量。
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from streamlit import type_util  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from bom import SUMMARY_LABEL, build_plan  # noqa: E402
+
+
+def make_children(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "子件商品": [f"零件{i:05d}" for i in range(n_rows)],
+        "规格型号": [f"规格{i % 97}" for i in range(n_rows)],
+        "需用数量": rng.integers(1, 10, n_rows).astype(float),
+        "成本单价": rng.random(n_rows).round(2) * 20,
+        "成本金额": rng.random(n_rows).round(2) * 50,
+        "默认供应商": [f"供应商{i % 80}" for i in range(n_rows)],
+    })
+
+
+def object_table(children, quantity):
+    # 原来的做法：全部转为 object 并把合计行混入数据
+    output = children.copy()
+    output["需用数量_总计"] = output["需用数量"] * quantity
+    output["成本金额_总计"] = output["成本金额"] * quantity
+    total = {col: [""] for col in output.columns}
+    total["需用数量_总计"] = [SUMMARY_LABEL]
+    total["成本金额_总计"] = [output["成本金额_总计"].sum()]
+    output = output.astype(object)
+    return pd.concat([output, pd.DataFrame(total).astype(object)], ignore_index=True)
+
+
+def render_table():
+    import os
+    import pickle
+    import streamlit as st
+    with open(os.environ["BOM_BENCH_DATA"], "rb") as fh:
+        st.table(pickle.load(fh))
+
+
+def render_dataframe():
+    import os
+    import pickle
+    import streamlit as st
+    with open(os.environ["BOM_BENCH_DATA"], "rb") as fh:
+        st.dataframe(pickle.load(fh), use_container_width=True, hide_index=True)
+
+
+def timed(fn, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_app(script, df):
+    with tempfile.NamedTemporaryFile(suffix=".pkl", delete=False) as fh:
+        pickle.dump(df, fh)
+    os.environ["BOM_BENCH_DATA"] = fh.name
+    try:
+        return timed(lambda: AppTest.from_function(script, default_timeout=300).run())[0]
+    finally:
+        os.unlink(fh.name)
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    children = make_children(n_rows)
+
+    prep_old, old = timed(lambda: object_table(children, 10))
+    prep_new, plan = timed(lambda: build_plan("基准测试", children, 10))
+    ser_old, payload_old = timed(lambda: type_util.data_frame_to_bytes(type_util.fix_arrow_incompatible_column_types(old)))
+    ser_new, payload_new = timed(lambda: type_util.data_frame_to_bytes(plan.lines))
+    app_old = run_app(render_table, old)
+    app_new = run_app(render_dataframe, plan.lines)
+
+    print(f"计划行数: {n_rows}")
+    print(f"{'方式':<28}{'准备(ms)':>10}{'序列化(ms)':>12}{'脚本运行(ms)':>14}{'数据量(KB)':>12}")
+    print(f"{'object + 合计行 + st.table':<28}{prep_old * 1000:>10.1f}{ser_old * 1000:>12.1f}"
+          f"{app_old * 1000:>14.1f}{len(payload_old) / 1024:>12.1f}")
+    print(f"{'数值列 + st.dataframe':<28}{prep_new * 1000:>10.1f}{ser_new * 1000:>12.1f}"
+          f"{app_new * 1000:>14.1f}{len(payload_new) / 1024:>12.1f}")
+    print("st.table 在浏览器中为每个单元格生成 HTML（无虚拟滚动），st.dataframe 只绘制可见行。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""只改生产数量时重新生成计划的耗时
+
+用法: python benchmarks/bench_replan.py [子件xlsx] [父件xlsx]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bom import BomDataset, read_bom_excel  # noqa: E402
+
+
+def _ms(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    child_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "物料清单父子件.xlsx")
+    parent_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, "物料清单父件.xlsx")
+    dataset = BomDataset(read_bom_excel(parent_path), read_bom_excel(child_path))
+    model = dataset.products[0]
+
+    start = time.perf_counter()
+    dataset.plan(model, 10)
+    first = (time.perf_counter() - start) * 1000
+    print(f"单一型号：首次 {first:.2f} ms，改数量后 {_ms(lambda: dataset.plan(model, 20)):.2f} ms")
+
+    orders = [(m, 10) for m in dataset.products]
+    batch = dataset.incremental_batch()
+    batch.update(orders)
+    changed = list(orders)
+
+    def change_one():
+        changed[0] = (model, changed[0][1] + 1)
+        batch.update(changed)
+
+    print(f"批量 {len(orders)} 个型号：全量 {_ms(lambda: dataset.plan_batch(orders)):.2f} ms，"
+          f"改一行增量更新 {_ms(change_one):.3f} ms，生成计划行 {_ms(batch.lines):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
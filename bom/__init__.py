@@ -0,0 +1,27 @@
+"""电磁炉物料清单计划核心逻辑"""
+from .schema import NOT_NUMERIC, NUMERIC_COLUMNS, normalize_bom, schema_issues
+from .loader import PLANNER_COLUMNS, read_bom_excel, read_xlsx_columns
+from .cache import BomCache, content_key, read_bom_excel_cached
+from .index import BomIndex
+from .explode import BomCycleError, BomExplosion, part_keys
+from .matrix import BomMatrix
+from .batch import IncrementalBatch, demand_vector, plan_batch, read_demand_file
+from .schedule import BUCKETS, DEFAULT_LEAD_DAYS, bucket_schedule, read_lead_times, schedule_orders
+from .mrp import MrpModel, MrpResult
+from .orderparse import MATCH_COLUMNS, MENTION_COLUMNS, ModelIndex, chinese_number, name_pattern, split_order_text
+from .sourcing import (ALLOCATION_COLUMNS, QUOTE_COLUMNS, QuoteBook, allocated_lines, master_quotes, read_quotes,
+                       savings_summary)
+from .consolidate import (CONSOLIDATED_COLUMNS, ORDER_RULE_COLUMNS, OrderRules, consolidate, consolidated_lines,
+                          merge_plans, projected_stock, read_order_rules)
+from .purchase import purchase_orders, purchase_orders_workbook, purchase_orders_zip, supplier_summary
+from .export import EXPORT_FORMATS, LARGE_EXPORT_ROWS, export_bytes, plan_hash
+from .plan import PLAN_COLUMNS, SUMMARY_LABEL, MaterialPlan, build_plan, scale_plan, typed_lines, unit_lines
+from .inventory import ON_HAND_COLUMN, Inventory, net_plan, read_inventory_file
+from .quality import QualityReport, check_bom
+from .rollup import ROLLUP_COLUMNS, cost_rollup
+from .whereused import PART_USAGE_COLUMNS, SUPPLIER_USAGE_COLUMNS, WhereUsedIndex
+from .whatif import PriceScenario
+from .combined import COMBINED_PARENT_COLUMNS, is_combined, split_combined, split_memory
+from .category import CategoryTree, read_category_tree
+from .product import MARGIN_COLUMNS, PRODUCT_COLUMNS, ProductMaster, read_product_master
+from .dataset import BomDataset
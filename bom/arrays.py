@@ -0,0 +1,26 @@
+"""分组数组运算的公用工具
+
+CSR 行段展开、按组取首个候选两种写法在排程、比价、合并下单和文字解析中都要用到，
+集中在这里，各处只调用，不再各自复制。
+"""
+import numpy as np
+
+
+def ragged_ranges(starts, lengths):
+    """把多个行段 [starts[i], starts[i] + lengths[i]) 依次拼成一个下标数组，不逐段循环。"""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+
+
+def first_in_group(groups, *keys):
+    """每组按 keys（先比较前面的键）排序后的第一个元素的下标，按组号从小到大排列。
+
+    如 first_in_group(行号, 金额, 数量) 为每行取金额最低、金额相同时数量最少的候选。
+    """
+    groups = np.asarray(groups)
+    order = np.lexsort(tuple(reversed(keys)) + (groups,))
+    if not len(order):
+        return order
+    return order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
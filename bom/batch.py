@@ -0,0 +1,138 @@
+"""批量生产计划
+
+输入若干 (型号, 数量)，组成需求向量后与物料清单矩阵相乘，
+一次得到所有型号合并后的零件需求。
+"""
+import numpy as np
+import pandas as pd
+
+from .loader import read_table_file
+from .plan import MaterialPlan
+
+# 需求文件中可识别的列名
+DEMAND_MODEL_COLUMNS = ("父件商品", "型号", "物料清单编码")
+DEMAND_QUANTITY_COLUMNS = ("生产数量", "数量")
+DEMAND_DATE_COLUMNS = ("完工日期", "交货日期", "需求日期")
+
+BATCH_OUTPUT_COLUMNS = ["子件商品", "规格型号", "计量单位", "需用数量_总计", "成本单价", "成本金额_总计", "默认供应商",
+                        "子件预出仓库"]
+
+
+def read_demand_file(file):
+    """读取批量需求 CSV/xlsx，返回包含 型号、生产数量（及可选的 完工日期）列的 DataFrame。"""
+    df = read_table_file(file)
+
+    model_col = next((c for c in DEMAND_MODEL_COLUMNS if c in df.columns), None)
+    qty_col = next((c for c in DEMAND_QUANTITY_COLUMNS if c in df.columns), None)
+    if model_col is None or qty_col is None:
+        raise ValueError(
+            f"需求文件需包含型号列（{'/'.join(DEMAND_MODEL_COLUMNS)}）"
+            f"和数量列（{'/'.join(DEMAND_QUANTITY_COLUMNS)}）"
+        )
+    demand = pd.DataFrame({
+        "型号": df[model_col].str.strip(),
+        "生产数量": pd.to_numeric(df[qty_col], errors="coerce"),
+    })
+    # 可选的完工日期列，供采购排程使用
+    date_col = next((c for c in DEMAND_DATE_COLUMNS if c in df.columns), None)
+    if date_col is not None:
+        demand["完工日期"] = pd.to_datetime(df[date_col], errors="coerce")
+    return demand.dropna(subset=["型号", "生产数量"]).reset_index(drop=True)
+
+
+def demand_vector(matrix, index, orders):
+    """把 (型号, 数量) 列表转换为按矩阵行排列的需求向量。
+
+    型号可以是父件商品名称或物料清单编码；同一型号出现多次时数量累加。
+    返回 (需求向量, 无法识别的型号列表)。
+    """
+    demand = np.zeros(len(matrix.codes))
+    unresolved = []
+    for model, quantity in orders:
+        row = model_row(matrix, index, model)
+        if row is None:
+            unresolved.append(model)
+            continue
+        demand[row] += float(quantity)
+    return demand, unresolved
+
+
+def model_row(matrix, index, model):
+    """型号（父件商品名称或物料清单编码）在矩阵中的行号，找不到或循环引用无法展开时返回 None。"""
+    code = index.code_for(model)
+    if code is None and model in matrix.row_of:
+        code = model
+    if code in matrix.cyclic:
+        return None
+    return matrix.row_of.get(code)
+
+
+def plan_batch(matrix, index, orders):
+    """批量计划：一次矩阵-向量乘法得到所有型号合并后的零件需求。
+
+    返回 (零件需求 DataFrame, 无法识别的型号列表)。
+    """
+    demand, unresolved = demand_vector(matrix, index, orders)
+    quantity, amount = matrix.requirements(demand)
+    return _batch_lines(matrix, quantity, amount), unresolved
+
+
+def _batch_lines(matrix, quantity, amount, tolerance=0.0):
+    used = np.flatnonzero(np.abs(quantity) > tolerance)
+    lines = matrix.parts.iloc[used].reset_index(drop=True)
+    lines["需用数量_总计"] = quantity[used]
+    lines["成本单价"] = amount[used] / quantity[used]
+    lines["成本金额_总计"] = amount[used]
+    for col in BATCH_OUTPUT_COLUMNS:
+        if col not in lines.columns:
+            lines[col] = np.nan
+    return lines[BATCH_OUTPUT_COLUMNS]
+
+
+class IncrementalBatch:
+    """可增量更新的批量计划。
+
+    保存当前需求向量和对应的零件需求；某个型号的数量变化时，
+    只把该行的差值乘到矩阵对应行上，不重新计算其他型号。
+    """
+
+    # 反复加减后残留的浮点误差，低于该值视为 0
+    TOLERANCE = 1e-9
+
+    def __init__(self, matrix, index):
+        self.matrix = matrix
+        self.index = index
+        self.demand = np.zeros(len(matrix.codes))
+        self.quantity = np.zeros(len(matrix.parts))
+        self.amount = np.zeros(len(matrix.parts))
+        self.unresolved = []
+
+    def _apply(self, row, delta):
+        cols, qty, amt = self.matrix.row_entries(row)
+        np.add.at(self.quantity, cols, qty * delta)
+        np.add.at(self.amount, cols, amt * delta)
+        self.demand[row] += delta
+
+    def update(self, orders):
+        """把需求更新为 orders，只处理数量有变化的行，返回处理的行数。"""
+        demand, self.unresolved = demand_vector(self.matrix, self.index, orders)
+        changed = np.flatnonzero(demand != self.demand)
+        for row in changed:
+            self._apply(row, demand[row] - self.demand[row])
+        if not demand.any():
+            # 需求清空时顺便清掉累计误差
+            self.quantity[:] = 0.0
+            self.amount[:] = 0.0
+        return len(changed)
+
+    @property
+    def total_quantity(self):
+        total = float(self.demand.sum())
+        return int(total) if total.is_integer() else total
+
+    def lines(self):
+        return _batch_lines(self.matrix, self.quantity, self.amount, self.TOLERANCE)
+
+    def plan(self):
+        """当前需求对应的批量计划。"""
+        return MaterialPlan("批量计划", self.total_quantity, self.lines())
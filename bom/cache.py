@@ -0,0 +1,147 @@
+"""按文件内容哈希持久化的物料清单缓存
+
+解析结果以 Arrow IPC 文件保存在磁盘上，重启后通过内存映射直接读回；
+缓存目录超过容量上限时按最近使用时间淘汰。
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import pyarrow as pa
+
+from .loader import PLANNER_COLUMNS, read_bom_excel
+from .schema import ISSUES_ATTR, schema_issues
+
+# 解析逻辑或列定义变化时递增，使旧缓存自动失效
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "BOM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bom-planner")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("BOM_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+_SUFFIX = ".arrow"
+
+
+def content_key(data, *salt):
+    """文件字节内容（加上解析参数）的 SHA-256。"""
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}|{'|'.join(map(str, salt))}|".encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+
+class BomCache:
+    """磁盘缓存：每个条目是一个目录，内含若干以表名命名的 Arrow 文件。"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """返回 {表名: DataFrame}，未命中返回 None。"""
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return None
+        frames = {}
+        try:
+            for name in os.listdir(entry):
+                if not name.endswith(_SUFFIX):
+                    continue
+                with pa.memory_map(os.path.join(entry, name)) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                frames[name[: -len(_SUFFIX)]] = table.to_pandas()
+        except (OSError, pa.ArrowException):
+            # 条目损坏时当作未命中，并删掉让其重建
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # 更新访问时间，供 LRU 淘汰使用
+        now = time.time()
+        os.utime(entry, (now, now))
+        return frames
+
+    def put(self, key, frames):
+        """写入 {表名: DataFrame}；无法转换为 Arrow 的数据不缓存。"""
+        entry = self._entry_dir(key)
+        # 每次写入使用独立的临时目录：Streamlit 的多个会话在同一进程的不同线程中同时写入同一条目
+        tmp = tempfile.mkdtemp(prefix=f"{key}.tmp-", dir=self.directory)
+        try:
+            for name, df in frames.items():
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(os.path.join(tmp, name + _SUFFIX), "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except (OSError, pa.ArrowException):
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        self.evict()
+        return True
+
+    def entries(self):
+        """列出缓存条目，按最近使用时间从新到旧排序。"""
+        result = []
+        for key in os.listdir(self.directory):
+            entry = self._entry_dir(key)
+            if ".tmp-" in key or not os.path.isdir(entry):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)
+            )
+            result.append({"key": key, "size": size, "last_used": os.path.getmtime(entry)})
+        result.sort(key=lambda e: e["last_used"], reverse=True)
+        return result
+
+    def total_bytes(self):
+        return sum(e["size"] for e in self.entries())
+
+    def evict(self):
+        """超过容量上限时删除最久未使用的条目，返回删除的条目数。"""
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        removed = 0
+        while entries and total > self.max_bytes:
+            oldest = entries.pop()
+            shutil.rmtree(self._entry_dir(oldest["key"]), ignore_errors=True)
+            total -= oldest["size"]
+            removed += 1
+        return removed
+
+    def clear(self):
+        for e in self.entries():
+            shutil.rmtree(self._entry_dir(e["key"]), ignore_errors=True)
+
+
+def _read_bytes(file):
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as fh:
+            return fh.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def read_bom_excel_cached(file, cache, columns=PLANNER_COLUMNS):
+    """带磁盘缓存的 read_bom_excel：相同内容的文件只解析一次。"""
+    data = _read_bytes(file)
+    key = content_key(data, *columns)
+    frames = cache.get(key)
+    if frames is not None:
+        df = frames["data"]
+        issues = frames.get("issues")
+        if issues is not None and len(issues):
+            df.attrs[ISSUES_ATTR] = tuple(zip(*(issues[c].tolist() for c in issues.columns)))
+        return df
+    df = read_bom_excel(io.BytesIO(data), columns)
+    cache.put(key, {"data": df, "issues": schema_issues(df)})
+    return df
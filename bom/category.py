@@ -0,0 +1,202 @@
+"""商品分类树索引
+
+product_cate.xlsx 中的分类（分类编码、分类名称、上级分类）构成一棵树，
+product.xlsx 的 商品分类 把商品挂到分类节点上。树只构建一次：
+按先序遍历给每个节点编号，任一分类的子树是连续的编号区间，
+商品按所属节点的先序编号排序后，子树内的商品也是一个连续切片，
+子树汇总用前缀和一次算出全部分类。
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .loader import read_xlsx_columns
+
+CATEGORY_COLUMNS = ("分类编码", "分类名称", "上级分类")
+PRODUCT_CATEGORY_COLUMNS = ("商品编码", "商品名称", "商品分类")
+
+UNCATEGORIZED = "未分类"
+PATH_SEPARATOR = " / "
+
+
+def _clean(values):
+    return [v.strip() if isinstance(v, str) and v.strip() else None for v in values]
+
+
+class CategoryTree:
+    """分类树 + 商品归属。
+
+    分类和上级分类都按名称关联，同名分类取表中第一条；
+    商品的分类不在树中（或没有分类）时归入“未分类”。
+    """
+
+    def __init__(self, categories, products=None):
+        codes = _clean(categories["分类编码"].tolist())
+        names = _clean(categories["分类名称"].tolist())
+        parents = _clean(categories["上级分类"].tolist()) if "上级分类" in categories.columns else [None] * len(names)
+
+        node_of_name = {}
+        for i, name in enumerate(names):
+            if name is not None:
+                node_of_name.setdefault(name, i)
+        if UNCATEGORIZED not in node_of_name:
+            codes.append(None)
+            names.append(UNCATEGORIZED)
+            parents.append(None)
+            node_of_name[UNCATEGORIZED] = len(names) - 1
+
+        n = len(names)
+        parent_node = np.full(n, -1, dtype=np.int64)
+        for i, parent in enumerate(parents):
+            p = node_of_name.get(parent, -1)
+            parent_node[i] = p if p != i else -1
+        children = [[] for _ in range(n)]
+        for i, p in enumerate(parent_node):
+            if p >= 0:
+                children[p].append(i)
+        roots = [i for i in range(n) if parent_node[i] < 0]
+
+        # 先序遍历：enter[i] 为节点 i 的先序编号，子树为 [enter[i], leave[i])；
+        # 成环的节点从未被访问到，当作根节点补上
+        enter = np.full(n, -1, dtype=np.int64)
+        leave = np.zeros(n, dtype=np.int64)
+        depth = np.zeros(n, dtype=np.int64)
+        order = []
+        for root in roots + list(range(n)):
+            if enter[root] >= 0:
+                continue
+            parent_node[root] = -1
+            stack = [(root, 0, False)]
+            while stack:
+                node, level, done = stack.pop()
+                if done:
+                    leave[node] = len(order)
+                    continue
+                if enter[node] >= 0:
+                    continue
+                enter[node] = len(order)
+                depth[node] = level
+                order.append(node)
+                stack.append((node, level, True))
+                stack.extend((c, level + 1, False) for c in reversed(children[node]))
+
+        self.codes = codes
+        self.names = names
+        self.parent_node = parent_node
+        self.children = children
+        self.roots = [r for r in range(n) if parent_node[r] < 0]
+        self.enter = enter
+        self.leave = leave
+        self.depth = depth
+        self._node_of_name = node_of_name
+        self.paths = self._paths()
+        self.set_products(products if products is not None else pd.DataFrame(columns=PRODUCT_CATEGORY_COLUMNS))
+
+    def _paths(self):
+        paths = [None] * len(self.names)
+        for node in sorted(range(len(self.names)), key=lambda i: self.enter[i]):
+            parent = self.parent_node[node]
+            paths[node] = self.names[node] if parent < 0 else paths[parent] + PATH_SEPARATOR + self.names[node]
+        return paths
+
+    def set_products(self, products):
+        """挂载商品（商品名称、商品分类）。"""
+        names = _clean(products["商品名称"].tolist())
+        categories = _clean(products["商品分类"].tolist()) if "商品分类" in products.columns else [None] * len(names)
+        fallback = self._node_of_name[UNCATEGORIZED]
+        nodes = [self._node_of_name.get(c, fallback) for c, name in zip(categories, names) if name is not None]
+        self._mount([name for name in names if name is not None], nodes)
+
+    def _mount(self, names, nodes):
+        # 商品按所属分类的先序编号排序，子树内的商品成为连续切片
+        names = np.array(names, dtype=object)
+        nodes = np.array(nodes, dtype=np.int64)
+        order = np.argsort(self.enter[nodes], kind="stable")
+        self.product_names = names[order]
+        self.product_nodes = nodes[order]
+        self._product_enter = self.enter[self.product_nodes]
+        self._node_of_product = {}
+        for name, node in zip(self.product_names, self.product_nodes):
+            self._node_of_product.setdefault(name, int(node))
+        paths = np.array(self.paths, dtype=object)[self.product_nodes]
+        # 搜索用文本：商品名称 + 分类路径，统一小写
+        self._search_text = (pd.Series(self.product_names, dtype=object).astype(str) + "\x1f"
+                             + pd.Series(paths, dtype=object).astype(str)).str.lower()
+
+    def for_models(self, models):
+        """只包含给定型号的分类树视图（分类结构共享）；商品表中没有的型号归入“未分类”。"""
+        view = copy.copy(self)
+        view._mount(list(models), [self.category_of(m) for m in models])
+        return view
+
+    @property
+    def size(self):
+        return len(self.names)
+
+    def node(self, name):
+        """分类名称对应的节点编号，不存在返回 None。"""
+        return self._node_of_name.get(name)
+
+    def category_of(self, product):
+        """商品所属分类的节点编号；不在商品表中的商品归入“未分类”。"""
+        return self._node_of_product.get(product, self._node_of_name[UNCATEGORIZED])
+
+    def subtree_slice(self, node):
+        """node 子树内商品在 product_names 中的切片。"""
+        start = np.searchsorted(self._product_enter, self.enter[node], side="left")
+        stop = np.searchsorted(self._product_enter, self.leave[node], side="left")
+        return slice(int(start), int(stop))
+
+    def products_in(self, node=None):
+        """node 子树内的全部商品名称；node 为 None 时返回全部商品。"""
+        if node is None:
+            return self.product_names
+        return self.product_names[self.subtree_slice(node)]
+
+    def child_nodes(self, node=None):
+        """node 的直接下级分类（node 为 None 时为根分类），按名称排序。"""
+        nodes = self.roots if node is None else self.children[node]
+        return sorted(nodes, key=lambda i: self.names[i])
+
+    def rollup(self, values):
+        """按子树汇总：values 与 product_names 对齐，返回每个分类节点子树内的合计。"""
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
+        start = np.searchsorted(self._product_enter, self.enter, side="left")
+        stop = np.searchsorted(self._product_enter, self.leave, side="left")
+        return cumulative[stop] - cumulative[start]
+
+    def search(self, query, node=None, limit=50):
+        """在 node 子树（默认全部）内按商品名称或分类路径做不区分大小写的子串搜索。"""
+        window = slice(0, len(self.product_names)) if node is None else self.subtree_slice(node)
+        names = self.product_names[window]
+        query = str(query).strip().lower()
+        if not query:
+            return list(names[:limit])
+        hits = self._search_text.iloc[window].str.contains(query, regex=False).to_numpy()
+        return list(names[hits][:limit])
+
+    def summary(self, product_values=None):
+        """每个分类一行：路径、层级、直接/子树商品数，以及可选的子树合计。"""
+        counts = self.rollup(np.ones(len(self.product_names)))
+        direct = np.bincount(self.product_nodes, minlength=self.size)
+        df = pd.DataFrame({
+            "分类编码": self.codes,
+            "分类名称": self.names,
+            "分类路径": self.paths,
+            "层级": self.depth,
+            "直接商品数": direct,
+            "子树商品数": counts.astype(np.int64),
+        })
+        if product_values is not None:
+            for name, values in product_values.items():
+                df[name] = self.rollup(values)
+        return df.iloc[np.argsort(self.enter)].reset_index(drop=True)
+
+
+def read_category_tree(category_file, product_file=None):
+    """读取 product_cate.xlsx（及 product.xlsx），构建 CategoryTree。"""
+    categories = read_xlsx_columns(category_file, CATEGORY_COLUMNS)
+    products = read_xlsx_columns(product_file, PRODUCT_CATEGORY_COLUMNS) if product_file is not None else None
+    return CategoryTree(categories, products)
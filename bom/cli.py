@@ -0,0 +1,175 @@
+"""命令行入口
+
+    bom-plan --bom 物料清单父子件.xlsx --model 0000072 --qty 500 --out plan.xlsx
+    bom-plan --bom 物料清单父子件.xlsx --demand orders.csv --out plan.csv --orders po.zip
+    bom-plan --bom 物料清单父子件.xlsx --demand orders.csv --stock 库存.xlsx --orders po.xlsx
+    bom-plan --bom 物料清单父子件.xlsx --parent 物料清单父件.xlsx --quality 质量报告.xlsx
+    bom-plan --bom 物料清单父子件.xlsx --products product.xlsx --margins 成品毛利.xlsx
+    bom-plan --bom 物料清单父子件.xlsx --parent 物料清单父件.xlsx --rollup 成本汇总.csv
+    bom-plan --bom 物料清单父子件.xlsx --demand orders.csv --lead-times 交货周期.csv --schedule 采购排程.xlsx
+"""
+import argparse
+import os
+import sys
+
+from .batch import read_demand_file
+from .cache import BomCache
+from .dataset import BomDataset
+from .explode import BomCycleError
+from .export import EXPORT_FORMATS, export_bytes
+from .inventory import Inventory, net_plan, read_inventory_file
+from .schedule import read_lead_times, schedule_orders
+from .purchase import purchase_orders, purchase_orders_workbook, purchase_orders_zip, supplier_summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bom-plan", description="根据物料清单生成物料需求计划和供应商采购订单")
+    parser.add_argument("--bom", required=True, help="子件或物料清单父子件 Excel 文件")
+    parser.add_argument("--parent", help="父件 Excel 文件（省略时从 --bom 中提取）")
+    parser.add_argument("--model", action="append", default=[],
+                        help="型号（父件商品或物料清单编码），可重复，与 --qty 一一对应")
+    parser.add_argument("--qty", action="append", type=float, default=[], help="生产数量，可重复")
+    parser.add_argument("--demand", help="批量需求 CSV/xlsx（型号、生产数量两列）")
+    parser.add_argument("--stock", help="现有库存 CSV/xlsx，指定后只订购扣除库存后的缺口")
+    parser.add_argument("--single-level", action="store_true", help="只计算直接子件，不展开半成品")
+    parser.add_argument("--out", help="计划输出文件，按扩展名选择 xlsx/csv/parquet")
+    parser.add_argument("--orders", help="采购订单输出文件：.xlsx 每个供应商一个工作表，.zip 每个供应商一个文件")
+    parser.add_argument("--quality", help="数据质量报告输出文件（xlsx）；只做检查时可省略 --model/--demand")
+    parser.add_argument("--products", help="商品档案 product.xlsx，用于补齐缺失的成本单价、默认供应商")
+    parser.add_argument("--margins", help="成品毛利输出文件（需要 --products）；只算毛利时可省略 --model/--demand")
+    parser.add_argument("--rollup", help="全部物料清单成本汇总输出文件，对比父件成本金额；可省略 --model/--demand")
+    parser.add_argument("--schedule", help="采购排程输出文件，需要 --demand 中的完工日期列")
+    parser.add_argument("--lead-times", help="供应商交货周期 CSV/xlsx（供应商、交货周期两列），未登记的按 7 天")
+    parser.add_argument("--no-cache", action="store_true", help="不使用磁盘解析缓存")
+    return parser
+
+
+def _orders(args, parser):
+    if args.demand:
+        demand = read_demand_file(args.demand)
+        return list(zip(demand["型号"], demand["生产数量"]))
+    if not args.model:
+        parser.error("需要 --model/--qty 或 --demand")
+    if len(args.qty) != len(args.model):
+        parser.error("--model 与 --qty 的个数必须一致")
+    return list(zip(args.model, args.qty))
+
+
+def _format_for(path):
+    """按扩展名选择导出格式，不支持的扩展名返回 None。"""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, (extension, _) in EXPORT_FORMATS.items():
+        if ext == extension:
+            return fmt
+    return None
+
+
+def _check_outputs(args, parser):
+    # 在加载数据和计算之前检查全部输出文件的扩展名
+    for option in ("out", "margins", "rollup", "schedule"):
+        path = getattr(args, option)
+        if path and _format_for(path) is None:
+            supported = "/".join(extension for extension, _ in EXPORT_FORMATS.values())
+            parser.error(f"--{option} 不支持的输出格式: {path}（可用 {supported}）")
+    if args.orders and os.path.splitext(args.orders)[1].lower() not in (".xlsx", ".zip"):
+        parser.error(f"--orders 不支持的输出格式: {args.orders}（可用 .xlsx/.zip）")
+    if args.quality and os.path.splitext(args.quality)[1].lower() != ".xlsx":
+        parser.error(f"--quality 只能输出 .xlsx: {args.quality}")
+
+
+def _write(path, data):
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_only = (args.quality or args.margins or args.rollup) and not (args.model or args.demand)
+    if args.margins and not args.products:
+        parser.error("--margins 需要 --products")
+    _check_outputs(args, parser)
+    orders = None if check_only else _orders(args, parser)
+
+    cache = None if args.no_cache else BomCache()
+    dataset = BomDataset.from_files(args.bom, args.parent, cache=cache, products=args.products)
+    multilevel = not args.single_level
+    if any(dataset.filled.values()):
+        print("已用商品档案补齐：" + "，".join(f"{col} {n} 行" for col, n in dataset.filled.items()))
+
+    if args.quality:
+        report = dataset.quality_report()
+        print(report.summary[["检查项", "问题行数"]].to_string(index=False))
+        _write(args.quality, report.to_xlsx_bytes())
+        print(f"数据质量报告已写入 {args.quality}")
+
+    if args.margins:
+        margins = dataset.margins(multilevel)
+        _write(args.margins, export_bytes(margins, _format_for(args.margins), sheet_name="成品毛利"))
+        priced = margins["基准批发价"].notna()
+        print(f"成品 {len(margins)} 个，有基准批发价 {int(priced.sum())} 个，"
+              f"毛利为负 {int((margins['毛利'] < 0).sum())} 个；已写入 {args.margins}")
+
+    if args.rollup:
+        rollup = dataset.cost_rollup()
+        _write(args.rollup, export_bytes(rollup, _format_for(args.rollup), sheet_name="成本汇总"))
+        print(rollup["状态"].value_counts().to_string())
+        print(f"成本汇总已写入 {args.rollup}")
+
+    if check_only:
+        return 0
+
+    if len(orders) == 1:
+        model, quantity = orders[0]
+        if quantity.is_integer():
+            quantity = int(quantity)
+        try:
+            plan = dataset.plan(model, quantity, multilevel=multilevel)
+        except (KeyError, BomCycleError) as e:
+            # 找不到型号或物料清单存在循环引用
+            print(e.args[0], file=sys.stderr)
+            return 1
+    else:
+        plan, unresolved = dataset.plan_batch(orders, multilevel=multilevel)
+        if unresolved:
+            print(f"以下型号未找到物料清单，已忽略: {', '.join(map(str, unresolved))}", file=sys.stderr)
+
+    if args.schedule:
+        demand = read_demand_file(args.demand) if args.demand else None
+        if demand is None or "完工日期" not in demand.columns:
+            parser.error("--schedule 需要 --demand 文件包含完工日期列")
+        lead_times = read_lead_times(args.lead_times) if args.lead_times else None
+        orders = zip(demand["型号"], demand["生产数量"], demand["完工日期"])
+        schedule, unresolved = schedule_orders(dataset.matrix(multilevel), dataset.index, orders, lead_times)
+        if unresolved:
+            print(f"以下型号未找到物料清单或完工日期无效，未排程: {', '.join(map(str, unresolved))}", file=sys.stderr)
+        _write(args.schedule, export_bytes(schedule, _format_for(args.schedule), sheet_name="采购排程"))
+        print(f"采购排程 {len(schedule)} 行（已逾期 {int((schedule['状态'] == '已逾期').sum())} 行），已写入 {args.schedule}")
+
+    if args.stock:
+        plan = net_plan(plan, Inventory(read_inventory_file(args.stock)))
+
+    print(f"{plan.product} - 生产数量: {plan.quantity}，零件 {len(plan.lines)} 种，成本金额汇总 {plan.total_cost:.2f}")
+
+    if args.out:
+        fmt = _format_for(args.out)
+        _write(args.out, export_bytes(plan.lines, fmt, sheet_name="物料需求计划", footer_rows=plan.footer_rows()))
+        print(f"计划已写入 {args.out}")
+
+    if args.orders:
+        lines = plan.lines
+        if args.stock:
+            # 库存已足够的零件不下单
+            lines = lines[lines["需用数量_总计"] > 0]
+        po = purchase_orders(lines)
+        if args.orders.lower().endswith(".zip"):
+            _write(args.orders, purchase_orders_zip(po))
+        else:
+            _write(args.orders, purchase_orders_workbook(po))
+        print(supplier_summary(po).to_string(index=False))
+        print(f"采购订单已写入 {args.orders}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""合并下单（起订量、包装倍数、价格阶梯）
+
+把所有待下单计划的计划行按 (默认供应商, 零件) 合并，订购数量取
+max(需用数量, 最小订购量) 向上取整到包装数量的倍数；有报价表时，
+该供应商每个报价（含价格阶梯）都作为候选，取采购金额最低的订购数量和单价。
+订购数量超出需用数量的部分为预计结余，可转为库存记录计入后续计划的库存扣减。
+全部计算为分组数组运算，不逐行循环。
+"""
+import numpy as np
+import pandas as pd
+
+from .arrays import first_in_group
+from .explode import part_keys
+from .inventory import ON_HAND_COLUMN, WAREHOUSE_COLUMN
+from .loader import read_table_file
+
+ORDER_RULE_COLUMNS = ["供应商", "子件商品", "规格型号", "最小订购量", "包装数量"]
+
+ORDER_RULE_ALIASES = {
+    "供应商": ("供应商", "供应商名称", "默认供应商"),
+    "子件商品": ("子件商品", "商品名称", "零件名称"),
+    "规格型号": ("规格型号", "规格"),
+    "最小订购量": ("最小订购量", "起订量", "MOQ"),
+    "包装数量": ("包装数量", "包装倍数", "每包数量", "整包数量"),
+}
+
+CONSOLIDATED_COLUMNS = ["默认供应商", "子件商品", "规格型号", "计量单位", "计划数", "来源计划", "需用数量_总计",
+                        "最小订购量", "包装数量", "订购数量", "成本单价", "成本金额_总计", "原成本金额", "预计结余"]
+
+NO_SUPPLIER = ""
+
+
+def read_order_rules(file):
+    """读取起订量/包装数量 CSV/xlsx，供应商列可省略（对该零件的所有供应商生效）。"""
+    df = read_table_file(file)
+    rules = pd.DataFrame(index=df.index)
+    for column, aliases in ORDER_RULE_ALIASES.items():
+        source = next((c for c in aliases if c in df.columns), None)
+        rules[column] = df[source] if source is not None else None
+    if rules["子件商品"].isna().all() or rules[["最小订购量", "包装数量"]].isna().all().all():
+        raise ValueError("起订量文件需包含 子件商品 列和 最小订购量/包装数量 列")
+    return rules
+
+
+def _supplier_text(values):
+    return pd.Series(values, dtype=object).where(pd.notna(values), NO_SUPPLIER).astype(str).str.strip().to_numpy()
+
+
+class OrderRules:
+    """每个 (供应商, 零件) 的最小订购量和包装数量；供应商为空的规则对该零件的所有供应商生效。"""
+
+    def __init__(self, rules):
+        rules = rules.reindex(columns=ORDER_RULE_COLUMNS)
+        keys = part_keys(rules).to_numpy()
+        suppliers = _supplier_text(rules["供应商"].to_numpy())
+        moq = pd.to_numeric(rules["最小订购量"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+        pack = pd.to_numeric(rules["包装数量"], errors="coerce").to_numpy(dtype=np.float64)
+        pack = np.where(np.isnan(pack) | (pack <= 0), 1.0, pack)
+        # 同一键重复登记时以最后一条为准；末尾哨兵对应查不到的键
+        self._index = pd.Index(suppliers + "\x1f" + keys)
+        last = ~self._index.duplicated(keep="last")
+        self._index = self._index[last]
+        self._moq = np.append(moq[last], 0.0)
+        self._pack = np.append(pack[last], 1.0)
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame(columns=ORDER_RULE_COLUMNS))
+
+    def lookup(self, keys, suppliers):
+        """零件键、供应商数组 -> (最小订购量, 包装数量)，先查供应商专属规则，再查通用规则。"""
+        keys = np.asarray(keys, dtype=object)
+        own = self._index.get_indexer(_supplier_text(suppliers) + "\x1f" + keys)
+        common = self._index.get_indexer(NO_SUPPLIER + "\x1f" + keys)
+        position = np.where(own >= 0, own, common)
+        return self._moq[position], self._pack[position]
+
+
+def _round_up(quantity, pack):
+    # 浮点误差内已是整包时不再多进一包
+    return np.ceil(quantity / pack - 1e-9) * pack
+
+
+def merge_plans(plans):
+    """合并多个计划：plans 为 [(计划名称, 计划行 DataFrame)]，按 (默认供应商, 零件) 汇总需用数量和成本金额。"""
+    frames = [lines.assign(_plan=i) for i, (_, lines) in enumerate(plans) if len(lines)]
+    names = np.array([name for name, _ in plans], dtype=object)
+    if not frames:
+        return pd.DataFrame(columns=CONSOLIDATED_COLUMNS[:7] + ["原成本金额"])
+    lines = pd.concat(frames, ignore_index=True)
+    suppliers = _supplier_text(lines["默认供应商"].to_numpy()) if "默认供应商" in lines.columns \
+        else np.full(len(lines), NO_SUPPLIER, dtype=object)
+    group, keys = pd.factorize(suppliers + "\x1f" + part_keys(lines).to_numpy())
+    n = len(keys)
+    need = np.bincount(group, weights=lines["需用数量_总计"].to_numpy(dtype=np.float64), minlength=n)
+    # 整组都没有成本金额时保持 NaN，不当作 0 元
+    amount = pd.Series(lines["成本金额_总计"].to_numpy(dtype=np.float64)).groupby(group).sum(min_count=1) \
+        .reindex(np.arange(n)).to_numpy()
+
+    # 每组取首行的零件属性；来源计划按 (组, 计划) 去重后拼接
+    first = np.unique(group, return_index=True)[1]
+    plan = lines["_plan"].to_numpy()
+    pairs = np.unique(group.astype(np.int64) * len(plans) + plan)
+    pair_group, pair_plan = pairs // len(plans), pairs % len(plans)
+    sources = pd.Series(names[pair_plan]).astype(str).groupby(pair_group).agg("、".join)
+
+    merged = pd.DataFrame({
+        "默认供应商": suppliers[first],
+        "子件商品": lines["子件商品"].to_numpy()[first],
+        "规格型号": lines["规格型号"].to_numpy()[first] if "规格型号" in lines.columns else None,
+        "计量单位": lines["计量单位"].to_numpy()[first] if "计量单位" in lines.columns else None,
+        "计划数": np.bincount(pair_group, minlength=n),
+        "来源计划": sources.reindex(np.arange(n)).to_numpy(),
+        "需用数量_总计": need,
+        "原成本金额": amount,
+    })
+    merged["默认供应商"] = merged["默认供应商"].where(merged["默认供应商"] != NO_SUPPLIER, None)
+    return merged
+
+
+def consolidate(plans, rules=None, quote_book=None):
+    """合并待下单计划并按起订量、包装数量、价格阶梯确定订购数量，返回 CONSOLIDATED_COLUMNS 列的 DataFrame。
+
+    quote_book 为 QuoteBook 时，只使用与默认供应商相同的报价；没有该供应商报价的零件沿用计划中的平均单价。
+    """
+    merged = merge_plans(plans)
+    rules = rules if rules is not None else OrderRules.empty()
+    n = len(merged)
+    keys = part_keys(merged).to_numpy()
+    suppliers = merged["默认供应商"].to_numpy(dtype=object)
+    need = merged["需用数量_总计"].to_numpy(dtype=np.float64)
+    amount = merged["原成本金额"].to_numpy(dtype=np.float64)
+    moq, pack = rules.lookup(keys, suppliers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plan_price = np.where(need > 0, amount / need, np.nan)
+
+    # 候选 1：计划单价，订购数量为起订量和包装数量取整后的数量
+    base_quantity = _round_up(np.maximum(need, moq), pack)
+    cand_line = [np.arange(n)]
+    cand_quantity = [base_quantity]
+    cand_price = [plan_price]
+    has_quote = np.zeros(n, dtype=bool)
+    if quote_book is not None and len(quote_book):
+        # 候选 2：该供应商的每个报价，订购数量至少达到报价的起订量和阶梯下限
+        line_of, quote = quote_book.expand(keys)
+        same = quote_book.suppliers[quote] == _supplier_text(suppliers)[line_of]
+        line_of, quote = line_of[same], quote[same]
+        has_quote[line_of] = True
+        floor = np.maximum(np.maximum(need[line_of], moq[line_of]),
+                           np.maximum(quote_book.moq[quote], quote_book.tier[quote]))
+        cand_line.append(line_of)
+        cand_quantity.append(_round_up(floor, pack[line_of]))
+        cand_price.append(quote_book.price[quote])
+    cand_line = np.concatenate(cand_line)
+    cand_quantity = np.concatenate(cand_quantity)
+    cand_price = np.concatenate(cand_price)
+    # 有报价时计划单价只作为缺少价格的兜底
+    usable = ~has_quote[cand_line] | (np.arange(len(cand_line)) >= n)
+    cand_cost = np.where(usable, cand_quantity * np.nan_to_num(cand_price), np.inf)
+
+    # 每行取采购金额最低的候选，金额相同时取订购数量少者
+    first = first_in_group(cand_line, cand_cost, cand_quantity)
+    chosen = np.empty(n, dtype=np.int64)
+    chosen[cand_line[first]] = first
+
+    # 无需求的零件不下单
+    quantity = np.where(need > 0, cand_quantity[chosen], 0.0)
+    price = cand_price[chosen]
+    merged["最小订购量"] = moq
+    merged["包装数量"] = pack
+    merged["订购数量"] = quantity
+    merged["成本单价"] = price
+    merged["成本金额_总计"] = quantity * price
+    merged["预计结余"] = quantity - np.maximum(need, 0.0)
+    return merged.reindex(columns=CONSOLIDATED_COLUMNS)
+
+
+def consolidated_lines(consolidated):
+    """合并结果转为计划行格式（需用数量_总计 为订购数量），可直接生成采购订单。"""
+    return pd.DataFrame({
+        "子件商品": consolidated["子件商品"],
+        "规格型号": consolidated["规格型号"],
+        "计量单位": consolidated["计量单位"],
+        "需用数量_总计": consolidated["订购数量"],
+        "成本单价": consolidated["成本单价"],
+        "成本金额_总计": consolidated["成本金额_总计"],
+        "默认供应商": consolidated["默认供应商"],
+    })[consolidated["订购数量"].to_numpy() > 0].reset_index(drop=True)
+
+
+def projected_stock(consolidated, warehouse=None):
+    """预计结余转为库存记录（子件商品、规格型号、子件预出仓库、现存量），可用 Inventory.plus 计入库存。
+
+    warehouse 为空时结余不属于任何仓库，Inventory.on_hand 会把它计入该零件每个仓库的库存，
+    后续计划行无论写了哪个子件预出仓库都能扣减；指定 warehouse 时只计入该仓库。
+    """
+    leftover = consolidated[consolidated["预计结余"].to_numpy(dtype=np.float64) > 1e-9]
+    return pd.DataFrame({
+        "子件商品": leftover["子件商品"].to_numpy(),
+        "规格型号": leftover["规格型号"].to_numpy(),
+        WAREHOUSE_COLUMN: warehouse,
+        ON_HAND_COLUMN: leftover["预计结余"].to_numpy(dtype=np.float64),
+    })
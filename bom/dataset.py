@@ -0,0 +1,218 @@
+"""物料清单数据集
+
+把父件表、子件表及其派生结构（索引、展开引擎、稀疏矩阵）放在一起，
+提供不依赖 Streamlit 的计划接口，供界面、命令行和批处理任务共用。
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .batch import BATCH_OUTPUT_COLUMNS, IncrementalBatch, plan_batch
+from .cache import read_bom_excel_cached
+from .combined import is_combined, split_combined
+from .explode import BomExplosion
+from .index import PRODUCT_COLUMN, BomIndex
+from .loader import read_bom_excel
+from .matrix import BomMatrix
+from .mrp import MrpModel
+from .orderparse import ModelIndex
+from .plan import MaterialPlan, scale_plan, unit_lines
+from .product import MARGIN_COLUMNS, read_product_master
+from .quality import check_bom
+from .rollup import cost_rollup
+from .schedule import schedule_orders
+from .schema import detach_issues, normalize_bom
+from .whatif import PriceScenario
+from .whereused import WhereUsedIndex
+
+
+class BomDataset:
+    """一份已加载的物料清单及其派生结构，派生结构只构建一次。"""
+
+    def __init__(self, parent, child, master=None):
+        """parent 为 None 时 child 须为物料清单父子件合并表，父件从中拆出。
+
+        master 为商品档案（ProductMaster）时，先用它补齐子件缺失的成本单价和默认供应商。
+        """
+        # 已规范化的表（如 read_bom_excel 的结果）不会再转换
+        child, child_issues = detach_issues(normalize_bom(child))
+        if is_combined(child):
+            # 合并表：子件只保留子件列；未单独提供父件表时用拆出的父件表
+            split_parent, child = split_combined(child)
+            if parent is None:
+                parent = split_parent
+        elif parent is None:
+            raise ValueError("子件表不是物料清单父子件合并表（缺少父件商品列），需要同时提供父件表")
+        self.parent, parent_issues = detach_issues(normalize_bom(parent))
+        self.master = master
+        self.filled = {}
+        # 补齐前的子件表：数据质量检查和成本汇总核对的是原始数据，补齐不能掩盖缺失
+        self.raw_child = child
+        if master is not None:
+            child, self.filled = master.fill_child(child)
+        self.child = child
+        self.issues = pd.concat([parent_issues.assign(表="父件"), child_issues.assign(表="子件")], ignore_index=True)
+        self.index = BomIndex(self.parent, self.child)
+        self.explosion = BomExplosion(self.index)
+        self._matrices = {}
+        self._unit_lines = {}
+        self._quality = None
+        self._margins = {}
+        self._rollup = None
+        self._where_used = None
+        self._products_by_code = None
+        self._mrp = None
+        self._model_index = {}
+        self._content_key = None
+
+    @classmethod
+    def from_files(cls, bom, parent=None, cache=None, products=None):
+        """从文件加载。parent 省略时 bom 须为物料清单父子件合并表；products 为商品档案 product.xlsx。"""
+        read = (lambda f: read_bom_excel_cached(f, cache)) if cache is not None else read_bom_excel
+        master = read_product_master(products) if products is not None else None
+        return cls(read(parent) if parent is not None else None, read(bom), master)
+
+    def quality_report(self):
+        """原始数据（商品档案补齐前）的数据质量报告（见 quality.check_bom），只计算一次。"""
+        if self._quality is None:
+            self._quality = check_bom(self.parent, self.raw_child, self.issues)
+        return self._quality
+
+    def cost_rollup(self):
+        """全部物料清单的展开成本与父件成本金额的对比（见 rollup.cost_rollup），只计算一次。
+
+        按原始子件表（商品档案补齐前）展开，偏差反映的是数据本身，而不是补齐的参考成本。
+        """
+        if self._rollup is None:
+            explosion = self.explosion
+            if self.raw_child is not self.child:
+                explosion = BomExplosion(BomIndex(self.parent, self.raw_child))
+            self._rollup = cost_rollup(explosion)
+        return self._rollup
+
+    def where_used(self):
+        """反查索引（零件、供应商 -> 物料清单），只构建一次。"""
+        if self._where_used is None:
+            self._where_used = WhereUsedIndex(self.explosion, self.matrix(True))
+        return self._where_used
+
+    @property
+    def content_key(self):
+        """父件表、子件表（已按商品档案补齐）内容的 SHA-256，只计算一次。
+
+        用作界面缓存和会话状态的键：数据集对象被缓存淘汰后 id() 可能被新对象复用，内容哈希不会。
+        """
+        if self._content_key is None:
+            h = hashlib.sha256()
+            for table in (self.parent, self.child):
+                h.update("|".join(map(str, table.columns)).encode("utf-8"))
+                h.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+            self._content_key = h.hexdigest()
+        return self._content_key
+
+    @property
+    def products(self):
+        return self.index.products
+
+    def matrix(self, multilevel=True):
+        if multilevel not in self._matrices:
+            self._matrices[multilevel] = BomMatrix.from_explosion(self.explosion, multilevel=multilevel)
+        return self._matrices[multilevel]
+
+    def unit_costs(self, models, multilevel=True):
+        """各型号每生产一件的成本金额，找不到的型号为 NaN。"""
+        matrix = self.matrix(multilevel)
+        costs = matrix.row_cost()
+        rows = [matrix.row_of.get(self.resolve(m)) for m in models]
+        return np.array([np.nan if r is None else costs[r] for r in rows], dtype=np.float64)
+
+    def margins(self, multilevel=True, master=None):
+        """全部成品的单件成本与毛利，基准批发价取自商品档案（默认为构建时的 master）。
+
+        成品为没有被其他物料清单当作半成品引用的物料清单；全部型号的单件成本由一次矩阵运算得到。
+        """
+        master = master if master is not None else self.master
+        if master is None:
+            return pd.DataFrame(columns=MARGIN_COLUMNS)
+        key = (multilevel, id(master))
+        if key not in self._margins:
+            matrix = self.matrix(multilevel)
+            finished = np.array([code not in self.explosion.subassembly_codes for code in matrix.codes], dtype=bool)
+            self._margins[key] = master.margins(np.asarray(matrix.codes, dtype=object)[finished],
+                                                np.asarray(self._code_products(), dtype=object)[finished],
+                                                matrix.row_cost()[finished])
+        return self._margins[key]
+
+    def price_scenario(self, multilevel=True):
+        """新建调价情景（PriceScenario），只保存对本数据集的差异。"""
+        return PriceScenario(self.matrix(multilevel), self._code_products())
+
+    def resolve(self, model):
+        """型号（父件商品名称或物料清单编码）对应的物料清单编码，找不到返回 None。"""
+        code = self.index.code_for(model)
+        if code is None and model in self.index:
+            code = model
+        return code
+
+    def plan(self, model, quantity, multilevel=True):
+        """单一型号的物料需求计划；multilevel 时半成品展开到最底层零件。"""
+        code = self.resolve(model)
+        if code is None:
+            raise KeyError(f"未找到型号: {model}")
+        product = model if self.index.code_for(model) is not None else self._product_name(code)
+        return scale_plan(product, self.unit_lines(code, multilevel), quantity)
+
+    def unit_lines(self, code, multilevel=True):
+        """每生产一件的计划行，按 (编码, 是否多级) 缓存；改变生产数量时只需缩放。"""
+        key = (code, multilevel)
+        lines = self._unit_lines.get(key)
+        if lines is None:
+            children = self.explosion.explode(code) if multilevel else self.index.children(code)
+            lines = self._unit_lines[key] = unit_lines(children)
+        return lines
+
+    def plan_batch(self, orders, multilevel=True):
+        """批量计划，返回 (MaterialPlan, 无法识别的型号列表)。"""
+        orders = list(orders)
+        lines, unresolved = plan_batch(self.matrix(multilevel), self.index, orders)
+        total = sum(float(q) for m, q in orders if m not in unresolved)
+        if total.is_integer():
+            total = int(total)
+        return MaterialPlan("批量计划", total, lines[BATCH_OUTPUT_COLUMNS]), unresolved
+
+    def schedule(self, orders, lead_times=None, multilevel=True, **options):
+        """采购排程：orders 为 (型号, 数量, 完工日期)，lead_times 为 {供应商: 交货周期天数}。
+
+        其余参数见 schedule.schedule_orders，返回 (排程 DataFrame, 无法识别的型号列表)。
+        """
+        return schedule_orders(self.matrix(multilevel), self.index, orders, lead_times, **options)
+
+    def mrp(self):
+        """分期物料需求计划模型（MrpModel），只构建一次。"""
+        if self._mrp is None:
+            self._mrp = MrpModel(self.explosion, self.matrix(False))
+        return self._mrp
+
+    def model_index(self, tree=None):
+        """型号的模糊检索索引（ModelIndex），tree 为 CategoryTree 时同时按分类路径检索；每个分类树只构建一次。"""
+        key = id(tree) if tree is not None else None
+        if key not in self._model_index:
+            self._model_index[key] = ModelIndex.from_models(self.products, tree)
+        return self._model_index[key]
+
+    def incremental_batch(self, multilevel=True):
+        """新建可增量更新的批量计划（IncrementalBatch）。"""
+        return IncrementalBatch(self.matrix(multilevel), self.index)
+
+    def _code_products(self):
+        # 按 index.codes 顺序的父件商品名称（矩阵行顺序）
+        if self._products_by_code is None:
+            self._products_by_code = [self._product_name(code) for code in self.index.codes]
+        return self._products_by_code
+
+    def _product_name(self, code):
+        row = self.index.parent_row(code)
+        if row is None or not isinstance(row.get(PRODUCT_COLUMN), str):
+            return str(code)
+        return row[PRODUCT_COLUMN]
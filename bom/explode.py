@@ -0,0 +1,173 @@
+"""多级物料清单展开
+
+子件商品本身又是某个物料清单的父件商品时，视为半成品继续向下展开，
+直到最底层零件。每个半成品展开后的单件需求向量会被缓存，
+同一半成品出现在多个成品中时只计算一次。
+"""
+import numpy as np
+import pandas as pd
+
+from .index import CODE_COLUMN, PRODUCT_COLUMN
+
+# 零件唯一键由这两列组成
+PART_KEY_COLUMNS = ("子件商品", "规格型号")
+
+# 展开结果中每个零件沿用的属性列（取首次出现的行）
+PART_ATTRIBUTE_COLUMNS = ("子件商品", "规格型号", "计量单位", "默认供应商", "子件预出仓库")
+
+
+class BomCycleError(ValueError):
+    """物料清单存在循环引用。"""
+
+    def __init__(self, path):
+        self.path = list(path)
+        super().__init__("物料清单循环引用: " + " -> ".join(map(str, self.path)))
+
+
+def _text(series):
+    return series.astype(object).where(series.notna(), "").astype(str).str.strip()
+
+
+def part_keys(child):
+    """零件唯一键：子件商品 + 规格型号（去掉首尾空白，缺失视为空）。"""
+    name = _text(child[PART_KEY_COLUMNS[0]])
+    if PART_KEY_COLUMNS[1] in child.columns:
+        return name + "|" + _text(child[PART_KEY_COLUMNS[1]])
+    return name + "|"
+
+
+def _numeric(child, column):
+    # 数值列已在载入时规范化为 float64
+    if column not in child.columns:
+        return np.full(len(child), np.nan)
+    return child[column].to_numpy(dtype=np.float64)
+
+
+class BomExplosion:
+    """基于 BomIndex 的多级展开引擎。
+
+    flatten(code) 返回该物料清单每生产一件所需的最底层零件
+    (零件编号数组, 需用数量数组, 成本金额数组)，结果按编码缓存。
+    """
+
+    def __init__(self, index):
+        self.index = index
+        child = index.child
+
+        keys = part_keys(child)
+        self.part_ids, uniques = pd.factorize(keys)
+        first_rows = pd.Series(np.arange(len(keys))).groupby(self.part_ids).first().to_numpy()
+        attrs = [c for c in PART_ATTRIBUTE_COLUMNS if c in child.columns]
+        self.parts = child.iloc[first_rows][attrs].reset_index(drop=True)
+        self.parts.index = pd.Index(uniques, name="零件")
+
+        self.quantity = np.nan_to_num(_numeric(child, "需用数量"))
+        unit_price = _numeric(child, "成本单价")
+        amount = _numeric(child, "成本金额")
+        # 单件成本金额缺失时用 需用数量 × 成本单价 补齐
+        self.amount = np.nan_to_num(np.where(np.isnan(amount), self.quantity * unit_price, amount))
+
+        self.sub_codes = self._resolve_subassemblies(child)
+        self.subassembly_codes = {c for c in self.sub_codes if c is not None}
+        self._memo = {}
+
+    def _resolve_subassemblies(self, child):
+        # 父件商品(+版本号) -> 物料清单编码；同名多版本时未指定子件版本号取第一个
+        by_name = {}
+        by_version = {}
+        parent = self.index.parent
+        sources = [(parent, "版本号" if "版本号" in parent.columns else None)]
+        if PRODUCT_COLUMN in child.columns:
+            sources.append((child, "版本号" if "版本号" in child.columns else None))
+        for table, version_column in sources:
+            names = table[PRODUCT_COLUMN].tolist()
+            codes = table[CODE_COLUMN].tolist()
+            versions = table[version_column].tolist() if version_column else [None] * len(names)
+            for name, code, version in zip(names, codes, versions):
+                if not isinstance(name, str) or code not in self.index:
+                    continue
+                name = name.strip()
+                by_name.setdefault(name, code)
+                if isinstance(version, str):
+                    by_version.setdefault((name, version.strip()), code)
+
+        own_codes = child[CODE_COLUMN].tolist()
+        names = _text(child["子件商品"]).tolist()
+        if "子件版本号" in child.columns:
+            versions = child["子件版本号"].tolist()
+        else:
+            versions = [None] * len(names)
+        sub_codes = [None] * len(names)
+        for row, (own, name, version) in enumerate(zip(own_codes, names, versions)):
+            code = None
+            if isinstance(version, str):
+                code = by_version.get((name, version.strip()))
+            if code is None:
+                code = by_name.get(name)
+            # 子件与自身父件同名时是同名的原材料，不是自引用
+            if code is not None and code != own:
+                sub_codes[row] = code
+        return sub_codes
+
+    def is_subassembly(self, code):
+        """该物料清单是否作为半成品被其他物料清单引用。"""
+        return code in self.subassembly_codes
+
+    def flatten(self, code, _path=None):
+        """每件 code 所需最底层零件的 (零件编号, 需用数量, 成本金额)。"""
+        cached = self._memo.get(code)
+        if cached is not None:
+            return cached
+        path = [] if _path is None else _path
+        if code in path:
+            raise BomCycleError(path[path.index(code):] + [code])
+        path.append(code)
+
+        start, stop = self.index.child_slice(code)
+        ids = [self.part_ids[start:stop]]
+        qty = [self.quantity[start:stop]]
+        amount = [self.amount[start:stop]]
+        leaf = np.ones(stop - start, dtype=bool)
+        for row in range(start, stop):
+            sub = self.sub_codes[row]
+            if sub is None or sub not in self.index:
+                continue
+            leaf[row - start] = False
+            sub_ids, sub_qty, sub_amount = self.flatten(sub, path)
+            ids.append(sub_ids)
+            qty.append(sub_qty * self.quantity[row])
+            amount.append(sub_amount * self.quantity[row])
+        path.pop()
+
+        ids[0], qty[0], amount[0] = ids[0][leaf], qty[0][leaf], amount[0][leaf]
+        result = _combine(np.concatenate(ids), np.concatenate(qty), np.concatenate(amount))
+        self._memo[code] = result
+        return result
+
+    def flatten_all(self):
+        """展开数据集中的全部物料清单，返回 {编码: (零件编号, 需用数量, 成本金额)}。"""
+        return {code: self.flatten(code) for code in self.index.codes}
+
+    def explode(self, code, quantity=1):
+        """展开到最底层零件，返回每个零件的单件及总计需用数量和成本。"""
+        ids, qty, amount = self.flatten(code)
+        lines = self.parts.iloc[ids].reset_index(drop=True)
+        lines["需用数量"] = qty
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lines["成本单价"] = np.where(qty > 0, amount / qty, np.nan)
+        lines["成本金额"] = amount
+        lines["需用数量_总计"] = qty * quantity
+        lines["成本金额_总计"] = amount * quantity
+        return lines
+
+
+def _combine(ids, qty, amount):
+    # 合并重复零件
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    if len(unique_ids) == len(ids):
+        return ids, qty, amount
+    return (
+        unique_ids,
+        np.bincount(inverse, weights=qty, minlength=len(unique_ids)),
+        np.bincount(inverse, weights=amount, minlength=len(unique_ids)),
+    )
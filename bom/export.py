@@ -0,0 +1,99 @@
+"""计划导出
+
+xlsx 使用 openpyxl 的只写模式逐行写出，内存占用与行数无关；
+数据量很大时可改用 CSV 或 Parquet。plan_hash 用于按计划内容缓存导出结果。
+"""
+import hashlib
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# 格式 -> (扩展名, MIME)
+EXPORT_FORMATS = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv", "text/csv"),
+    "parquet": (".parquet", "application/octet-stream"),
+}
+
+# 超过该行数时建议使用 CSV/Parquet
+LARGE_EXPORT_ROWS = 100_000
+
+_HEADER_FONT = Font(bold=True)
+
+
+def plan_hash(df):
+    """计划内容的哈希（列名 + 每行取值）。"""
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _rows(df):
+    # 缺失值写为空单元格
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_sheet(wb, title, df, footer_rows=()):
+    """在只写工作簿中追加一个工作表：加粗表头、数据行、可选的汇总行。"""
+    ws = wb.create_sheet(title=title)
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(ws, value=str(name))
+        cell.font = _HEADER_FONT
+        header.append(cell)
+    ws.append(header)
+    for row in _rows(df):
+        ws.append(row)
+    for row in footer_rows:
+        ws.append(row)
+    return ws
+
+
+def to_xlsx_bytes(df, sheet_name="Sheet1", footer_rows=()):
+    wb = Workbook(write_only=True)
+    write_sheet(wb, sheet_name, df, footer_rows)
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def to_csv_bytes(df):
+    # 带 BOM 的 UTF-8，Excel 直接打开不乱码
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def _arrow_table(df):
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        try:
+            columns[str(name)] = pa.array(col, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 混合类型的对象列按文本保存
+            columns[str(name)] = pa.array(col.astype(object).where(col.notna(), None).map(
+                lambda v: v if v is None else str(v)), type=pa.string())
+    return pa.table(columns)
+
+
+def to_parquet_bytes(df):
+    output = io.BytesIO()
+    pq.write_table(_arrow_table(df), output)
+    return output.getvalue()
+
+
+def export_bytes(df, fmt, sheet_name="Sheet1", footer_rows=()):
+    """按格式导出 DataFrame 为字节；footer_rows 只用于 xlsx。"""
+    if fmt == "xlsx":
+        return to_xlsx_bytes(df, sheet_name, footer_rows)
+    if fmt == "csv":
+        return to_csv_bytes(df)
+    if fmt == "parquet":
+        return to_parquet_bytes(df)
+    raise ValueError(f"不支持的导出格式: {fmt}")
@@ -0,0 +1,76 @@
+"""物料清单索引
+
+每个数据集只构建一次：子件表按物料清单编码分组成连续行段，
+查找某个父件的全部子件只需一次字典查询和一次行切片，不再全表扫描。
+"""
+import numpy as np
+import pandas as pd
+
+CODE_COLUMN = "物料清单编码"
+PRODUCT_COLUMN = "父件商品"
+
+
+class BomIndex:
+    """物料清单编码 -> 子件连续行段，父件商品 -> 物料清单编码。"""
+
+    def __init__(self, parent, child):
+        codes, uniques = pd.factorize(child[CODE_COLUMN])
+        # 子件已按编码连续排列时直接复用原表，否则稳定排序使同一编码的行相邻
+        if np.any(np.diff(codes) < 0) or np.any(codes < 0):
+            order = np.argsort(codes, kind="stable")
+            child = child.iloc[order].reset_index(drop=True)
+            codes = codes[order]
+        self.child = child
+
+        # 每段的起止行号；编码缺失（-1）的行排在最前，不建索引
+        starts = np.flatnonzero(np.diff(codes, prepend=-2))
+        stops = np.append(starts[1:], len(codes))
+        self._slices = {
+            uniques[codes[start]]: (int(start), int(stop))
+            for start, stop in zip(starts, stops)
+            if codes[start] >= 0
+        }
+
+        self.parent = parent.reset_index(drop=True)
+        parent_codes = self.parent[CODE_COLUMN].tolist()
+        self._parent_rows = {}
+        for row, code in enumerate(parent_codes):
+            self._parent_rows.setdefault(code, row)
+        # 同名父件取第一条，与原来的 .iloc[0] 一致
+        self._code_by_product = {}
+        for product, code in zip(self.parent[PRODUCT_COLUMN].tolist(), parent_codes):
+            if product is not None and product == product:
+                self._code_by_product.setdefault(product, code)
+        self.products = list(self._code_by_product)
+
+    @property
+    def codes(self):
+        """有子件的全部物料清单编码，按子件表中的顺序。"""
+        return list(self._slices)
+
+    def __contains__(self, code):
+        return code in self._slices
+
+    def code_for(self, product):
+        """父件商品对应的物料清单编码，不存在时返回 None。"""
+        return self._code_by_product.get(product)
+
+    def parent_row(self, code):
+        """物料清单编码对应的父件行，不存在时返回 None。"""
+        row = self._parent_rows.get(code)
+        return None if row is None else self.parent.iloc[row]
+
+    def child_slice(self, code):
+        """子件在 self.child 中的行段 (start, stop)，不存在时为空段。"""
+        return self._slices.get(code, (0, 0))
+
+    def children(self, code):
+        """物料清单编码对应的全部子件行（self.child 的行切片视图）。"""
+        start, stop = self.child_slice(code)
+        return self.child.iloc[start:stop]
+
+    def children_of_product(self, product):
+        code = self.code_for(product)
+        if code is None:
+            return self.child.iloc[0:0]
+        return self.children(code)
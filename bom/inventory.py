@@ -0,0 +1,152 @@
+"""库存扣减
+
+按 子件商品 + 规格型号（+ 仓库）汇总现有库存，用向量运算从毛需求中扣除，
+得到只需订购缺少部分的净需求计划。
+"""
+import numpy as np
+import pandas as pd
+
+from .explode import part_keys
+from .loader import read_table_file
+from .plan import MaterialPlan
+
+WAREHOUSE_COLUMN = "子件预出仓库"
+ON_HAND_COLUMN = "现存量"
+
+# 库存文件中可识别的列名
+INVENTORY_WAREHOUSE_COLUMNS = ("仓库", WAREHOUSE_COLUMN, "默认仓库")
+INVENTORY_QUANTITY_COLUMNS = (ON_HAND_COLUMN, "库存数量", "结存数量", "可用量", "数量")
+
+
+def read_inventory_file(file):
+    """读取库存 CSV/xlsx，返回 子件商品、规格型号、子件预出仓库、现存量 四列。"""
+    df = read_table_file(file)
+
+    if "子件商品" not in df.columns and "商品名称" in df.columns:
+        df = df.rename(columns={"商品名称": "子件商品"})
+    qty_col = next((c for c in INVENTORY_QUANTITY_COLUMNS if c in df.columns), None)
+    if "子件商品" not in df.columns or qty_col is None:
+        raise ValueError(f"库存文件需包含 子件商品 列和数量列（{'/'.join(INVENTORY_QUANTITY_COLUMNS)}）")
+    warehouse_col = next((c for c in INVENTORY_WAREHOUSE_COLUMNS if c in df.columns), None)
+    return pd.DataFrame({
+        "子件商品": df["子件商品"],
+        "规格型号": df["规格型号"] if "规格型号" in df.columns else None,
+        WAREHOUSE_COLUMN: df[warehouse_col] if warehouse_col else None,
+        ON_HAND_COLUMN: pd.to_numeric(df[qty_col], errors="coerce").fillna(0.0),
+    })
+
+
+def _warehouse_text(values):
+    return pd.Series(values, dtype=object).where(pd.notna(values), "").astype(str).str.strip().to_numpy()
+
+
+class Inventory:
+    """现有库存，按 (零件, 仓库) 与按零件两级汇总，查询全部为向量化索引。"""
+
+    def __init__(self, stock):
+        self.stock = stock
+        keys = part_keys(stock).to_numpy()
+        warehouses = _warehouse_text(stock[WAREHOUSE_COLUMN].to_numpy()) if WAREHOUSE_COLUMN in stock.columns \
+            else np.full(len(stock), "", dtype=object)
+        quantity = pd.to_numeric(stock[ON_HAND_COLUMN], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+        part_codes, parts = pd.factorize(keys)
+        self._parts = pd.Index(parts)
+        # 末尾多留一个 0，查不到的键（-1）正好落在这里
+        self._by_part = np.bincount(part_codes, weights=quantity, minlength=len(self._parts) + 1)
+        slot_codes, slots = pd.factorize(keys + "\x1f" + warehouses)
+        self._slots = pd.Index(slots)
+        self._by_slot = np.bincount(slot_codes, weights=quantity, minlength=len(self._slots) + 1)
+        self.sku_count = len(self._slots)
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame({"子件商品": [], "规格型号": [], WAREHOUSE_COLUMN: [], ON_HAND_COLUMN: []}))
+
+    def plus(self, stock):
+        """加上另一份库存（如合并下单的预计结余），返回新的 Inventory。"""
+        return Inventory(pd.concat([self.stock, stock], ignore_index=True))
+
+    def on_hand(self, keys, warehouses=None):
+        """零件键（及仓库）对应的现有库存数组。
+
+        未指定仓库时取该零件全部仓库之和；指定仓库时取该仓库的库存，加上库存文件中没有写仓库的库存。
+        """
+        keys = np.asarray(keys, dtype=object)
+        by_part = self._lookup(self._parts, self._by_part, keys)
+        if warehouses is None:
+            return by_part
+        warehouses = _warehouse_text(np.asarray(warehouses, dtype=object))
+        by_slot = self._lookup(self._slots, self._by_slot, keys + "\x1f" + warehouses)
+        unassigned = self._lookup(self._slots, self._by_slot, keys + "\x1f")
+        return np.where(warehouses == "", by_part, by_slot + unassigned)
+
+    @staticmethod
+    def _lookup(index, values, keys):
+        return values[index.get_indexer(keys)]
+
+    def on_hand_for(self, lines):
+        """计划行对应的现有库存（各行独立查询，同一库存可能出现在多行，扣减请用 allocate）。"""
+        warehouses = lines[WAREHOUSE_COLUMN].to_numpy() if WAREHOUSE_COLUMN in lines.columns else None
+        return self.on_hand(part_keys(lines).to_numpy(), warehouses)
+
+    def allocate(self, lines):
+        """按计划行顺序把库存分配给各行的毛需求，返回每行分到的数量，每份库存只分配一次。
+
+        写了仓库的行先用该 (零件, 仓库) 的库存，不足时与其他行共用没有写仓库的库存；
+        没有写仓库的行先用没有写仓库的库存，再用各仓库分配后剩下的库存。
+        """
+        keys = part_keys(lines).to_numpy()
+        warehouses = _warehouse_text(lines[WAREHOUSE_COLUMN].to_numpy()) if WAREHOUSE_COLUMN in lines.columns \
+            else np.full(len(lines), "", dtype=object)
+        demand = np.maximum(np.nan_to_num(lines["需用数量_总计"].to_numpy(dtype=np.float64)), 0.0)
+        named = warehouses != ""
+        unassigned = self._lookup(self._slots, self._by_slot, keys + "\x1f")
+
+        slot_keys = keys + "\x1f" + warehouses
+        own = _consume(slot_keys, np.where(named, demand, 0.0), self._lookup(self._slots, self._by_slot, slot_keys))
+        shared = _consume(keys, demand - own, unassigned)
+        # 各仓库分配后剩下的库存，供没有写仓库的行使用
+        part_codes = pd.factorize(keys)[0]
+        used = np.bincount(part_codes, weights=own, minlength=len(keys))[part_codes] if len(keys) else own
+        rest = self._lookup(self._parts, self._by_part, keys) - unassigned - used
+        other = _consume(keys, np.where(named, 0.0, demand - shared), rest)
+        return own + shared + other
+
+
+def _consume(groups, demand, supply):
+    # 同组的行按原顺序依次用掉该组的库存 supply（各行取值相同），返回每行用到的数量
+    codes = pd.factorize(groups)[0]
+    order = np.argsort(codes, kind="stable")
+    ordered = demand[order]
+    cumulative = np.cumsum(ordered)
+    first = np.r_[True, codes[order][1:] != codes[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0)) if len(order) else order
+    before = cumulative - ordered - (cumulative - ordered)[group_start]
+    covered = np.empty(len(demand))
+    covered[order] = np.clip(supply[order] - before, 0.0, ordered)
+    return covered
+
+
+def net_plan(plan, on_hand):
+    """从计划的毛需求中扣除库存，返回净需求计划。
+
+    净需求计划的 需用数量_总计 / 成本金额_总计 为需要订购的数量和金额，
+    另加 毛需求数量、现存量 两列便于核对。on_hand 为 Inventory 时按 Inventory.allocate 分配库存，
+    每份库存只扣一次；也可以是与计划行对齐、已分配给各行的库存数组（如界面中逐行修改后的数量）。
+    """
+    lines = plan.lines
+    gross = lines["需用数量_总计"].to_numpy(dtype=np.float64)
+    if isinstance(on_hand, Inventory):
+        on_hand = on_hand.allocate(lines)
+    on_hand = np.asarray(on_hand, dtype=np.float64)
+    net = np.maximum(gross - np.nan_to_num(on_hand), 0.0)
+    unit_price = lines["成本单价"].to_numpy(dtype=np.float64)
+
+    netted = lines.copy()
+    position = netted.columns.get_loc("需用数量_总计")
+    netted.insert(position, ON_HAND_COLUMN, on_hand)
+    netted.insert(position, "毛需求数量", gross)
+    netted["需用数量_总计"] = net
+    netted["成本金额_总计"] = net * unit_price
+    return MaterialPlan(plan.product, plan.quantity, netted)
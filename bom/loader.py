@@ -0,0 +1,273 @@
+"""物料清单Excel读取
+
+按行流式解析 xlsx 工作表的 XML，只保留计划用到的列，并直接构建带类型的列，
+避免 ``pd.read_excel`` 先把整张表读成对象再转换的内存与时间开销。
+"""
+import io
+import os
+import posixpath
+import zipfile
+from array import array
+from xml.etree.ElementTree import iterparse
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+
+from .schema import ISSUES_ATTR, NUMERIC_COLUMNS, issue_records, normalize_bom
+
+# 计划用到的列
+PLANNER_COLUMNS = (
+    "物料清单编码", "版本号", "条码", "父件预入仓库", "父件商品", "生产数量", "子件商品", "规格型号", "需用数量",
+    "成本单价", "成本金额", "默认供应商", "计量单位", "子件版本号", "子件预出仓库",
+)
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_T = _NS + "t"
+
+# expat 命名空间模式下的标签名（命名空间与标签以空格分隔）
+_SAX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main "
+_SAX_ROW = _SAX_NS + "row"
+_SAX_C = _SAX_NS + "c"
+_SAX_V = _SAX_NS + "v"
+_SAX_T = _SAX_NS + "t"
+
+
+_COLUMN_INDEX = {}
+
+
+def _column_index(letters):
+    # "A" -> 0, "AB" -> 27
+    idx = _COLUMN_INDEX.get(letters)
+    if idx is None:
+        idx = 0
+        for ch in letters:
+            idx = idx * 26 + (ord(ch) - 64)
+        idx -= 1
+        _COLUMN_INDEX[letters] = idx
+    return idx
+
+
+def _first_sheet_path(zf):
+    # 通过 workbook.xml 与关系文件定位第一个工作表
+    with zf.open("xl/workbook.xml") as fh:
+        for _, elem in iterparse(fh):
+            if elem.tag == _NS + "sheet":
+                rel_id = elem.get(_REL_NS + "id")
+                break
+        else:
+            raise ValueError("工作簿中没有工作表")
+    with zf.open("xl/_rels/workbook.xml.rels") as fh:
+        for _, elem in iterparse(fh):
+            if elem.tag == _PKG_REL_NS + "Relationship" and elem.get("Id") == rel_id:
+                target = elem.get("Target")
+                break
+        else:
+            raise ValueError("找不到工作表关系")
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def _shared_strings(zf):
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    strings = []
+    with zf.open("xl/sharedStrings.xml") as fh:
+        for _, elem in iterparse(fh):
+            if elem.tag == _NS + "si":
+                strings.append("".join(t.text or "" for t in elem.iter(_T)))
+                elem.clear()
+    return strings
+
+
+def _cell_value(kind, text, shared):
+    if kind == "inlineStr" or kind == "str" or kind == "e":
+        return text
+    if text == "":
+        return None
+    if kind == "s":
+        return shared[int(text)]
+    if kind == "b":
+        return text == "1"
+    return float(text)
+
+
+def _dedupe_header(names):
+    # 与 pandas 一致：重复列名依次加 .1/.2 后缀
+    seen = {}
+    result = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            result.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            result.append(name)
+    return result
+
+
+def _to_float(value):
+    if value is None:
+        return np.nan
+    if isinstance(value, float):
+        return value
+    try:
+        return float(value.replace(",", "") if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_text(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, float):
+        # 纯数字单元格的编码按整数文本保存，如 72.0 -> "72"
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+
+def _iter_rows(fh, shared, keep):
+    """以 SAX 方式逐行解析工作表，产出 {列序号: 值}。
+
+    ``keep(col)`` 为 False 的单元格不做任何转换；已产出的行不会被保留。
+    """
+    rows = []
+    row = None
+    col = 0
+    kind = None
+    wanted = False
+    text = None
+
+    def start(name, attrs):
+        nonlocal row, col, kind, wanted, text
+        if name == _SAX_C:
+            ref = attrs.get("r")
+            col = _column_index(ref.rstrip("0123456789")) if ref else len(row)
+            kind = attrs.get("t")
+            wanted = keep(col)
+        elif name == _SAX_V or name == _SAX_T:
+            if wanted:
+                if text is None:
+                    text = []
+        elif name == _SAX_ROW:
+            row = {}
+
+    def end(name):
+        nonlocal wanted, text
+        if name == _SAX_C:
+            if wanted and text is not None:
+                row[col] = _cell_value(kind, "".join(text), shared)
+            text = None
+        elif name == _SAX_ROW:
+            rows.append(row)
+
+    def data(chunk):
+        if text is not None:
+            text.append(chunk)
+
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    while True:
+        block = fh.read(1 << 16)
+        final = not block
+        parser.Parse(block, final)
+        if rows:
+            yield from rows
+            rows.clear()
+        if final:
+            break
+
+
+def read_xlsx_columns(file, columns=PLANNER_COLUMNS):
+    """流式读取 xlsx 第一个工作表中的指定列，返回 DataFrame。
+
+    工作表中不存在的列直接忽略；空行跳过。数值列中无法转换的单元格记为 NaN，
+    并记录在 attrs 的问题清单中。
+    """
+    wanted = set(columns)
+    header = None
+    slots = {}  # 列序号 -> (列名, 数据缓冲区, 转换函数)
+    n_rows = 0
+    failures = ([], [], [])  # 行、列名、原值
+
+    def keep(col):
+        return header is None or col in slots
+
+    with zipfile.ZipFile(file) as zf:
+        shared = _shared_strings(zf)
+        with zf.open(_first_sheet_path(zf)) as fh:
+            for values in _iter_rows(fh, shared, keep):
+                if header is None:
+                    width = max(values) + 1 if values else 0
+                    raw = [values.get(i) for i in range(width)]
+                    header = _dedupe_header([_to_text(v) or f"Unnamed: {i}" for i, v in enumerate(raw)])
+                    for i, name in enumerate(header):
+                        if name in wanted:
+                            if name in NUMERIC_COLUMNS:
+                                slots[i] = (name, array("d"), _to_float)
+                            else:
+                                slots[i] = (name, [], _to_text)
+                elif any(v is not None and v != "" for v in values.values()):
+                    for i, (name, buf, convert) in slots.items():
+                        value = values.get(i)
+                        converted = convert(value)
+                        buf.append(converted)
+                        if converted != converted and value is not None and str(value).strip():
+                            failures[0].append(n_rows)
+                            failures[1].append(name)
+                            failures[2].append(value)
+                    n_rows += 1
+
+    data = {}
+    for i in sorted(slots):
+        name, buf, convert = slots[i]
+        if convert is _to_float:
+            data[name] = np.frombuffer(buf, dtype=np.float64) if n_rows else np.empty(0)
+        else:
+            data[name] = np.array(buf, dtype=object)
+    # 按 columns 给定的顺序输出
+    order = [c for c in columns if c in data]
+    df = pd.DataFrame({c: data[c] for c in order})
+    if failures[0]:
+        df.attrs[ISSUES_ATTR] = issue_records(*failures)
+    return df
+
+
+def read_bom_excel(file, columns=PLANNER_COLUMNS):
+    """读取物料清单Excel并规范化（见 schema.normalize_bom）。
+
+    xlsx 走流式解析，其他格式（如 xls）回退到 pandas。
+    """
+    if hasattr(file, "seek"):
+        file.seek(0)
+    if zipfile.is_zipfile(file):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return normalize_bom(read_xlsx_columns(file, columns))
+    if hasattr(file, "seek"):
+        file.seek(0)
+    df = pd.read_excel(file)
+    return normalize_bom(df[[c for c in columns if c in df.columns]])
+
+
+def read_table_file(file):
+    """读取 CSV/xlsx 表格（本地路径或上传的文件对象），全部列按文本读取，列名去掉首尾空白。
+
+    按文件名的扩展名区分格式，.csv 按 UTF-8（可带 BOM）解码，其余按 Excel 读取；
+    上传的文件对象先取出全部字节，重复读取时不受读取位置影响。
+    """
+    name = getattr(file, "name", file if isinstance(file, (str, os.PathLike)) else "")
+    if hasattr(file, "getvalue"):
+        file = io.BytesIO(file.getvalue())
+    if str(name).lower().endswith(".csv"):
+        df = pd.read_csv(file, dtype=str, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(file, dtype=str)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
@@ -0,0 +1,127 @@
+"""稀疏物料清单矩阵
+
+行为物料清单编码，列为零件编号，值为每件父件的需用数量和成本金额。
+以 CSR 形式（按行排序的行号/列号/数值数组）保存，
+多个型号的物料需求可以用一次稀疏矩阵-向量乘法算出。
+零件与供应商名称编码为整数字典，下游的成本汇总、供应商拆分都在整数数组上完成。
+"""
+import numpy as np
+import pandas as pd
+
+from .explode import BomCycleError
+
+SUPPLIER_COLUMN = "默认供应商"
+
+# 零件属性中重复度高、按整数字典编码保存的列
+CATEGORICAL_COLUMNS = ("计量单位", SUPPLIER_COLUMN, "子件预出仓库")
+
+
+class BomMatrix:
+    """物料清单的稀疏矩阵表示。"""
+
+    def __init__(self, codes, parts, rows, cols, quantity, amount, cyclic=()):
+        self.codes = list(codes)
+        # 循环引用、无法展开的物料清单编码，其行为空
+        self.cyclic = list(cyclic)
+        self.row_of = {code: i for i, code in enumerate(self.codes)}
+        self.parts = parts.astype({c: "category" for c in CATEGORICAL_COLUMNS if c in parts.columns})
+        order = np.argsort(rows, kind="stable")
+        self.rows = np.asarray(rows, dtype=np.int32)[order]
+        self.cols = np.asarray(cols, dtype=np.int32)[order]
+        self.quantity = np.asarray(quantity, dtype=np.float64)[order]
+        self.amount = np.asarray(amount, dtype=np.float64)[order]
+        self.indptr = np.searchsorted(self.rows, np.arange(len(self.codes) + 1)).astype(np.int64)
+        self._column_order = None
+
+        # 零件 -> 供应商编号（-1 表示无供应商），供应商编号 -> 名称
+        if SUPPLIER_COLUMN in self.parts.columns:
+            supplier = self.parts[SUPPLIER_COLUMN].cat
+            self.part_supplier = supplier.codes.to_numpy(dtype=np.int32)
+            self.suppliers = pd.Index(supplier.categories, name=SUPPLIER_COLUMN)
+        else:
+            self.part_supplier = np.full(len(parts), -1, dtype=np.int32)
+            self.suppliers = pd.Index([], name=SUPPLIER_COLUMN)
+
+    @classmethod
+    def from_explosion(cls, explosion, multilevel=True):
+        """由 BomExplosion 构建；multilevel 为 False 时只取直接子件。
+
+        多级展开时循环引用的物料清单（及经由半成品引用到它的物料清单）行为空，编码记在 cyclic 中。
+        """
+        codes = explosion.index.codes
+        rows, cols, quantity, amount, cyclic = [], [], [], [], []
+        for row, code in enumerate(codes):
+            if multilevel:
+                try:
+                    ids, qty, amt = explosion.flatten(code)
+                except BomCycleError:
+                    cyclic.append(code)
+                    continue
+            else:
+                start, stop = explosion.index.child_slice(code)
+                ids = explosion.part_ids[start:stop]
+                qty = explosion.quantity[start:stop]
+                amt = explosion.amount[start:stop]
+            rows.append(np.full(len(ids), row, dtype=np.int32))
+            cols.append(ids)
+            quantity.append(qty)
+            amount.append(amt)
+        if not rows:
+            rows = cols = quantity = amount = [np.empty(0)]
+        return cls(codes, explosion.parts, np.concatenate(rows), np.concatenate(cols),
+                   np.concatenate(quantity), np.concatenate(amount), cyclic)
+
+    @property
+    def shape(self):
+        return len(self.codes), len(self.parts)
+
+    @property
+    def nnz(self):
+        return len(self.cols)
+
+    @property
+    def part_keys(self):
+        """零件编号 -> 零件唯一键（子件商品|规格型号）。"""
+        return self.parts.index
+
+    def row_entries(self, row):
+        """第 row 行（一个物料清单）的 (零件编号, 需用数量, 成本金额)。"""
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        return self.cols[start:stop], self.quantity[start:stop], self.amount[start:stop]
+
+    def column_entries(self, part):
+        """第 part 列（一个零件）在 CSR 数组中的下标，即使用该零件的全部非零项。"""
+        if self._column_order is None:
+            # 按列排序的下标，首次按列访问时构建
+            self._column_order = np.argsort(self.cols, kind="stable")
+            self._column_indptr = np.searchsorted(self.cols[self._column_order], np.arange(len(self.parts) + 1))
+        return self._column_order[self._column_indptr[part]:self._column_indptr[part + 1]]
+
+    def row_cost(self):
+        """每个物料清单每生产一件的成本金额；循环引用的物料清单为 NaN。"""
+        # 矩阵为空时 bincount 返回整数数组，无法写入 NaN
+        cost = np.bincount(self.rows, weights=self.amount, minlength=len(self.codes)).astype(np.float64)
+        if self.cyclic:
+            cost[[self.row_of[c] for c in self.cyclic]] = np.nan
+        return cost
+
+    def requirements(self, demand):
+        """demand 为按行（物料清单编码）排列的生产数量向量，返回每个零件的 (需用数量, 成本金额)。"""
+        demand = np.asarray(demand, dtype=np.float64)
+        scale = demand[self.rows]
+        n_parts = len(self.parts)
+        return (
+            np.bincount(self.cols, weights=self.quantity * scale, minlength=n_parts),
+            np.bincount(self.cols, weights=self.amount * scale, minlength=n_parts),
+        )
+
+    def supplier_totals(self, part_amount):
+        """按供应商汇总零件成本金额，返回按供应商编号排列的数组（不含无供应商的零件）。"""
+        has_supplier = self.part_supplier >= 0
+        return np.bincount(self.part_supplier[has_supplier], weights=np.asarray(part_amount)[has_supplier],
+                           minlength=len(self.suppliers))
+
+    def memory_usage(self):
+        """矩阵数组与名称字典占用的字节数。"""
+        arrays = (self.rows, self.cols, self.quantity, self.amount, self.indptr, self.part_supplier)
+        return sum(a.nbytes for a in arrays) + int(self.parts.memory_usage(deep=True).sum())
@@ -0,0 +1,277 @@
+"""分期物料需求计划（MRP）
+
+物料项 = 物料清单编码（成品、半成品）+ 最底层零件。主生产计划按周给出成品数量，
+自上而下逐层计算：同一层的全部物料项组成 (物料项 × 期) 矩阵，
+逐期做毛需求 -> 预计库存 -> 净需求 -> 批量调整 -> 计划到货，
+计划到货按提前期前移为计划下单，再乘以单位用量成为下一层的毛需求。
+层按半成品的展开层数划分：引用关系只会从层数高的物料清单指向层数低的，
+因此处理某一层时，它的全部上层需求都已确定。
+"""
+import numpy as np
+import pandas as pd
+
+from .index import PRODUCT_COLUMN
+from .rollup import SubassemblyGraph, row_owners
+from .schedule import DEFAULT_LEAD_DAYS, part_lead_days
+
+PERIOD_DAYS = 7
+DEFAULT_HORIZON = 52
+
+# 物料项明细表的各行
+RECORD_ROWS = ["毛需求", "预计到货", "预计库存", "净需求", "计划到货", "计划下单"]
+RELEASE_COLUMNS = ["子件商品", "规格型号", "计量单位", "默认供应商", "下单周", "到货周", "下单数量", "成本单价", "成本金额"]
+ITEM_COLUMNS = ["物料项", "类型", "层", "提前期(周)", "期初库存", "毛需求合计", "计划下单合计", "期末库存", "逾期下单"]
+
+FINISHED = "物料清单"
+PURCHASED = "采购零件"
+
+
+def week_start(date):
+    """date 所在周的周一。"""
+    day = np.datetime64(pd.Timestamp(date), "D")
+    return day - np.timedelta64(int((day.astype(np.int64) + 3) % 7), "D")
+
+
+class MrpModel:
+    """物料项与单位用量结构，每个数据集构建一次，可反复运行不同的主生产计划。"""
+
+    def __init__(self, explosion, matrix):
+        """matrix 为与 explosion 同源的 BomMatrix（用于供应商编号，单级、多级均可）。"""
+        index = explosion.index
+        self.codes = list(index.codes)
+        self.matrix = matrix
+        n_codes = len(self.codes)
+        self.n_codes = n_codes
+        self.parts = explosion.parts
+        self.size = n_codes + len(self.parts)
+
+        owner, sub = row_owners(explosion)
+        graph = SubassemblyGraph(owner, sub, explosion.quantity, n_codes)
+        indexed = owner >= 0
+        # 边：父物料清单 -> 子物料项（半成品为其编码，否则为零件）
+        self.edge_parent = owner[indexed]
+        self.edge_child = np.where(sub[indexed] >= 0, sub[indexed], n_codes + explosion.part_ids[indexed])
+        self.edge_quantity = explosion.quantity[indexed]
+
+        # 层：物料清单按展开层数从高到低，零件最后；循环引用中的物料清单不参与计算
+        height = graph.height
+        self.levels = [np.flatnonzero(height == h) for h in range(int(height.max(initial=-1)), -1, -1)]
+        self.levels.append(np.arange(n_codes, self.size))
+        self.level_of = np.empty(self.size, dtype=np.int64)
+        for level, items in enumerate(self.levels):
+            self.level_of[items] = level
+        self.level_of[np.flatnonzero(height < 0)] = -1
+        self.cyclic = [self.codes[i] for i in np.flatnonzero(height < 0)]
+
+        products = index.parent.drop_duplicates("物料清单编码").set_index("物料清单编码")
+        names = products[PRODUCT_COLUMN].reindex(self.codes) if PRODUCT_COLUMN in products.columns else None
+        code_names = [f"{c} {n}" if isinstance(n, str) else str(c) for c, n in
+                      zip(self.codes, names if names is not None else [None] * n_codes)]
+        self.names = np.array(code_names + list(self.parts.index), dtype=object)
+        self._row_of = {c: i for i, c in enumerate(self.codes)}
+        self._index = index
+
+        # 零件平均成本单价（按用量加权）
+        ids = explosion.part_ids[indexed]
+        qty = np.bincount(ids, weights=explosion.quantity[indexed], minlength=len(self.parts))
+        amount = np.bincount(ids, weights=explosion.amount[indexed], minlength=len(self.parts))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.unit_price = np.where(qty > 0, amount / qty, np.nan)
+
+    def item_of(self, model):
+        """型号（父件商品或物料清单编码）对应的物料项序号，找不到返回 None。"""
+        code = self._index.code_for(model)
+        return self._row_of.get(model if code is None else code)
+
+    def master_schedule(self, orders, start, periods=DEFAULT_HORIZON):
+        """把 (型号, 完工日期, 数量) 按周汇总为 (物料项 × 期) 的主生产计划矩阵。
+
+        返回 (矩阵, 无法识别的型号, 超出计划期的订单数)；早于 start 所在周的订单计入第 0 期。
+        """
+        first = week_start(start)
+        mps = np.zeros((self.size, periods))
+        unresolved, outside = [], 0
+        items, dates, quantity = [], [], []
+        for model, date, qty in orders:
+            item = self.item_of(model)
+            if item is None:
+                unresolved.append(model)
+                continue
+            items.append(item)
+            dates.append(date)
+            quantity.append(float(qty))
+        if items:
+            days = pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+            period = np.maximum((days - first).astype(np.int64) // PERIOD_DAYS, 0)
+            inside = period < periods
+            outside = int((~inside).sum())
+            np.add.at(mps, (np.asarray(items)[inside], period[inside]), np.asarray(quantity)[inside])
+        return mps, unresolved, outside
+
+    def lead_periods(self, lead_times=None, default_lead=DEFAULT_LEAD_DAYS, make_periods=0):
+        """每个物料项的提前期（周）：零件按供应商交货周期向上取整，物料清单为 make_periods。"""
+        lead = np.full(self.size, int(make_periods), dtype=np.int64)
+        days = part_lead_days(self.matrix, lead_times, default_lead)
+        lead[self.n_codes:] = -(-days // PERIOD_DAYS)
+        return lead
+
+    def part_on_hand(self, inventory):
+        """Inventory 中零件的现有库存，按物料项排列（物料清单项为 0）。"""
+        on_hand = np.zeros(self.size)
+        on_hand[self.n_codes:] = inventory.on_hand(np.asarray(self.parts.index, dtype=object))
+        return on_hand
+
+    def plan(self, orders, start, periods=DEFAULT_HORIZON, lead_times=None, make_periods=0, **options):
+        """由 (型号, 完工日期, 数量) 订单直接运行 MRP。
+
+        返回 (MrpResult, 无法识别的型号, 超出计划期的订单数)；options 传给 run（on_hand、min_lot 等）。
+        """
+        mps, unresolved, outside = self.master_schedule(orders, start, periods)
+        lead = self.lead_periods(lead_times, make_periods=make_periods)
+        return self.run(mps, start, lead=lead, **options), unresolved, outside
+
+    def run(self, mps, start, lead=None, on_hand=None, receipts=None, safety_stock=None, min_lot=None,
+            lot_multiple=None):
+        """运行 MRP，返回 MrpResult。
+
+        mps 为 (物料项 × 期) 的独立需求；lead 为各物料项提前期（期数）；
+        on_hand、safety_stock、min_lot、lot_multiple 为按物料项排列的数组（或标量），
+        receipts 为 (物料项 × 期) 的已下达到货。批量规则：净需求按 lot_multiple 向上取整，且不少于 min_lot。
+        safety_stock、min_lot、lot_multiple 为标量时只用于采购零件，物料清单按需生产（不设安全库存、逐批）；
+        标量安全库存只对计划期内有毛需求的零件生效，不为本次计划用不到的零件补货。
+        """
+        mps = np.asarray(mps, dtype=np.float64)
+        n, periods = mps.shape
+
+        def vector(values, default, parts_only=False):
+            if values is not None and parts_only and np.ndim(values) == 0:
+                result = np.full(n, float(default))
+                result[self.n_codes:] = float(values)
+                return result
+            return np.broadcast_to(np.asarray(default if values is None else values, dtype=np.float64), (n,))
+
+        lead = np.broadcast_to(np.asarray(0 if lead is None else lead, dtype=np.int64), (n,))
+        opening = vector(on_hand, 0.0)
+        safety = vector(safety_stock, 0.0, parts_only=True)
+        minimum = vector(min_lot, 0.0, parts_only=True)
+        multiple = vector(lot_multiple, 1.0, parts_only=True)
+        multiple = np.where(multiple > 0, multiple, 1.0)
+        receipts = np.zeros((n, periods)) if receipts is None else np.asarray(receipts, dtype=np.float64)
+
+        gross = mps.copy()
+        projected = np.zeros((n, periods))
+        net = np.zeros((n, periods))
+        planned = np.zeros((n, periods))
+        release = np.zeros((n, periods))
+        past_due = np.zeros(n)
+
+        for items in self.levels:
+            items = items[self.level_of[items] >= 0]
+            if not len(items):
+                continue
+            stock = opening[items].copy()
+            level_safety = safety[items]
+            if safety_stock is not None and np.ndim(safety_stock) == 0:
+                level_safety = np.where(gross[items].any(axis=1), level_safety, 0.0)
+            for t in range(periods):
+                # 预计库存 = 上期库存 + 已下达到货 - 毛需求；低于安全库存的部分为净需求
+                available = stock + receipts[items, t] - gross[items, t]
+                shortage = np.maximum(level_safety - available, 0.0)
+                lot = np.where(shortage > 0,
+                               np.maximum(np.ceil(shortage / multiple[items] - 1e-9) * multiple[items], minimum[items]),
+                               0.0)
+                net[items, t] = shortage
+                planned[items, t] = lot
+                stock = available + lot
+                projected[items, t] = stock
+
+            # 计划到货按提前期前移为计划下单，早于第 0 期的记为逾期
+            shift = np.arange(periods)[None, :] - lead[items][:, None]
+            late = shift < 0
+            past_due[items] = np.where(late, planned[items], 0.0).sum(axis=1)
+            rows = np.repeat(items, periods)
+            np.add.at(release, (rows, np.maximum(shift, 0).ravel()), planned[items].ravel())
+
+            # 本层计划下单 × 单位用量 -> 下层毛需求
+            in_level = np.isin(self.edge_parent, items)
+            parents, children = self.edge_parent[in_level], self.edge_child[in_level]
+            np.add.at(gross, children, self.edge_quantity[in_level][:, None] * release[parents])
+
+        return MrpResult(self, week_start(start), mps, gross, receipts, projected, net, planned, release,
+                         opening, lead, past_due)
+
+
+class MrpResult:
+    """MRP 结果：各量均为 (物料项 × 期) 数组。"""
+
+    def __init__(self, model, start, mps, gross, receipts, projected, net, planned, release, opening, lead, past_due):
+        self.model = model
+        self.start = start
+        self.mps = mps
+        self.gross = gross
+        self.receipts = receipts
+        self.projected = projected
+        self.net = net
+        self.planned = planned
+        self.release = release
+        self.opening = opening
+        self.lead = lead
+        self.past_due = past_due
+
+    @property
+    def periods(self):
+        """各期的周一日期。"""
+        return [str(self.start + np.timedelta64(PERIOD_DAYS * t, "D")) for t in range(self.gross.shape[1])]
+
+    def item_record(self, item):
+        """单个物料项的 MRP 明细表（行为毛需求、预计库存等，列为各期）。"""
+        if not isinstance(item, (int, np.integer)):
+            matches = np.flatnonzero(self.model.names == item)
+            if not len(matches):
+                raise KeyError(f"未找到物料项: {item}")
+            item = int(matches[0])
+        values = [self.gross[item], self.receipts[item], self.projected[item], self.net[item], self.planned[item],
+                  self.release[item]]
+        return pd.DataFrame(values, index=RECORD_ROWS, columns=self.periods)
+
+    def items(self, active_only=True):
+        """每个物料项一行的汇总；active_only 时只含有需求的物料项。"""
+        model = self.model
+        kinds = np.where(np.arange(model.size) < model.n_codes, FINISHED, PURCHASED)
+        table = pd.DataFrame({
+            "物料项": model.names,
+            "类型": kinds,
+            "层": model.level_of,
+            "提前期(周)": self.lead,
+            "期初库存": self.opening,
+            "毛需求合计": self.gross.sum(axis=1),
+            "计划下单合计": self.release.sum(axis=1),
+            "期末库存": self.projected[:, -1] if self.projected.shape[1] else self.opening,
+            "逾期下单": self.past_due,
+        }, columns=ITEM_COLUMNS)
+        if active_only:
+            table = table[table["毛需求合计"] > 0]
+        return table.reset_index(drop=True)
+
+    def purchase_releases(self):
+        """采购零件的计划下单明细（每个零件每次计划到货一行），逾期的下单周记为第 0 期。"""
+        model = self.model
+        planned = self.planned[model.n_codes:]
+        parts, periods = np.nonzero(planned > 0)
+        lines = model.parts.iloc[parts].reset_index(drop=True)
+        lines = lines.reindex(columns=RELEASE_COLUMNS[:4]).astype(object)
+        labels = np.array(self.periods, dtype=object)
+        quantity = planned[parts, periods]
+        lead = self.lead[model.n_codes + parts]
+        lines["下单周"] = labels[np.maximum(periods - lead, 0)]
+        lines["到货周"] = labels[periods]
+        lines["下单数量"] = quantity
+        lines["成本单价"] = model.unit_price[parts]
+        lines["成本金额"] = quantity * model.unit_price[parts]
+        return lines
+
+    def spend_by_period(self):
+        """各期采购下单金额合计。"""
+        release = self.release[self.model.n_codes:]
+        return pd.Series(np.nan_to_num(self.model.unit_price) @ release, index=self.periods, name="下单金额")
+
@@ -0,0 +1,243 @@
+"""文字下单解析（“我要做 10 台商用电磁炉”）
+
+型号名称和商品分类路径各建一个字符 n-gram（1~3 字）倒排索引，查询时取出描述中每个 n-gram
+的倒排行段，一次 bincount 得到每个型号的加权命中，按 名称得分 + 分类得分 × PATH_WEIGHT 排序。
+句子按标点和“和、还有”等连接词切成子句，每个子句中的“数量 + 量词”与前后的型号描述配对，
+一句中有多个型号时得到多行订单，可直接生成批量计划。全部在本地完成，不调用网络服务。
+"""
+import math
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .arrays import ragged_ranges
+
+MATCH_COLUMNS = ["型号", "分类", "得分"]
+MENTION_COLUMNS = ["描述", "数量", "型号", "得分"]
+MISSING_MODEL = "（未写型号）"
+
+NGRAM_SIZES = (1, 2, 3)
+# 分类路径命中的权重低于型号名称
+PATH_WEIGHT = 0.5
+
+UNITS = "台个件套只部"
+CHINESE_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000, "万": 10000}
+
+# “件套”“套件”是型号名称的一部分（如 十件套、12套件），不作数量；数字后的 *（如 750*430）是尺寸，不作数量
+QUANTITY_PATTERN = re.compile(
+    r"(?:(?P<num>\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千万]+)(?P<unit>[" + UNITS + r"])(?![套件])"
+    r"|(?:[x×]|(?<![\d.])\*)(?P<times>\d+)|数量[:：]?(?P<count>\d+))")
+CLAUSE_SEPARATORS = re.compile(r"[，,。；;、\n！!？?]|以及|还有|另外|和|及")
+LEADING_FILLERS = re.compile(r"^(?:我们|我|请|帮我|帮忙|要|想|需要|计划|安排|生产|制作|做|下单|订|来|共|一共|再)+")
+TRAILING_FILLERS = re.compile(r"(?:吧|啊|呢|的|了|就行|即可)+$")
+
+
+def normalize_text(text):
+    """全角转半角、小写、去掉空白。"""
+    return re.sub(r"\s+", "", unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def chinese_number(text):
+    """中文数字（如 二十五、两百、一万二千）转为整数；阿拉伯数字直接转换。"""
+    if re.fullmatch(r"\d+(?:\.\d+)?", text):
+        value = float(text)
+        return int(value) if value.is_integer() else value
+    total, section, digit = 0, 0, 0
+    for char in text:
+        if char in CHINESE_DIGITS:
+            digit = CHINESE_DIGITS[char]
+        elif char == "万":
+            total += (section + digit) * 10000
+            section, digit = 0, 0
+        else:
+            # “十”前面没有数字时为 10
+            section += (digit or 1) * CHINESE_UNITS[char]
+            digit = 0
+    return total + section + digit
+
+
+def ngrams(text, sizes=NGRAM_SIZES):
+    text = normalize_text(text)
+    return {text[i:i + n] for n in sizes for i in range(len(text) - n + 1)}
+
+
+def _strip_fillers(text):
+    return TRAILING_FILLERS.sub("", LEADING_FILLERS.sub("", text))
+
+
+def name_pattern(names):
+    """型号名称（规范化后）的正则，长名称优先；用于在解析数量前遮住句子中写全的型号。"""
+    names = {normalize_text(n) for n in names if isinstance(n, str)}
+    # 单字或纯数字的名称会遮住数量，不参与
+    names = sorted((n for n in names if len(n) > 1 and not n.isdigit()), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, names))) if names else None
+
+
+def _mask_names(text, pattern):
+    # 型号名称替换为等长的占位符，位置不变，其中的数字、连接词和标点不再参与切分和数量识别
+    if pattern is None:
+        return text
+    return pattern.sub(lambda m: "\ue000" * len(m.group()), text)
+
+
+def split_order_text(text, names=None):
+    """把句子切成 (型号描述, 数量) 列表；没有写数量的描述数量为 None。
+
+    names 为 name_pattern 的结果时，句子中与型号名称一致（忽略空白、全半角和大小写）的片段
+    先被遮住，型号名称中的数字（如 抖音 12套件、750*430）不会被当成数量。
+    只有数量没有描述的子句（“做十台，商用电磁炉”）与相邻的、没有数量的描述合并；
+    找不到可合并的描述时保留为 ("", 数量)。
+    """
+    text = normalize_text(text)
+    masked = _mask_names(text, names)
+    mentions = []
+    bounds = [m.span() for m in CLAUSE_SEPARATORS.finditer(masked)]
+    starts = [0] + [stop for _, stop in bounds]
+    stops = [start for start, _ in bounds] + [len(text)]
+    for start, stop in zip(starts, stops):
+        clause, masked_clause = text[start:stop], masked[start:stop]
+        matches = list(QUANTITY_PATTERN.finditer(masked_clause))
+        if not matches:
+            if _strip_fillers(clause):
+                mentions.append((_strip_fillers(clause), None))
+            continue
+        quantities = [chinese_number(m.group("num") or m.group("times") or m.group("count")) for m in matches]
+        # 数量写在型号前（做 10 台 A）时描述取数量之后，否则（A 10 台）取数量之前
+        after = not _strip_fillers(clause[:matches[0].start()])
+        ends = [m.start() for m in matches[1:]] + [len(clause)] if after \
+            else [0] + [m.end() for m in matches[:-1]]
+        for match, quantity, end in zip(matches, quantities, ends):
+            description = clause[match.end():end] if after else clause[end:match.start()]
+            mentions.append((_strip_fillers(description), quantity))
+    return _pair_orphans(mentions)
+
+
+def _pair_orphans(mentions):
+    # 只有数量的项与后一项（没有时为前一项）没有数量的描述合并
+    paired = []
+    for description, quantity in mentions:
+        previous = paired[-1] if paired else None
+        if previous is not None and previous[0] == "" and quantity is None and description:
+            paired[-1] = (description, previous[1])
+        elif previous is not None and description == "" and previous[1] is None and previous[0]:
+            paired[-1] = (previous[0], quantity)
+        else:
+            paired.append((description, quantity))
+    return paired
+
+
+class _NgramIndex:
+    """文档的 n-gram 倒排索引：n-gram -> 文档行段，权重为 n × idf。"""
+
+    def __init__(self, documents):
+        doc_ids, grams = [], []
+        for i, text in enumerate(documents):
+            doc_grams = ngrams(text) if text else set()
+            grams.extend(doc_grams)
+            doc_ids.extend([i] * len(doc_grams))
+        gram_ids, vocabulary = pd.factorize(pd.Series(grams, dtype=object))
+        self.vocabulary = pd.Index(vocabulary)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        order = np.argsort(gram_ids, kind="stable")
+        self.postings = doc_ids[order]
+        self.indptr = np.searchsorted(gram_ids[order], np.arange(len(self.vocabulary) + 1))
+        n = len(documents)
+        lengths = np.array([len(g) for g in self.vocabulary], dtype=np.float64)
+        frequency = np.diff(self.indptr)
+        self.weight = lengths * np.log1p(n / np.maximum(frequency, 1))
+        # 每个文档全部 n-gram 的权重和，用于偏向更短、更贴切的名称
+        self.doc_weight = np.bincount(doc_ids, weights=self.weight[gram_ids], minlength=n)
+        self.size = n
+
+    def score(self, query):
+        """查询与每个文档的得分：命中权重占查询的比例为主，占文档的比例为辅。"""
+        query_grams = list(ngrams(query))
+        grams = self.vocabulary.get_indexer(query_grams)
+        # 索引中没有的 n-gram 按最高 idf 计入查询权重
+        unseen = np.array([len(g) for g in query_grams], dtype=np.float64) * math.log1p(self.size)
+        query_weight = np.where(grams >= 0, self.weight[np.maximum(grams, 0)] if len(self.weight) else 0.0,
+                                unseen).sum()
+        known = grams[grams >= 0]
+        if not len(known):
+            return np.zeros(self.size)
+        starts, stops = self.indptr[known], self.indptr[known + 1]
+        lengths = stops - starts
+        entries = ragged_ranges(starts, lengths)
+        shared = np.bincount(self.postings[entries], weights=np.repeat(self.weight[known], lengths),
+                             minlength=self.size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = np.where(self.doc_weight > 0, shared / self.doc_weight, 0.0)
+        return 0.9 * shared / query_weight + 0.1 * coverage
+
+
+class ModelIndex:
+    """型号名称 + 分类路径的模糊检索索引。"""
+
+    def __init__(self, models, paths=None):
+        self.models = np.asarray(list(models), dtype=object)
+        self.paths = np.asarray(list(paths) if paths is not None else [None] * len(self.models), dtype=object)
+        self._names = _NgramIndex([str(m) for m in self.models])
+        self._paths = _NgramIndex([str(p) if p is not None else "" for p in self.paths])
+        self._exact = {normalize_text(m): i for i, m in enumerate(self.models)}
+        self._name_pattern = name_pattern(self.models)
+
+    @classmethod
+    def from_models(cls, models, tree=None):
+        """models 为型号名称；tree 为 CategoryTree 时带上每个型号的分类路径。"""
+        models = list(models)
+        if tree is None:
+            return cls(models)
+        return cls(models, [tree.paths[tree.category_of(m)] for m in models])
+
+    def scores(self, query):
+        exact = self._exact.get(normalize_text(query))
+        scores = self._names.score(query) + PATH_WEIGHT * self._paths.score(query)
+        if exact is not None:
+            # 与型号名称完全一致时排在最前
+            scores[exact] += 1.0 + PATH_WEIGHT
+        return scores
+
+    def search(self, query, limit=10):
+        """按得分从高到低返回匹配的型号（MATCH_COLUMNS），得分为 0 的不返回。"""
+        scores = self.scores(query)
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit] if limit else np.array([], dtype=np.int64)
+        top = top[np.lexsort((top, -scores[top]))]
+        top = top[scores[top] > 0]
+        return pd.DataFrame({"型号": self.models[top], "分类": self.paths[top], "得分": scores[top]},
+                            columns=MATCH_COLUMNS)
+
+    def parse(self, text, limit=5):
+        """解析文字订单，返回 [(描述, 数量, 候选型号 DataFrame)]，每个描述一项。
+
+        只写了数量、没有型号描述的项描述为空字符串，候选型号为空表。
+        """
+        return [(description, quantity,
+                 self.search(description, limit) if description else pd.DataFrame(columns=MATCH_COLUMNS))
+                for description, quantity in split_order_text(text, self._name_pattern)
+                if description or quantity is not None]
+
+    def mentions(self, parsed):
+        """parse 的结果取每个描述的最佳型号，返回 MENTION_COLUMNS 列的 DataFrame；没有匹配时型号为 None。"""
+        return pd.DataFrame([
+            (description, quantity,
+             matches["型号"].iloc[0] if len(matches) else None,
+             matches["得分"].iloc[0] if len(matches) else 0.0)
+            for description, quantity, matches in parsed
+        ], columns=MENTION_COLUMNS)
+
+    def orders(self, text, default_quantity=1):
+        """文字订单 -> ([(型号, 数量)], 无法匹配的描述列表)，可直接传给 plan_batch。
+
+        只写了数量的项以“（未写型号）× 数量”计入无法匹配的列表。
+        """
+        orders, unmatched = [], []
+        for description, quantity, matches in self.parse(text, limit=1):
+            if matches.empty:
+                unmatched.append(description or f"{MISSING_MODEL} × {quantity:g}")
+            else:
+                orders.append((matches["型号"].iloc[0], quantity if quantity is not None else default_quantity))
+        return orders, unmatched
@@ -0,0 +1,75 @@
+"""物料需求计划结果
+
+计划行的数值列保持数值类型，合计单独作为汇总信息保存，不混入数据行，
+因此可以直接用 st.dataframe 渲染，导出时再把汇总行写到表尾。
+"""
+import numpy as np
+import pandas as pd
+
+PLAN_COLUMNS = ["子件商品", "规格型号", "需用数量", "成本单价", "成本金额", "需用数量_总计", "成本金额_总计", "默认供应商",
+                "子件预出仓库"]
+NUMERIC_PLAN_COLUMNS = ("需用数量", "成本单价", "成本金额", "需用数量_总计", "成本金额_总计")
+
+SUMMARY_LABEL = "成本金额汇总："
+LABEL_COLUMN = "需用数量_总计"
+TOTAL_COLUMN = "成本金额_总计"
+
+
+class MaterialPlan:
+    """一份物料需求计划：带类型的计划行 + 汇总。"""
+
+    def __init__(self, product, quantity, lines):
+        self.product = product
+        self.quantity = quantity
+        self.lines = lines
+
+    @property
+    def total_cost(self):
+        return float(self.lines[TOTAL_COLUMN].sum()) if TOTAL_COLUMN in self.lines.columns else 0.0
+
+    @property
+    def summary(self):
+        return {"零件种类": len(self.lines), "成本金额汇总": self.total_cost}
+
+    def footer_rows(self):
+        """导出时追加在表尾的汇总行，列位置与计划行对齐。"""
+        columns = list(self.lines.columns)
+        if TOTAL_COLUMN not in columns:
+            return []
+        row = [None] * len(columns)
+        if LABEL_COLUMN in columns:
+            row[columns.index(LABEL_COLUMN)] = SUMMARY_LABEL
+        row[columns.index(TOTAL_COLUMN)] = self.total_cost
+        return [row]
+
+
+def typed_lines(lines, columns=PLAN_COLUMNS):
+    """按 columns 选取并补齐计划列。
+
+    数值列在载入时已规范化为 float64（见 schema.normalize_bom），这里不再做类型转换。
+    """
+    output = pd.DataFrame(index=lines.index)
+    for col in columns:
+        if col not in lines.columns:
+            output[col] = np.nan if col in NUMERIC_PLAN_COLUMNS else None
+        else:
+            output[col] = lines[col]
+    return output.reset_index(drop=True)
+
+
+def unit_lines(children, columns=PLAN_COLUMNS):
+    """每生产一件的计划行（不含 _总计 列），可缓存后按数量缩放。"""
+    return typed_lines(children, [c for c in columns if c not in ("需用数量_总计", "成本金额_总计")])
+
+
+def scale_plan(product, unit, quantity, columns=PLAN_COLUMNS):
+    """需求与生产数量成正比：单件计划行的需用数量与成本金额乘以生产数量。"""
+    lines = unit.copy()
+    lines["需用数量_总计"] = unit["需用数量"].to_numpy() * quantity
+    lines["成本金额_总计"] = unit["成本金额"].to_numpy() * quantity
+    return MaterialPlan(product, quantity, lines[list(columns)])
+
+
+def build_plan(product, children, quantity, columns=PLAN_COLUMNS):
+    """单一型号计划：子件每件需用数量与成本金额乘以生产数量。"""
+    return scale_plan(product, unit_lines(children, columns), quantity, columns)
@@ -0,0 +1,134 @@
+"""商品档案
+
+product.xlsx 每个商品一行（商品编码、计量单位、基准批发价、参考成本、默认供应商、默认仓库）。
+载入一次后按 商品名称+规格型号 和 商品编码 建哈希索引，
+对物料清单子件做一次向量化关联，补齐缺失的成本单价与默认供应商，
+并按基准批发价计算成品毛利。
+"""
+import numpy as np
+import pandas as pd
+
+from .explode import part_keys
+from .loader import read_xlsx_columns
+from .schema import normalize_bom
+
+PRODUCT_COLUMNS = ("商品编码", "商品分类", "计量单位", "基准批发价", "规格型号", "商品名称", "参考成本", "默认供应商", "默认仓库")
+PRODUCT_NUMERIC_COLUMNS = ("基准批发价", "参考成本")
+
+MARGIN_COLUMNS = ["物料清单编码", "父件商品", "商品编码", "单件成本", "基准批发价", "毛利", "毛利率"]
+
+
+def read_product_master(file):
+    """读取 product.xlsx，返回 ProductMaster。"""
+    return ProductMaster(read_xlsx_columns(file, PRODUCT_COLUMNS))
+
+
+class ProductMaster:
+    """商品档案：商品名称+规格型号、商品编码两个哈希索引，同键重复时取第一条。"""
+
+    def __init__(self, products):
+        products = normalize_bom(products, PRODUCT_NUMERIC_COLUMNS).reset_index(drop=True)
+        self.products = products
+        keys = part_keys(products.rename(columns={"商品名称": "子件商品"}))
+        self._by_key = self._first_index(keys)
+        self._by_name = self._first_index(products["商品名称"].astype(object).where(products["商品名称"].notna(), ""))
+        if "商品编码" in products.columns:
+            self._by_code = self._first_index(products["商品编码"].astype(object).where(products["商品编码"].notna(), ""))
+        else:
+            self._by_code = pd.Series(dtype=np.int64)
+
+    @staticmethod
+    def _first_index(keys):
+        # 键 -> 第一次出现的行号
+        keys = pd.Series(np.asarray(keys, dtype=object))
+        first = ~keys.duplicated().to_numpy()
+        return pd.Series(np.flatnonzero(first), index=pd.Index(keys[first].to_numpy()))
+
+    def __len__(self):
+        return len(self.products)
+
+    @staticmethod
+    def _rows(index, keys):
+        # 找不到的键返回 -1
+        pos = index.index.get_indexer(np.asarray(keys, dtype=object))
+        return np.where(pos >= 0, index.to_numpy()[np.maximum(pos, 0)] if len(index) else -1, -1)
+
+    def rows_for_parts(self, lines):
+        """计划行或子件行（子件商品、规格型号）对应的商品档案行号。"""
+        return self._rows(self._by_key, part_keys(lines).to_numpy())
+
+    def rows_for_names(self, names):
+        """按商品名称查找（成品没有规格型号时使用）。"""
+        return self._rows(self._by_name, names)
+
+    def rows_for_codes(self, codes):
+        return self._rows(self._by_code, codes)
+
+    def column(self, name, rows):
+        """按行号取档案列，行号为 -1 处为缺失值。"""
+        if name not in self.products.columns:
+            return np.full(len(rows), np.nan if name in PRODUCT_NUMERIC_COLUMNS else None, dtype=object)
+        values = self.products[name].to_numpy()
+        missing = np.nan if values.dtype.kind == "f" else None
+        taken = values[np.maximum(rows, 0)] if len(values) else np.full(len(rows), missing, dtype=values.dtype)
+        return np.where(rows >= 0, taken, missing)
+
+    def fill_child(self, child):
+        """用参考成本、默认供应商补齐子件表中缺失的 成本单价 / 默认供应商，
+        补齐单价的行同时按 需用数量 × 参考成本 重算为空或为 0 的成本金额。
+
+        返回 (新子件表, {列名: 补齐的行数})；原表不变。
+        """
+        rows = self.rows_for_parts(child)
+        filled = {}
+        updates = {}
+
+        price = child["成本单价"].to_numpy(dtype=np.float64) if "成本单价" in child.columns \
+            else np.full(len(child), np.nan)
+        reference = self.column("参考成本", rows).astype(np.float64)
+        fill = np.isnan(price) & ~np.isnan(reference)
+        if fill.any():
+            updates["成本单价"] = np.where(fill, reference, price)
+            # 原来没有单价的行，成本金额为空或 0，按补齐的单价重算
+            if "需用数量" in child.columns:
+                amount = child["成本金额"].to_numpy(dtype=np.float64) if "成本金额" in child.columns \
+                    else np.full(len(child), np.nan)
+                recompute = fill & (np.isnan(amount) | (amount == 0))
+                quantity = child["需用数量"].to_numpy(dtype=np.float64)
+                updates["成本金额"] = np.where(recompute, quantity * reference, amount)
+        filled["成本单价"] = int(fill.sum())
+
+        if "默认供应商" in child.columns:
+            supplier = child["默认供应商"]
+            blank = (supplier.isna() | (supplier.astype(object).astype(str).str.strip() == "")).to_numpy()
+            master_supplier = self.column("默认供应商", rows)
+            fill = blank & pd.notna(master_supplier)
+            if fill.any():
+                values = np.where(fill, master_supplier, supplier.astype(object).to_numpy())
+                is_category = isinstance(supplier.dtype, pd.CategoricalDtype)
+                updates["默认供应商"] = pd.Series(values, index=child.index, dtype="category" if is_category else object)
+            filled["默认供应商"] = int(fill.sum())
+
+        return (child.assign(**updates) if updates else child), filled
+
+    def margins(self, codes, products, unit_costs):
+        """成品毛利：基准批发价 - 单件成本。
+
+        codes/products/unit_costs 一一对应（物料清单编码、父件商品、单件成本）；
+        成品按商品名称在档案中查找基准批发价。
+        """
+        rows = self.rows_for_names(products)
+        wholesale = self.column("基准批发价", rows).astype(np.float64)
+        unit_costs = np.asarray(unit_costs, dtype=np.float64)
+        margin = wholesale - unit_costs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(wholesale > 0, margin / wholesale, np.nan)
+        return pd.DataFrame({
+            "物料清单编码": list(codes),
+            "父件商品": list(products),
+            "商品编码": self.column("商品编码", rows),
+            "单件成本": unit_costs,
+            "基准批发价": wholesale,
+            "毛利": margin,
+            "毛利率": rate,
+        }, columns=MARGIN_COLUMNS)
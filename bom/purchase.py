@@ -0,0 +1,90 @@
+"""供应商采购订单
+
+对物料需求计划按默认供应商做一次 groupby，得到每个供应商的订单行和合计，
+并导出为每个供应商一个工作表的Excel（与供应商订单样表格式一致），或每个供应商一个文件的 zip。
+"""
+import io
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from .export import write_sheet
+
+SUPPLIER_COLUMN = "默认供应商"
+NO_SUPPLIER = "未指定供应商"
+
+# 与样表《中山市东凤镇顺志包装材料厂(2).xlsx》一致的列
+PURCHASE_ORDER_COLUMNS = ["子件商品", "规格型号", "需用数量_单件", "成本单价", "成本金额", "需用数量_总计", "成本金额_总计"]
+SUMMARY_LABEL = "成本金额汇总："
+
+
+def purchase_orders(lines):
+    """按供应商拆分计划行，返回 {供应商: 订单行 DataFrame}，顺序为供应商首次出现的顺序。"""
+    df = lines.rename(columns={"需用数量": "需用数量_单件"})
+    for col in PURCHASE_ORDER_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    supplier = df[SUPPLIER_COLUMN].astype(object) if SUPPLIER_COLUMN in df.columns else pd.Series(None, index=df.index)
+    supplier = supplier.where(supplier.notna() & (supplier != ""), NO_SUPPLIER)
+    return {
+        name: group.reset_index(drop=True)
+        for name, group in df[PURCHASE_ORDER_COLUMNS].groupby(supplier.to_numpy(), sort=False)
+    }
+
+
+def supplier_summary(orders):
+    """每个供应商的订单行数和成本金额合计。"""
+    return pd.DataFrame({
+        SUPPLIER_COLUMN: list(orders),
+        "零件种类": [len(o) for o in orders.values()],
+        "成本金额_总计": [o["成本金额_总计"].sum() for o in orders.values()],
+    })
+
+
+def _sheet_name(name, used, max_length=31):
+    # Excel 工作表名最长 31 个字符，且不能包含 []:*?/\（这些字符同样不适合作文件名）
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:max_length] or "Sheet"
+    candidate, n = base, 1
+    while candidate in used:
+        n += 1
+        suffix = f"_{n}"
+        candidate = base[: max_length - len(suffix)] + suffix
+    used.add(candidate)
+    return candidate
+
+
+def _write_order(wb, sheet_name, order):
+    summary = [None] * len(PURCHASE_ORDER_COLUMNS)
+    summary[-2] = SUMMARY_LABEL
+    summary[-1] = float(order["成本金额_总计"].sum())
+    write_sheet(wb, sheet_name, order, footer_rows=[summary])
+
+
+def _save(wb):
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def purchase_orders_workbook(orders):
+    """所有供应商订单写入同一个工作簿，每个供应商一个工作表，返回 xlsx 字节。"""
+    wb = Workbook(write_only=True)
+    used = set()
+    for name, order in orders.items():
+        _write_order(wb, _sheet_name(name, used), order)
+    return _save(wb)
+
+
+def purchase_orders_zip(orders):
+    """每个供应商一个 xlsx 文件，打包为 zip 字节。"""
+    output = io.BytesIO()
+    used = set()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, order in orders.items():
+            wb = Workbook(write_only=True)
+            _write_order(wb, "Sheet1", order)
+            zf.writestr(_sheet_name(name, used, max_length=120) + ".xlsx", _save(wb))
+    return output.getvalue()
@@ -0,0 +1,145 @@
+"""物料清单数据质量检查
+
+对父件表、子件表各做一次向量化扫描，得到逐行问题明细和按检查项汇总的报告，
+可导出为 xlsx（汇总、明细两个工作表）。
+"""
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from .export import write_sheet
+from .index import CODE_COLUMN, PRODUCT_COLUMN
+from .schema import NOT_NUMERIC
+
+REPORT_COLUMNS = ["检查项", "表", "行", CODE_COLUMN, "子件商品", "规格型号", "说明"]
+
+# 检查项 -> 说明；顺序即报告中的顺序
+CHECKS = {
+    "金额不一致": "成本金额 与 需用数量×成本单价 不一致",
+    "重复子件行": "同一物料清单编码下 子件商品+规格型号 重复出现",
+    "父件无子件": "父件的物料清单编码在子件表中没有任何子件行",
+    "子件无父件": "子件行的物料清单编码在父件表中不存在",
+    "缺少默认供应商": "默认供应商为空，无法生成采购订单",
+    "缺少成本": "成本单价和成本金额都为空",
+    "负数量": "需用数量小于 0",
+    "数值无法识别": "数值列中的单元格无法转换为数值，已按空值处理",
+}
+
+# 单价通常只保留两位小数，允许 需用数量 × 0.005 的舍入误差
+ROUNDING = 0.005
+
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name].to_numpy()
+    return np.full(len(df), None, dtype=object)
+
+
+def _blank(values):
+    text = pd.Series(values, dtype=object)
+    return (text.isna() | (text.astype(str).str.strip() == "")).to_numpy()
+
+
+def _numbers(df, name):
+    return df[name].to_numpy(dtype=np.float64) if name in df.columns else np.full(len(df), np.nan)
+
+
+def _rows(check, table, df, mask, note=None):
+    # note(rows) 只为命中的行生成说明
+    rows = np.flatnonzero(mask)
+    if not len(rows):
+        return None
+    return pd.DataFrame({
+        "检查项": check,
+        "表": table,
+        "行": rows,
+        CODE_COLUMN: _column(df, CODE_COLUMN)[rows],
+        "子件商品": _column(df, "子件商品")[rows],
+        "规格型号": _column(df, "规格型号")[rows],
+        "说明": note(rows) if note is not None else CHECKS[check],
+    })
+
+
+class QualityReport:
+    """数据质量报告：details 为逐行明细，summary 为每个检查项的行数。"""
+
+    def __init__(self, details):
+        self.details = details
+
+    @property
+    def summary(self):
+        counts = self.details["检查项"].value_counts()
+        return pd.DataFrame({
+            "检查项": list(CHECKS),
+            "问题行数": [int(counts.get(check, 0)) for check in CHECKS],
+            "说明": list(CHECKS.values()),
+        })
+
+    @property
+    def issue_count(self):
+        return len(self.details)
+
+    def to_xlsx_bytes(self):
+        wb = Workbook(write_only=True)
+        write_sheet(wb, "汇总", self.summary)
+        write_sheet(wb, "明细", self.details)
+        output = io.BytesIO()
+        wb.save(output)
+        return output.getvalue()
+
+
+def check_bom(parent, child, schema_issues=None):
+    """检查父件表和子件表，返回 QualityReport。
+
+    schema_issues 为载入时记录的问题（如 BomDataset.issues），其中无法转换的数值并入报告。
+    行 为各表的数据行序号（从 0 开始，不含表头）。
+    """
+    parts = []
+
+    quantity = _numbers(child, "需用数量")
+    unit_price = _numbers(child, "成本单价")
+    amount = _numbers(child, "成本金额")
+    expected = quantity * unit_price
+    known = ~np.isnan(quantity) & ~np.isnan(unit_price) & ~np.isnan(amount)
+    tolerance = ROUNDING * (np.abs(quantity) + 1)
+    with np.errstate(invalid="ignore"):
+        mismatch = known & (np.abs(amount - expected) > np.maximum(tolerance, 1e-3 * np.abs(amount)))
+    parts.append(_rows("金额不一致", "子件", child, mismatch, lambda rows: [
+        f"成本金额 {a:g}，需用数量×成本单价 = {e:g}" for a, e in zip(amount[rows], expected[rows])]))
+
+    key_columns = [c for c in (CODE_COLUMN, "子件商品", "规格型号") if c in child.columns]
+    if CODE_COLUMN in child.columns and "子件商品" in child.columns:
+        parts.append(_rows("重复子件行", "子件", child, child.duplicated(key_columns, keep=False).to_numpy()))
+
+    if CODE_COLUMN in parent.columns and CODE_COLUMN in child.columns:
+        parent_codes = parent[CODE_COLUMN]
+        child_codes = child[CODE_COLUMN]
+        products = _column(parent, PRODUCT_COLUMN)
+        parts.append(_rows("父件无子件", "父件", parent, ~parent_codes.isin(child_codes).to_numpy(),
+                           lambda rows: [f"父件商品 {p}" for p in products[rows]]))
+        parts.append(_rows("子件无父件", "子件", child, ~child_codes.isin(parent_codes).to_numpy()))
+
+    if "默认供应商" in child.columns:
+        parts.append(_rows("缺少默认供应商", "子件", child, _blank(child["默认供应商"].to_numpy())))
+    parts.append(_rows("缺少成本", "子件", child, np.isnan(unit_price) & np.isnan(amount)))
+    with np.errstate(invalid="ignore"):
+        parts.append(_rows("负数量", "子件", child, quantity < 0))
+
+    if schema_issues is not None and len(schema_issues):
+        failed = schema_issues[schema_issues["问题"] == NOT_NUMERIC]
+        if len(failed):
+            tables = failed["表"].to_numpy() if "表" in failed.columns else "子件"
+            parts.append(pd.DataFrame({
+                "检查项": "数值无法识别",
+                "表": tables,
+                "行": failed["行"].to_numpy(),
+                "说明": (failed["列"] + "：" + failed["原值"].astype(str)).to_numpy(),
+            }))
+
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return QualityReport(pd.DataFrame(columns=REPORT_COLUMNS))
+    details = pd.concat(parts, ignore_index=True).reindex(columns=REPORT_COLUMNS)
+    return QualityReport(details)
@@ -0,0 +1,109 @@
+"""全部物料清单的成本汇总
+
+按拓扑顺序一次算出每个物料清单展开到最底层零件的单件成本：
+先用 bincount 汇总各编码的直接零件成本，再从最底层的半成品开始逐层向上，
+每层把已算好的半成品成本乘以需用数量累加到引用它的物料清单上。
+结果与父件表中记录的 成本金额 对比，标出偏差。
+"""
+import numpy as np
+import pandas as pd
+
+from .index import CODE_COLUMN, PRODUCT_COLUMN
+
+ROLLUP_COLUMNS = [CODE_COLUMN, PRODUCT_COLUMN, "是否半成品", "展开层数", "直接零件成本", "半成品成本",
+                  "展开成本", "父件成本金额", "差额", "差异率", "状态"]
+
+# 状态
+CONSISTENT = "一致"
+DRIFT = "偏差"
+NO_RECORDED_COST = "父件无成本"
+CYCLE = "循环引用"
+
+# 差额超过 max(0.01, 父件成本金额 × 1%) 视为偏差
+DRIFT_TOLERANCE = 0.01
+
+
+def row_owners(explosion):
+    """子件行 -> (所属物料清单序号, 引用的半成品序号)，序号按 index.codes；-1 表示无。"""
+    index = explosion.index
+    position = {code: i for i, code in enumerate(index.codes)}
+    owner = np.full(len(index.child), -1, dtype=np.int64)
+    for i, code in enumerate(index.codes):
+        start, stop = index.child_slice(code)
+        owner[start:stop] = i
+    sub = np.fromiter((position.get(s, -1) for s in explosion.sub_codes), dtype=np.int64, count=len(owner))
+    sub[owner < 0] = -1
+    return owner, sub
+
+
+class SubassemblyGraph:
+    """物料清单之间的半成品引用（父编码 -> 半成品编码，带需用数量），按拓扑层分组。
+
+    height 为每个编码的展开层数（只含零件为 0），循环引用中的编码为 -1。
+    """
+
+    def __init__(self, owner, sub, quantity, n):
+        edge = (owner >= 0) & (sub >= 0)
+        self.parents, self.children, self.quantity = owner[edge], sub[edge], quantity[edge]
+        self.size = n
+        self.height = np.full(n, -1, dtype=np.int64)
+        # pending 为尚未确定的半成品引用数，为 0 的编码进入下一层
+        pending = np.bincount(self.parents, minlength=n)
+        frontier = np.flatnonzero(pending == 0)
+        self.levels = []
+        level = 0
+        while len(frontier):
+            self.height[frontier] = level
+            ready = np.isin(self.children, frontier)
+            self.levels.append(np.flatnonzero(ready))
+            pending -= np.bincount(self.parents[ready], minlength=n)
+            frontier = np.flatnonzero((pending == 0) & (self.height < 0))
+            level += 1
+
+    def propagate(self, direct):
+        """direct 为各编码直接的量（成本、用量等），按层向上累加半成品的量；循环引用中的编码为 NaN。"""
+        total = np.asarray(direct, dtype=np.float64).copy()
+        for edges in self.levels:
+            np.add.at(total, self.parents[edges], self.quantity[edges] * total[self.children[edges]])
+        total[self.height < 0] = np.nan
+        return total
+
+
+def cost_rollup(explosion, tolerance=DRIFT_TOLERANCE):
+    """每个物料清单一行：展开成本、父件表中的成本金额及偏差状态。
+
+    循环引用中的物料清单无法展开，展开成本为空、状态为“循环引用”。
+    """
+    index = explosion.index
+    codes = index.codes
+    n = len(codes)
+    owner, sub = row_owners(explosion)
+    leaf = (owner >= 0) & (sub < 0)
+    direct = np.bincount(owner[leaf], weights=explosion.amount[leaf], minlength=n)
+
+    # 从最底层开始逐层向上，把半成品成本乘以需用数量累加到引用它的物料清单
+    graph = SubassemblyGraph(owner, sub, explosion.quantity, n)
+    cost = graph.propagate(direct)
+    done = graph.height >= 0
+
+    parent = index.parent.drop_duplicates(CODE_COLUMN).set_index(CODE_COLUMN).reindex(codes)
+    recorded = parent["成本金额"].to_numpy(dtype=np.float64) if "成本金额" in parent.columns else np.full(n, np.nan)
+    diff = cost - recorded
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(recorded != 0, diff / recorded, np.nan)
+        drift = np.abs(diff) > np.maximum(0.01, tolerance * np.abs(recorded))
+    status = np.select([~done, np.isnan(recorded), drift], [CYCLE, NO_RECORDED_COST, DRIFT], CONSISTENT)
+
+    return pd.DataFrame({
+        CODE_COLUMN: codes,
+        PRODUCT_COLUMN: parent[PRODUCT_COLUMN].to_numpy() if PRODUCT_COLUMN in parent.columns else None,
+        "是否半成品": [code in explosion.subassembly_codes for code in codes],
+        "展开层数": graph.height,
+        "直接零件成本": direct,
+        "半成品成本": cost - direct,
+        "展开成本": cost,
+        "父件成本金额": recorded,
+        "差额": diff,
+        "差异率": rate,
+        "状态": status,
+    }, columns=ROLLUP_COLUMNS)
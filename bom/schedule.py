@@ -0,0 +1,136 @@
+"""采购排程（按供应商交货周期倒排）
+
+每个订单（型号、数量、完工日期）展开为矩阵中该型号行的全部零件，
+零件需求日期 = 完工日期 - 装配天数，最迟下单日期 = 需求日期 - 供应商交货周期。
+日期以 datetime64[D] 数组整体计算，同一零件同一需求日期的需求合并为一行，
+再按天或按周汇总到排程表。
+"""
+import numpy as np
+import pandas as pd
+
+from .arrays import ragged_ranges
+from .batch import model_row
+from .loader import read_table_file
+
+SCHEDULE_COLUMNS = ["子件商品", "规格型号", "计量单位", "默认供应商", "需用数量", "成本金额", "需求日期",
+                    "交货周期", "最迟下单日期", "状态"]
+
+LEAD_TIME_SUPPLIER_COLUMNS = ("供应商", "供应商名称", "默认供应商")
+LEAD_TIME_COLUMNS = ("交货周期", "交货周期(天)", "交货周期（天）", "交期")
+
+# 未登记交货周期的供应商（及无供应商的零件）默认 7 天
+DEFAULT_LEAD_DAYS = 7
+
+ON_TIME = "按期"
+LATE = "已逾期"
+
+# 界面中的汇总周期 -> bucket_schedule 的 freq
+BUCKETS = {"按周": "W", "按天": "D"}
+
+
+def read_lead_times(file):
+    """读取供应商交货周期 CSV/xlsx（供应商、交货周期两列），返回 {供应商: 天数}。"""
+    df = read_table_file(file)
+    supplier_col = next((c for c in LEAD_TIME_SUPPLIER_COLUMNS if c in df.columns), None)
+    lead_col = next((c for c in LEAD_TIME_COLUMNS if c in df.columns), None)
+    if supplier_col is None or lead_col is None:
+        raise ValueError(f"交货周期文件需包含供应商列（{'/'.join(LEAD_TIME_SUPPLIER_COLUMNS)}）"
+                         f"和交货周期列（{'/'.join(LEAD_TIME_COLUMNS)}）")
+    days = pd.to_numeric(df[lead_col], errors="coerce")
+    valid = df[supplier_col].notna() & days.notna()
+    return dict(zip(df.loc[valid, supplier_col].str.strip(), days[valid].astype(int)))
+
+
+def part_lead_days(matrix, lead_times=None, default=DEFAULT_LEAD_DAYS):
+    """每个零件的交货周期（天），按零件的默认供应商查找。"""
+    lead_times = lead_times or {}
+    supplier_days = np.array([lead_times.get(s, default) for s in matrix.suppliers], dtype=np.int64)
+    # 末尾哨兵对应无供应商（编号 -1）
+    supplier_days = np.append(supplier_days, default)
+    return supplier_days[matrix.part_supplier]
+
+
+def _days(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+
+
+def schedule_orders(matrix, index, orders, lead_times=None, default_lead=DEFAULT_LEAD_DAYS, assembly_days=0,
+                    today=None):
+    """按完工日期倒排采购：orders 为 (型号, 数量, 完工日期) 列表。
+
+    返回 (排程 DataFrame, 无法识别的型号列表)；没有完工日期或日期无法识别的订单也列入无法识别的型号。
+    排程按最迟下单日期、供应商排序，最迟下单日期早于 today（默认今天）的行状态为“已逾期”。
+    """
+    rows, quantity, due, unresolved = [], [], [], []
+    for model, qty, date in orders:
+        row = model_row(matrix, index, model)
+        date = pd.to_datetime(date, errors="coerce")
+        if row is None or pd.isna(date):
+            unresolved.append(model)
+            continue
+        rows.append(row)
+        quantity.append(float(qty))
+        due.append(date)
+    if not rows:
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS), unresolved
+    rows = np.asarray(rows, dtype=np.int64)
+    quantity = np.asarray(quantity, dtype=np.float64)
+    need = _days(due) - np.timedelta64(int(assembly_days), "D")
+
+    # 每个订单对应矩阵中一段连续的非零项，一次取出全部订单的全部零件
+    starts, stops = matrix.indptr[rows], matrix.indptr[rows + 1]
+    lengths = stops - starts
+    order_of = np.repeat(np.arange(len(rows)), lengths)
+    entries = ragged_ranges(starts, lengths)
+    parts = matrix.cols[entries]
+    entry_need = need[order_of]
+
+    # 同一零件、同一需求日期合并
+    day_codes, days = pd.factorize(entry_need)
+    keys, inverse = np.unique(parts.astype(np.int64) * len(days) + day_codes, return_inverse=True)
+    total_quantity = np.bincount(inverse, weights=matrix.quantity[entries] * quantity[order_of], minlength=len(keys))
+    total_amount = np.bincount(inverse, weights=matrix.amount[entries] * quantity[order_of], minlength=len(keys))
+    line_parts = keys // len(days)
+    line_need = np.asarray(days, dtype="datetime64[D]")[keys % len(days)]
+
+    lead = part_lead_days(matrix, lead_times, default_lead)[line_parts]
+    order_date = line_need - lead.astype("timedelta64[D]")
+    today = np.datetime64(pd.Timestamp(today) if today is not None else pd.Timestamp.today(), "D")
+
+    attributes = [c for c in ("子件商品", "规格型号", "计量单位", "默认供应商") if c in matrix.parts.columns]
+    lines = matrix.parts.iloc[line_parts][attributes].reset_index(drop=True)
+    lines = lines.astype({c: object for c in attributes})
+    lines["需用数量"] = total_quantity
+    lines["成本金额"] = total_amount
+    lines["需求日期"] = line_need
+    lines["交货周期"] = lead
+    lines["最迟下单日期"] = order_date
+    lines["状态"] = np.where(order_date < today, LATE, ON_TIME)
+    lines = lines.reindex(columns=SCHEDULE_COLUMNS)
+    return lines.sort_values(["最迟下单日期", "默认供应商"], kind="stable").reset_index(drop=True), unresolved
+
+
+def bucket_schedule(schedule, freq="W", by="默认供应商", value="成本金额", date_column="最迟下单日期"):
+    """按天（D）或按周（W，周一开始）汇总排程：行为 by 的取值，列为连续的各期，空期为 0。"""
+    if schedule.empty:
+        return pd.DataFrame()
+    days = schedule[date_column].to_numpy().astype("datetime64[D]")
+    if freq == "W":
+        # 1970-01-01 为周四，(天数 + 3) % 7 为距本周一的天数
+        offset = (days.astype(np.int64) + 3) % 7
+        days = days - offset.astype("timedelta64[D]")
+        step = 7
+    elif freq == "D":
+        step = 1
+    else:
+        raise ValueError(f"不支持的汇总周期: {freq}")
+    first = days.min()
+    period = ((days - first).astype(np.int64) // step)
+    n_periods = int(period.max()) + 1
+    labels = first + (np.arange(n_periods) * step).astype("timedelta64[D]")
+
+    groups, names = pd.factorize(schedule[by].astype(object).where(schedule[by].notna(), "（无供应商）"))
+    totals = np.bincount(groups * n_periods + period, weights=schedule[value].to_numpy(dtype=np.float64),
+                         minlength=len(names) * n_periods).reshape(len(names), n_periods)
+    columns = [str(d) for d in labels]
+    return pd.DataFrame(totals, index=pd.Index(names, name=by), columns=columns)
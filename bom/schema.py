@@ -0,0 +1,92 @@
+"""载入时的数据规范化
+
+数值列在载入时统一转换为 float64，无法转换的单元格逐条记录下来，不再静默变成 NaN；
+导出文件末尾的“合计：”汇总行也在这里去掉。规范化后的表直接用于计划计算，不再做类型转换。
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype
+
+# 按数值解析的列，其余列一律按文本处理
+NUMERIC_COLUMNS = ("需用数量", "成本单价", "成本金额", "生产数量")
+
+CODE_COLUMN = "物料清单编码"
+SUMMARY_PREFIXES = ("合计", "总计")
+
+ISSUE_COLUMNS = ["行", "列", "原值", "问题"]
+ISSUES_ATTR = "schema_issues"
+
+NOT_NUMERIC = "无法转换为数值"
+SUMMARY_ROW = "汇总行，已移除"
+
+
+def issue_records(rows, columns, values, problem=NOT_NUMERIC):
+    """问题记录 (行, 列, 原值, 问题) 的元组；行为数据行序号（从 0 开始，不含表头）。
+
+    记录以元组保存在 DataFrame.attrs 中，pandas 在派生表时需要比较 attrs，不能直接放 DataFrame。
+    """
+    return tuple((int(r), c, None if v is None else str(v), problem) for r, c, v in zip(rows, columns, values))
+
+
+def schema_issues(df):
+    """载入时记录的问题清单（行、列、原值、问题），没有时返回空表。"""
+    return pd.DataFrame(list(df.attrs.get(ISSUES_ATTR, ())), columns=ISSUE_COLUMNS)
+
+
+def detach_issues(df):
+    """返回 (不带问题记录的浅拷贝, 问题清单)，避免问题记录随派生表一路传递。"""
+    issues = schema_issues(df)
+    if ISSUES_ATTR not in df.attrs:
+        return df, issues
+    detached = df.copy(deep=False)
+    detached.attrs = {k: v for k, v in df.attrs.items() if k != ISSUES_ATTR}
+    return detached, issues
+
+
+def summary_row_mask(df):
+    """物料清单编码以“合计/总计”开头的行。"""
+    if CODE_COLUMN not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    code = df[CODE_COLUMN].astype(object).where(df[CODE_COLUMN].notna(), "").astype(str).str.strip()
+    return code.str.startswith(SUMMARY_PREFIXES).to_numpy()
+
+
+def _coerce(values):
+    # 数值列：去掉千分位逗号和首尾空白后转换；返回 (float64 数组, 转换失败的位置)
+    if is_float_dtype(values.dtype):
+        return values.to_numpy(dtype=np.float64), np.zeros(len(values), dtype=bool)
+    raw = values.astype(object)
+    text = raw.where(raw.notna(), "").astype(str).str.strip().str.replace(",", "", regex=False)
+    numeric = pd.to_numeric(text.where(text != "", None), errors="coerce").to_numpy(dtype=np.float64)
+    failed = np.isnan(numeric) & (text != "").to_numpy()
+    return numeric, failed
+
+
+def normalize_bom(df, columns=NUMERIC_COLUMNS):
+    """去掉汇总行、把数值列转换为 float64，返回新表；问题清单保存在 attrs 中。
+
+    已经规范化过的表再次调用时不做任何转换。
+    """
+    issues = list(df.attrs.get(ISSUES_ATTR, ()))
+    summary = summary_row_mask(df)
+    if summary.any():
+        rows = np.flatnonzero(summary)
+        issues += issue_records(rows, [CODE_COLUMN] * len(rows), df[CODE_COLUMN].to_numpy()[rows], SUMMARY_ROW)
+
+    converted = {}
+    for col in columns:
+        if col not in df.columns or is_float_dtype(df[col].dtype):
+            continue
+        numeric, failed = _coerce(df[col])
+        converted[col] = numeric
+        if failed.any():
+            rows = np.flatnonzero(failed)
+            issues += issue_records(rows, [col] * len(rows), df[col].to_numpy()[rows])
+
+    if not summary.any() and not converted:
+        return df
+    result = df.assign(**converted) if converted else df.copy()
+    if summary.any():
+        result = result[~summary].reset_index(drop=True)
+    result.attrs[ISSUES_ATTR] = tuple(sorted(issues, key=lambda issue: issue[:2]))
+    return result
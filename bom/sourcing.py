@@ -0,0 +1,186 @@
+"""多供应商比价与最优供应商分配
+
+报价表每行为 (供应商, 零件, 单价, 最小订购量, 数量下限)：数量下限 > 0 的行为价格阶梯，
+订购数量达到下限时适用该单价。计划行与全部报价行一次关联，每个候选报价的
+订购数量 = max(需用数量, 最小订购量, 数量下限)，采购金额 = 订购数量 × 单价，
+按零件分组取采购金额最小的报价（相同时优先默认供应商），并与默认供应商对比得出节省金额。
+"""
+import numpy as np
+import pandas as pd
+
+from .arrays import first_in_group, ragged_ranges
+from .explode import part_keys
+from .loader import read_table_file
+
+QUOTE_COLUMNS = ["供应商", "子件商品", "规格型号", "单价", "最小订购量", "数量下限"]
+
+QUOTE_ALIASES = {
+    "供应商": ("供应商", "供应商名称", "默认供应商"),
+    "子件商品": ("子件商品", "商品名称", "零件名称"),
+    "规格型号": ("规格型号", "规格"),
+    "单价": ("单价", "报价", "成本单价", "参考成本"),
+    "最小订购量": ("最小订购量", "起订量", "MOQ"),
+    "数量下限": ("数量下限", "阶梯数量", "价格阶梯"),
+}
+
+ALLOCATION_COLUMNS = ["子件商品", "规格型号", "计量单位", "需用数量_总计", "默认供应商", "默认单价", "默认金额",
+                      "选定供应商", "订购数量", "单价", "采购金额", "节省金额", "报价数"]
+
+
+def read_quotes(file):
+    """读取供应商报价 CSV/xlsx，列名按 QUOTE_ALIASES 识别，返回 QUOTE_COLUMNS 列的 DataFrame。"""
+    df = read_table_file(file)
+    quotes = pd.DataFrame(index=df.index)
+    for column, aliases in QUOTE_ALIASES.items():
+        source = next((c for c in aliases if c in df.columns), None)
+        quotes[column] = df[source] if source is not None else None
+    missing = [c for c in ("供应商", "子件商品", "单价") if quotes[c].isna().all()]
+    if missing:
+        raise ValueError(f"报价文件缺少列: {', '.join(missing)}")
+    return normalize_quotes(quotes)
+
+
+def normalize_quotes(quotes):
+    """整理报价：数值列转为 float64，去掉供应商或单价为空的行。"""
+    quotes = quotes.reindex(columns=QUOTE_COLUMNS).copy()
+    for column in ("单价", "最小订购量", "数量下限"):
+        quotes[column] = pd.to_numeric(quotes[column].astype(object).where(quotes[column].notna(), None),
+                                       errors="coerce")
+    quotes[["最小订购量", "数量下限"]] = quotes[["最小订购量", "数量下限"]].fillna(0.0)
+    supplier = quotes["供应商"].astype(object).where(quotes["供应商"].notna(), "").astype(str).str.strip()
+    quotes["供应商"] = supplier
+    return quotes[(supplier != "") & quotes["单价"].notna()].reset_index(drop=True)
+
+
+def master_quotes(master):
+    """商品档案中的 默认供应商 + 参考成本 作为报价。"""
+    products = master.products
+    if "默认供应商" not in products.columns or "参考成本" not in products.columns:
+        return pd.DataFrame(columns=QUOTE_COLUMNS)
+    return normalize_quotes(pd.DataFrame({
+        "供应商": products["默认供应商"],
+        "子件商品": products["商品名称"],
+        "规格型号": products["规格型号"] if "规格型号" in products.columns else None,
+        "单价": products["参考成本"],
+    }))
+
+
+class QuoteBook:
+    """供应商—零件报价表，按零件唯一键（子件商品|规格型号）建索引。"""
+
+    def __init__(self, quotes):
+        quotes = normalize_quotes(quotes)
+        keys = part_keys(quotes).to_numpy()
+        order = np.argsort(keys, kind="stable")
+        self.quotes = quotes.iloc[order].reset_index(drop=True)
+        keys = keys[order]
+        codes, uniques = pd.factorize(keys)
+        self.part_index = pd.Index(uniques)
+        # 零件 -> 报价行段
+        self._indptr = np.searchsorted(codes, np.arange(len(self.part_index) + 1))
+        self.suppliers = self.quotes["供应商"].to_numpy(dtype=object)
+        self.price = self.quotes["单价"].to_numpy(dtype=np.float64)
+        self.moq = self.quotes["最小订购量"].to_numpy(dtype=np.float64)
+        self.tier = self.quotes["数量下限"].to_numpy(dtype=np.float64)
+
+    @classmethod
+    def combine(cls, *tables):
+        """合并多张报价表（如报价文件和商品档案），完全相同的报价只保留一条。"""
+        tables = [normalize_quotes(t) for t in tables if t is not None and len(t)]
+        if not tables:
+            return cls(pd.DataFrame(columns=QUOTE_COLUMNS))
+        return cls(pd.concat(tables, ignore_index=True).drop_duplicates())
+
+    def __len__(self):
+        return len(self.quotes)
+
+    def expand(self, keys):
+        """零件键数组 -> 全部 (位置, 报价行) 对，一次展开每个零件的报价行段。"""
+        n = len(keys)
+        part = self.part_index.get_indexer(keys) if len(self.part_index) else np.full(n, -1)
+        starts = np.where(part >= 0, self._indptr[np.maximum(part, 0)], 0)
+        lengths = np.where(part >= 0, self._indptr[np.maximum(part, 0) + 1] - starts, 0)
+        line_of = np.repeat(np.arange(n), lengths)
+        quote = ragged_ranges(starts, lengths)
+        return line_of, quote
+
+    def allocate(self, lines):
+        """为计划行（含 子件商品、规格型号、需用数量_总计、成本单价、默认供应商）选择采购金额最低的供应商。
+
+        计划行本身的默认供应商和成本单价也作为候选（不设最小订购量）；返回 ALLOCATION_COLUMNS 列的 DataFrame。
+        """
+        n = len(lines)
+        need = lines["需用数量_总计"].to_numpy(dtype=np.float64)
+        default_supplier = lines["默认供应商"].astype(object).to_numpy() if "默认供应商" in lines.columns \
+            else np.full(n, None, dtype=object)
+        default_price = lines["成本单价"].to_numpy(dtype=np.float64) if "成本单价" in lines.columns \
+            else np.full(n, np.nan)
+
+        line_of, quote = self.expand(part_keys(lines).to_numpy())
+
+        # 默认供应商作为每行的额外候选
+        has_default = ~np.isnan(default_price)
+        default_rows = np.flatnonzero(has_default)
+        cand_line = np.concatenate([default_rows, line_of])
+        cand_supplier = np.concatenate([default_supplier[default_rows], self.suppliers[quote]])
+        cand_price = np.concatenate([default_price[default_rows], self.price[quote]])
+        cand_quantity = np.concatenate([need[default_rows],
+                                        np.maximum(need[line_of], np.maximum(self.moq[quote], self.tier[quote]))])
+        cand_cost = cand_quantity * cand_price
+        is_default = np.concatenate([np.ones(len(default_rows), dtype=bool),
+                                     self.suppliers[quote] == default_supplier[line_of]])
+
+        # 每行取采购金额最小的候选；金额相同时默认供应商优先，再按订购数量少者
+        first = first_in_group(cand_line, cand_cost, ~is_default, cand_quantity)
+        chosen = np.full(n, -1)
+        chosen[cand_line[first]] = first
+
+        # 默认金额为计划行按默认供应商、成本单价的现行金额
+        default_cost = need * default_price
+        quote_count = np.bincount(line_of, minlength=n)
+
+        picked = chosen >= 0
+        take = np.maximum(chosen, 0)
+        allocation = pd.DataFrame({
+            "子件商品": lines["子件商品"].to_numpy(),
+            "规格型号": lines["规格型号"].to_numpy() if "规格型号" in lines.columns else None,
+            "计量单位": lines["计量单位"].to_numpy() if "计量单位" in lines.columns else None,
+            "需用数量_总计": need,
+            "默认供应商": default_supplier,
+            "默认单价": default_price,
+            "默认金额": default_cost,
+            "选定供应商": np.where(picked, cand_supplier[take], default_supplier),
+            "订购数量": np.where(picked, cand_quantity[take], need),
+            "单价": np.where(picked, cand_price[take], np.nan),
+            "采购金额": np.where(picked, cand_cost[take], np.nan),
+            "报价数": quote_count,
+        })
+        allocation["节省金额"] = allocation["默认金额"] - allocation["采购金额"]
+        return allocation[ALLOCATION_COLUMNS]
+
+
+def savings_summary(allocation):
+    """按选定供应商汇总：零件种类、采购金额、相对默认供应商的节省金额。"""
+    chosen, default = allocation["选定供应商"], allocation["默认供应商"]
+    changed = (chosen.astype(object) != default.astype(object)) & ~(chosen.isna() & default.isna())
+    grouped = allocation.assign(更换供应商=changed).groupby("选定供应商", sort=False, dropna=False)
+    summary = pd.DataFrame({
+        "零件种类": grouped.size(),
+        "更换供应商的零件": grouped["更换供应商"].sum(),
+        "采购金额": grouped["采购金额"].sum(),
+        "节省金额": grouped["节省金额"].sum(),
+    }).reset_index()
+    return summary.sort_values("采购金额", ascending=False).reset_index(drop=True)
+
+
+def allocated_lines(allocation):
+    """把分配结果转换为计划行格式（默认供应商为选定供应商），可直接生成采购订单。"""
+    return pd.DataFrame({
+        "子件商品": allocation["子件商品"],
+        "规格型号": allocation["规格型号"],
+        "计量单位": allocation["计量单位"],
+        "需用数量_总计": allocation["订购数量"],
+        "成本单价": allocation["单价"],
+        "成本金额_总计": allocation["采购金额"],
+        "默认供应商": allocation["选定供应商"],
+    })
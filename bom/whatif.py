@@ -0,0 +1,142 @@
+"""调价模拟
+
+情景只保存对基础数据的差异（零件 -> 调价方式），不复制物料清单。
+每个零件的调整只更新多级展开矩阵中使用该零件的非零项所在的行，
+即只重算受影响的物料清单，其余型号的成本保持不变。
+"""
+import numpy as np
+import pandas as pd
+
+from .explode import part_keys
+from .index import CODE_COLUMN, PRODUCT_COLUMN
+from .plan import TOTAL_COLUMN
+
+CHANGE_COLUMNS = ["零件", "调整方式", "调整值", "原成本单价", "新成本单价", "影响物料清单数"]
+IMPACT_COLUMNS = [CODE_COLUMN, PRODUCT_COLUMN, "原单件成本", "新单件成本", "差额", "变化率"]
+
+FACTOR = "按比例"
+PRICE = "指定单价"
+
+
+class PriceScenario:
+    """基于 BomMatrix 的调价情景。
+
+    changes 为 {零件编号: (调整方式, 调整值)}；cost 为当前情景下每个物料清单的单件成本。
+    """
+
+    def __init__(self, matrix, products=None):
+        self.matrix = matrix
+        self.products = np.asarray(products if products is not None else matrix.codes, dtype=object)
+        self.base_cost = matrix.row_cost()
+        self.cost = self.base_cost.copy()
+        self.changes = {}
+        self._deltas = {}
+        # 在矩阵中有非零项的零件；多级矩阵中半成品已展开为零件，没有自己的列项
+        self._used = np.bincount(matrix.cols, minlength=len(matrix.parts)) > 0
+
+    def priceable(self, parts):
+        """parts（零件唯一键）中可以调价的零件，即在矩阵中有用量的零件，保持原顺序。"""
+        parts = list(parts)
+        positions = self.matrix.part_keys.get_indexer(parts)
+        return [p for p, i in zip(parts, positions) if i >= 0 and self._used[i]]
+
+    def _priced_part(self, part):
+        position = self._part(part)
+        if not self._used[position]:
+            raise KeyError(f"零件在矩阵中没有用量（如多级展开中的半成品），无法调价: {self.matrix.part_keys[position]}")
+        return position
+
+    def _part(self, part):
+        if isinstance(part, (int, np.integer)):
+            return int(part)
+        position = self.matrix.part_keys.get_indexer([part])[0]
+        if position < 0:
+            raise KeyError(f"未找到零件: {part}")
+        return int(position)
+
+    def set_factor(self, part, factor):
+        """零件成本单价乘以 factor（如 1.08 为上涨 8%），返回受影响的物料清单行号。"""
+        return self._set(self._priced_part(part), FACTOR, float(factor))
+
+    def set_price(self, part, price):
+        """零件成本单价改为 price，返回受影响的物料清单行号。"""
+        return self._set(self._priced_part(part), PRICE, float(price))
+
+    def reset(self, part=None):
+        """撤销一个零件（part 为 None 时全部零件）的调整。"""
+        parts = list(self.changes) if part is None else [self._part(part)]
+        for p in parts:
+            self._set(p, None, None)
+
+    def _set(self, part, kind, value):
+        entries = self.matrix.column_entries(part)
+        rows = self.matrix.rows[entries]
+        # 先撤销该零件原来的差额，再加上新的差额，只涉及使用该零件的行
+        old = self._deltas.pop(part, None)
+        if old is not None:
+            np.subtract.at(self.cost, rows, old)
+        self.changes.pop(part, None)
+        if kind is None:
+            return rows
+        amount = self.matrix.amount[entries]
+        if kind == FACTOR:
+            delta = amount * (value - 1.0)
+        else:
+            delta = self.matrix.quantity[entries] * value - amount
+        np.add.at(self.cost, rows, delta)
+        self._deltas[part] = delta
+        self.changes[part] = (kind, value)
+        return rows
+
+    def unit_price(self, part):
+        """零件在基础数据中的平均成本单价（按用量加权）。"""
+        entries = self.matrix.column_entries(part)
+        quantity = self.matrix.quantity[entries].sum()
+        return float(self.matrix.amount[entries].sum() / quantity) if quantity else np.nan
+
+    def change_table(self):
+        """情景差异：每个调整的零件一行。"""
+        records = []
+        for part, (kind, value) in self.changes.items():
+            base = self.unit_price(part)
+            new = base * value if kind == FACTOR else value
+            records.append((self.matrix.part_keys[part], kind, value, base, new,
+                            len(np.unique(self.matrix.rows[self.matrix.column_entries(part)]))))
+        return pd.DataFrame(records, columns=CHANGE_COLUMNS)
+
+    def impact(self, tolerance=1e-9):
+        """成本有变化的物料清单：原单件成本、新单件成本、差额、变化率。"""
+        delta = self.cost - self.base_cost
+        rows = np.flatnonzero(np.abs(delta) > tolerance)
+        base = self.base_cost[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(base != 0, delta[rows] / base, np.nan)
+        return pd.DataFrame({
+            CODE_COLUMN: np.asarray(self.matrix.codes, dtype=object)[rows],
+            PRODUCT_COLUMN: self.products[rows],
+            "原单件成本": base,
+            "新单件成本": self.cost[rows],
+            "差额": delta[rows],
+            "变化率": rate,
+        }, columns=IMPACT_COLUMNS)
+
+    def reprice_lines(self, lines):
+        """按情景重新计算计划行（含 子件商品、规格型号、需用数量_总计、成本金额_总计）的成本金额_总计。"""
+        amount = lines[TOTAL_COLUMN].to_numpy(dtype=np.float64)
+        if not self.changes or lines.empty:
+            return amount.copy()
+        parts = self.matrix.part_keys.get_indexer(part_keys(lines).to_numpy())
+        changed = np.fromiter(self.changes, dtype=np.int64)
+        position = pd.Index(changed).get_indexer(parts)
+        hit = (parts >= 0) & (position >= 0)
+        kinds = np.array([self.changes[p][0] for p in changed], dtype=object)
+        values = np.array([self.changes[p][1] for p in changed], dtype=np.float64)
+        quantity = lines["需用数量_总计"].to_numpy(dtype=np.float64)
+        kind, value = kinds[position[hit]], values[position[hit]]
+        repriced = amount.copy()
+        repriced[hit] = np.where(kind == FACTOR, amount[hit] * value, quantity[hit] * value)
+        return repriced
+
+    def plan_delta(self, plan):
+        """计划（MaterialPlan）在情景下的 (原成本金额, 新成本金额)。"""
+        return plan.total_cost, float(self.reprice_lines(plan.lines).sum())
@@ -0,0 +1,112 @@
+"""反查索引（零件、供应商 -> 使用它的物料清单）
+
+每个数据集只构建一次：子件行按零件编号排序成连续行段，
+查零件时取出直接使用它的行，按半成品引用关系逐层向上累加单件用量，
+得到直接和经由半成品间接使用它的全部物料清单。
+供应商按零件的默认供应商在展开后的稀疏矩阵上一次筛选。
+"""
+import numpy as np
+import pandas as pd
+
+from .index import CODE_COLUMN, PRODUCT_COLUMN
+from .rollup import SubassemblyGraph, row_owners
+
+PART_USAGE_COLUMNS = [CODE_COLUMN, PRODUCT_COLUMN, "是否半成品", "直接使用", "单件用量"]
+SUPPLIER_USAGE_COLUMNS = [CODE_COLUMN, PRODUCT_COLUMN, "是否半成品", "零件种数", "单件采购金额"]
+
+
+class WhereUsedIndex:
+    """零件（子件商品|规格型号）或供应商 -> 使用它的物料清单。"""
+
+    def __init__(self, explosion, matrix):
+        """matrix 为多级展开的 BomMatrix，与 explosion 同源。"""
+        index = explosion.index
+        self.codes = np.array(index.codes, dtype=object)
+        parent = index.parent.drop_duplicates(CODE_COLUMN).set_index(CODE_COLUMN).reindex(index.codes)
+        self.products = parent[PRODUCT_COLUMN].to_numpy() if PRODUCT_COLUMN in parent.columns \
+            else np.full(len(self.codes), None, dtype=object)
+        self.subassembly = np.array([code in explosion.subassembly_codes for code in index.codes], dtype=bool)
+
+        owner, sub = row_owners(explosion)
+        self.graph = SubassemblyGraph(owner, sub, explosion.quantity, len(self.codes))
+        # 零件编号 -> 子件行段（行按零件编号稳定排序）
+        rows = np.flatnonzero(owner >= 0)
+        order = rows[np.argsort(explosion.part_ids[rows], kind="stable")]
+        self._part_owner = owner[order]
+        self._part_quantity = explosion.quantity[order]
+        self._part_leaf = sub[order] < 0
+        self._part_indptr = np.searchsorted(explosion.part_ids[order], np.arange(len(explosion.parts) + 1))
+        self.part_keys = explosion.parts.index
+
+        self.matrix = matrix
+        self.suppliers = matrix.suppliers
+        self._search_keys = pd.Series(self.part_keys.astype(str)).str.lower()
+
+    def search_parts(self, query, limit=50):
+        """按子串查找零件唯一键（不区分大小写）。"""
+        query = str(query).strip().lower()
+        if not query:
+            return list(self.part_keys[:limit])
+        hits = self._search_keys.str.contains(query, regex=False).to_numpy()
+        return list(self.part_keys[hits][:limit])
+
+    def search_suppliers(self, query, limit=50):
+        query = str(query).strip().lower()
+        names = self.suppliers.astype(str)
+        hits = names.str.lower().str.contains(query, regex=False) if query else np.ones(len(names), dtype=bool)
+        return list(self.suppliers[hits][:limit])
+
+    def part_usage(self, part):
+        """零件（唯一键或零件编号）被哪些物料清单使用，包括经由半成品的间接使用。
+
+        单件用量为每生产一件该物料清单需要的零件数量；找不到零件时返回空表。
+        """
+        if not isinstance(part, (int, np.integer)):
+            part = self.part_keys.get_indexer([part])[0]
+            if part < 0:
+                return pd.DataFrame(columns=PART_USAGE_COLUMNS)
+        start, stop = self._part_indptr[part], self._part_indptr[part + 1]
+        # 用量与多级展开一致，只计最底层零件行；零件只作为半成品出现时才计半成品行
+        leaf = self._part_leaf[start:stop]
+        weights = self._part_quantity[start:stop] * (leaf if leaf.any() else 1)
+        direct = np.bincount(self._part_owner[start:stop], weights=weights, minlength=len(self.codes))
+        used_directly = np.bincount(self._part_owner[start:stop], minlength=len(self.codes)) > 0
+        total = self.graph.propagate(direct)
+        # 用量为 0 的行仍算作使用；循环引用中的编码沿用直接用量
+        reached = self.graph.propagate(used_directly.astype(np.float64))
+        used = used_directly | (np.nan_to_num(reached) > 0)
+        total = np.where(np.isnan(total), direct, total)
+        rows = np.flatnonzero(used)
+        return pd.DataFrame({
+            CODE_COLUMN: self.codes[rows],
+            PRODUCT_COLUMN: self.products[rows],
+            "是否半成品": self.subassembly[rows],
+            "直接使用": used_directly[rows],
+            "单件用量": total[rows],
+        }, columns=PART_USAGE_COLUMNS)
+
+    def supplier_usage(self, supplier):
+        """供应商的零件被哪些物料清单使用（多级展开后），每个物料清单一行。"""
+        position = self.suppliers.get_indexer([supplier])[0]
+        if position < 0:
+            return pd.DataFrame(columns=SUPPLIER_USAGE_COLUMNS)
+        matrix = self.matrix
+        hit = matrix.part_supplier[matrix.cols] == position
+        rows = matrix.rows[hit]
+        counts = np.bincount(rows, minlength=len(matrix.codes))
+        amount = np.bincount(rows, weights=matrix.amount[hit], minlength=len(matrix.codes))
+        used = np.flatnonzero(counts)
+        return pd.DataFrame({
+            CODE_COLUMN: self.codes[used],
+            PRODUCT_COLUMN: self.products[used],
+            "是否半成品": self.subassembly[used],
+            "零件种数": counts[used],
+            "单件采购金额": amount[used],
+        }, columns=SUPPLIER_USAGE_COLUMNS)
+
+    def supplier_parts(self, supplier):
+        """默认供应商为 supplier 的全部零件唯一键。"""
+        position = self.suppliers.get_indexer([supplier])[0]
+        if position < 0:
+            return []
+        return list(self.part_keys[self.matrix.part_supplier == position])
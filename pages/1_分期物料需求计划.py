@@ -0,0 +1,134 @@
+import streamlit as st
+import pandas as pd
+
+from bom import Inventory, export_bytes, read_demand_file, read_inventory_file, read_lead_times
+
+st.set_page_config(page_title="分期物料需求计划", layout="wide")
+
+st.title("分期物料需求计划（MRP）")
+
+if st.session_state.get("processed_data") is None:
+    st.info("请先在主页上传物料清单或使用示例数据。")
+    st.stop()
+
+dataset = st.session_state.processed_data["dataset"]
+model = dataset.mrp()
+parent_products = dataset.products
+
+# 主生产计划：每行一个型号、完工日期、数量，按周汇总
+st.header("主生产计划")
+demand_source = st.radio("需求来源", ["在页面中填写", "上传CSV/Excel文件"], horizontal=True, key="mrp_source")
+mps_df = None
+if demand_source == "在页面中填写":
+    today = pd.Timestamp.today().normalize()
+    mps_df = st.data_editor(
+        pd.DataFrame({
+            "型号": parent_products[:1],
+            "完工日期": [(today + pd.Timedelta(weeks=4)).date()] * min(1, len(parent_products)),
+            "生产数量": [100] * min(1, len(parent_products)),
+        }),
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "型号": st.column_config.SelectboxColumn("型号", options=parent_products, required=True),
+            "完工日期": st.column_config.DateColumn("完工日期", required=True),
+            "生产数量": st.column_config.NumberColumn("生产数量", min_value=1, step=1, required=True),
+        },
+        key="mrp_demand_editor",
+    )
+else:
+    demand_file = st.file_uploader("选择需求文件", type=['csv', 'xlsx', 'xls'], key='mrp_demand',
+                                   help="需包含 型号、生产数量、完工日期 三列")
+    if demand_file is not None:
+        try:
+            mps_df = read_demand_file(demand_file)
+            if "完工日期" not in mps_df.columns:
+                st.error("需求文件缺少完工日期列。")
+                mps_df = None
+            else:
+                st.dataframe(mps_df, use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"无法读取需求文件: {e}")
+
+# 计划参数
+st.header("计划参数")
+col1, col2, col3 = st.columns(3)
+with col1:
+    start_date = st.date_input("计划开始日期", value=pd.Timestamp.today().date())
+    horizon = st.slider("计划周数", min_value=4, max_value=104, value=52, step=1)
+with col2:
+    make_periods = st.number_input("生产提前期（周）", min_value=0, value=1, step=1,
+                                   help="成品和半成品从投产到完工的周数")
+    safety_stock = st.number_input("安全库存", min_value=0, value=0, step=1, help="只用于采购零件，且只对本次计划用到的零件生效")
+with col3:
+    min_lot = st.number_input("最小批量", min_value=0, value=0, step=1, help="采购零件每次计划到货不少于该数量；物料清单按需生产")
+    lot_multiple = st.number_input("批量倍数", min_value=1, value=1, step=1, help="采购零件的计划到货按该倍数向上取整")
+
+lead_file = st.file_uploader("供应商交货周期文件（可选）", type=['csv', 'xlsx', 'xls'], key='mrp_lead_times',
+                             help="需包含 供应商 和 交货周期（天）两列，未登记的供应商按 7 天")
+stock_file = st.file_uploader("库存文件（可选）", type=['csv', 'xlsx', 'xls'], key='mrp_stock',
+                              help="零件的现存量作为期初库存")
+
+if st.button("运行物料需求计划"):
+    mps_df = None if mps_df is None else mps_df.dropna(subset=["型号", "生产数量", "完工日期"])
+    if mps_df is None or mps_df.empty:
+        st.error("请先填写或上传主生产计划。")
+    else:
+        try:
+            lead_times = read_lead_times(lead_file) if lead_file is not None else None
+            on_hand = model.part_on_hand(Inventory(read_inventory_file(stock_file))) if stock_file is not None else None
+            with st.spinner("正在计算物料需求计划..."):
+                result, unresolved, outside = model.plan(
+                    zip(mps_df["型号"], mps_df["完工日期"], mps_df["生产数量"]), start_date, periods=horizon,
+                    lead_times=lead_times, make_periods=make_periods, on_hand=on_hand,
+                    safety_stock=safety_stock, min_lot=min_lot, lot_multiple=lot_multiple)
+            st.session_state.mrp_result = {"result": result, "unresolved": unresolved, "outside": outside,
+                                           "dataset": dataset.content_key}
+            st.session_state.pop("mrp_file", None)
+        except Exception as e:
+            st.error(f"计算物料需求计划时出错: {e}")
+
+mrp_state = st.session_state.get("mrp_result")
+if mrp_state is not None and mrp_state["dataset"] == dataset.content_key:
+    result = mrp_state["result"]
+    if mrp_state["unresolved"]:
+        st.warning(f"以下型号未找到物料清单，已忽略: {', '.join(map(str, mrp_state['unresolved']))}")
+    if mrp_state["outside"]:
+        st.warning(f"{mrp_state['outside']} 个订单的完工日期超出计划期，未计入。")
+    if model.cyclic:
+        st.warning(f"以下物料清单存在循环引用，未参与计算: {', '.join(map(str, model.cyclic))}")
+    
+    st.header("计划结果")
+    releases = result.purchase_releases()
+    spend = result.spend_by_period()
+    items = result.items()
+    late_items = int((items["逾期下单"] > 0).sum())
+    col1, col2, col3 = st.columns(3)
+    col1.metric("涉及物料项", len(items))
+    col2.metric("采购下单行", len(releases))
+    col3.metric("采购下单金额", f"{spend.sum():,.2f}")
+    if late_items:
+        st.warning(f"{late_items} 个物料项的计划下单早于计划开始日期（逾期），需加急或推迟完工日期。")
+    
+    st.subheader("各周采购下单金额")
+    st.bar_chart(spend)
+    
+    st.subheader("物料项汇总")
+    st.dataframe(items, use_container_width=True, hide_index=True)
+    
+    st.subheader("物料项明细")
+    selected_item = st.selectbox("选择物料项", items["物料项"].tolist(), key="mrp_item")
+    if selected_item is not None:
+        st.dataframe(result.item_record(selected_item), use_container_width=True)
+    
+    st.subheader("采购下单明细")
+    st.dataframe(releases, use_container_width=True, hide_index=True)
+    if st.button("生成下单明细文件"):
+        st.session_state.mrp_file = export_bytes(releases, "xlsx", sheet_name="采购下单")
+    if st.session_state.get("mrp_file") is not None:
+        st.download_button(
+            label="下载采购下单明细",
+            data=st.session_state.mrp_file,
+            file_name="分期物料需求计划_采购下单.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
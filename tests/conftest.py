@@ -0,0 +1,52 @@
+"""测试用的小型物料清单
+
+电磁炉A = 主板组件 × 1 + 外壳 × 1 + 螺丝 × 4
+电磁炉B = 主板组件 × 2 + 外壳 × 1
+主板组件 = 电容 × 3 + 螺丝 × 2（半成品）
+"""
+import pandas as pd
+import pytest
+
+from bom import BomDataset
+
+CHILD_COLUMNS = ["物料清单编码", "子件商品", "规格型号", "需用数量", "成本单价", "默认供应商", "子件预出仓库"]
+
+CHILD_ROWS = [
+    ("B001", "主板组件", None, 1.0, 2.0, None, "成品仓"),
+    ("B001", "外壳", "白色", 1.0, 10.0, "甲厂", "物料仓"),
+    ("B001", "螺丝", "M3", 4.0, 0.1, "乙厂", "物料仓"),
+    ("B002", "电容", "10uF", 3.0, 0.5, "丙厂", "主板配件物料仓"),
+    ("B002", "螺丝", "M3", 2.0, 0.1, "乙厂", "主板配件物料仓"),
+    ("B003", "主板组件", None, 2.0, 2.0, None, "成品仓"),
+    ("B003", "外壳", "白色", 1.0, 12.0, "甲厂", "物料仓"),
+]
+
+
+@pytest.fixture
+def parent():
+    return pd.DataFrame({
+        "物料清单编码": ["B001", "B002", "B003"],
+        "父件商品": ["电磁炉A", "主板组件", "电磁炉B"],
+        "生产数量": [1.0, 1.0, 1.0],
+    })
+
+
+@pytest.fixture
+def make_child():
+    """按行元组（CHILD_COLUMNS 顺序）构建子件表，默认为上面的三个物料清单，extra 追加在后面。"""
+    def make(rows=CHILD_ROWS, extra=()):
+        child = pd.DataFrame(list(rows) + list(extra), columns=CHILD_COLUMNS)
+        child["成本金额"] = child["需用数量"] * child["成本单价"]
+        child["计量单位"] = "个"
+        return child
+    return make
+
+
+@pytest.fixture
+def child(make_child):
+    return make_child()
+
+
+@pytest.fixture
+def dataset(parent, child):
+    return BomDataset(parent, child)
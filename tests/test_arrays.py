@@ -0,0 +1,45 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from bom import read_inventory_file
+from bom.arrays import first_in_group, ragged_ranges
+from bom.loader import read_table_file
+
+
+def test_ragged_ranges():
+    assert ragged_ranges([5, 0, 2], [2, 0, 3]).tolist() == [5, 6, 2, 3, 4]
+    assert ragged_ranges([], []).tolist() == []
+
+
+def test_first_in_group_uses_keys_in_priority_order():
+    groups = np.array([1, 0, 1, 0, 1])
+    cost = np.array([3.0, 2.0, 1.0, 2.0, 1.0])
+    quantity = np.array([1.0, 9.0, 5.0, 4.0, 2.0])
+    # 组 0：金额相同取数量少的 3；组 1：金额最低的 2、4 中取数量少的 4
+    assert first_in_group(groups, cost, quantity).tolist() == [3, 4]
+    assert first_in_group(np.array([], dtype=np.int64), np.array([])).tolist() == []
+
+
+class Upload(io.BytesIO):
+    """模拟 Streamlit 的上传文件：带文件名，读取位置可能已在末尾。"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.seek(0, io.SEEK_END)
+
+
+def test_read_table_file_reads_uploads_and_paths(tmp_path):
+    data = " 子件商品 ,现存量\n螺丝,10\n".encode("utf-8-sig")
+    (tmp_path / "stock.csv").write_bytes(data)
+    for source in (Upload(data, "stock.csv"), tmp_path / "stock.csv"):
+        df = read_table_file(source)
+        assert list(df.columns) == ["子件商品", "现存量"]
+        assert df["现存量"].tolist() == ["10"]
+
+    buffer = io.BytesIO()
+    pd.DataFrame({"子件商品": ["螺丝"], "库存数量": [3]}).to_excel(buffer, index=False)
+    stock = read_inventory_file(Upload(buffer.getvalue(), "库存.xlsx"))
+    assert stock["现存量"].tolist() == [3.0]
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from bom.cli import main
+
+
+@pytest.fixture
+def files(tmp_path, parent, make_child):
+    """写成 xlsx 的测试物料清单；主板组件引用电磁炉A 形成循环，电磁炉C 可正常展开。"""
+    cyclic = [("B002", "电磁炉A", None, 1.0, 0.0, None, None), ("B004", "外壳", "白色", 1.0, 10.0, "甲厂", "物料仓")]
+    parent = pd.concat([parent, pd.DataFrame({"物料清单编码": ["B004"], "父件商品": ["电磁炉C"], "生产数量": [1.0]})])
+    parent.to_excel(tmp_path / "parent.xlsx", index=False)
+    make_child(extra=cyclic).to_excel(tmp_path / "child.xlsx", index=False)
+    return tmp_path
+
+
+def run(files, *args):
+    return main(["--bom", str(files / "child.xlsx"), "--parent", str(files / "parent.xlsx"), "--no-cache", *args])
+
+
+@pytest.mark.parametrize("option", ["--out", "--orders", "--schedule"])
+def test_unsupported_extension_fails_before_loading(tmp_path, capsys, option):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--bom", str(tmp_path / "missing.xlsx"), "--model", "A", "--qty", "1", option, "plan.txt"])
+    assert exit_info.value.code == 2
+    assert "plan.txt" in capsys.readouterr().err
+
+
+def test_cyclic_model_exits_with_message(files, capsys):
+    assert run(files, "--model", "电磁炉A", "--qty", "1") == 1
+    assert "循环引用" in capsys.readouterr().err
+
+
+def test_schedule_reports_undated_and_unknown_models(files, capsys):
+    pd.DataFrame({"型号": ["电磁炉C", "电磁炉C", "不存在"], "生产数量": [1, 2, 3],
+                  "完工日期": ["2030-01-10", None, "2030-01-10"]}).to_csv(files / "orders.csv", index=False)
+    assert run(files, "--demand", str(files / "orders.csv"), "--schedule", str(files / "schedule.csv")) == 0
+    err = capsys.readouterr().err
+    assert "未排程" in err and "不存在" in err and "电磁炉C" in err
+    assert len(pd.read_csv(files / "schedule.csv")) == 1
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom import Inventory, OrderRules, consolidate, consolidated_lines, net_plan, projected_stock
+
+
+def rules(rows):
+    return OrderRules(pd.DataFrame(rows, columns=["供应商", "子件商品", "规格型号", "最小订购量", "包装数量"]))
+
+
+def test_consolidate_merges_plans_and_rounds_to_pack(dataset):
+    plans = [("A", dataset.plan("电磁炉A", 10).lines), ("B", dataset.plan("电磁炉B", 5).lines)]
+    result = consolidate(plans, rules([("乙厂", "螺丝", "M3", 0, 100), (None, "电容", "10uF", 200, 50)]))
+    row = result.set_index("子件商品")
+    # 螺丝：A 10 × (4 + 2) + B 5 × 2 × 2 = 80，按 100 一包
+    assert row.loc["螺丝", "需用数量_总计"] == 80
+    assert row.loc["螺丝", "订购数量"] == 100
+    assert row.loc["螺丝", "来源计划"] == "A、B"
+    assert row.loc["螺丝", "计划数"] == 2
+    # 电容：30 + 30 = 60，起订量 200（通用规则对所有供应商生效）
+    assert row.loc["电容", "订购数量"] == 200
+    assert row.loc["电容", "预计结余"] == 140
+    # 外壳没有规则：按需订购，单价为两个计划的加权平均
+    assert row.loc["外壳", "订购数量"] == 15
+    assert row.loc["外壳", "成本单价"] == pytest.approx((10 * 10 + 5 * 12) / 15)
+
+
+def test_supplier_rule_wins_over_common_rule():
+    moq, pack = rules([(None, "螺丝", "M3", 0, 50), ("乙厂", "螺丝", "M3", 0, 100)]).lookup(
+        ["螺丝|M3", "螺丝|M3"], ["乙厂", "丁厂"])
+    assert pack.tolist() == [100.0, 50.0]
+
+
+def test_consolidated_lines_drop_parts_without_orders(dataset):
+    result = consolidate([("A", dataset.plan("电磁炉A", 1).lines)])
+    lines = consolidated_lines(result)
+    assert (lines["需用数量_总计"] > 0).all()
+    assert lines["成本金额_总计"].sum() == pytest.approx(result["成本金额_总计"].sum())
+
+
+def test_projected_leftover_lowers_next_shortfall(dataset):
+    consolidated = consolidate([("A", dataset.plan("电磁炉A", 10).lines)], rules([(None, "螺丝", "M3", 0, 100)]))
+    projected = projected_stock(consolidated)
+    assert projected.set_index("子件商品").loc["螺丝", "现存量"] == 40
+
+    following = dataset.plan("电磁炉A", 5)
+    before = net_plan(following, Inventory.empty()).lines
+    inventory = Inventory.empty().plus(projected)
+    after = net_plan(following, inventory).lines
+    # 计划行写了仓库，没有仓库的结余同样扣减：螺丝需 30，结余 40
+    assert before.set_index("子件商品").loc["螺丝", "需用数量_总计"] == 30
+    assert after.set_index("子件商品").loc["螺丝", "需用数量_总计"] == 0
+
+
+def test_unknown_cost_stays_unknown(dataset):
+    lines = dataset.plan("电磁炉A", 2).lines
+    lines.loc[lines["子件商品"] == "外壳", ["成本单价", "成本金额_总计"]] = None
+    result = consolidate([("A", lines)]).set_index("子件商品")
+    assert np.isnan(result.loc["外壳", "原成本金额"])
+    assert np.isnan(result.loc["外壳", "成本单价"])
+    assert np.isnan(result.loc["外壳", "成本金额_总计"])
+    assert result.loc["螺丝", "成本金额_总计"] == pytest.approx(2 * (4 + 2) * 0.1)
+
+
+def test_projected_leftover_only_nets_its_warehouse(dataset):
+    consolidated = consolidate([("A", dataset.plan("电磁炉A", 10).lines)], rules([(None, "电容", "10uF", 0, 100)]))
+    following = dataset.plan("电磁炉A", 5)
+
+    def shortfall(warehouse):
+        inventory = Inventory.empty().plus(projected_stock(consolidated, warehouse))
+        return net_plan(following, inventory).lines.set_index("子件商品").loc["电容", "需用数量_总计"]
+
+    # 电容从主板配件物料仓领用：结余 70 记在该仓库或不写仓库时可用，记在物料仓时不可用
+    assert shortfall(None) == 0
+    assert shortfall("主板配件物料仓") == 0
+    assert shortfall("物料仓") == 15
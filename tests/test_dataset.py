@@ -0,0 +1,30 @@
+import pytest
+
+from bom import BomDataset
+
+
+def test_content_key_follows_table_content(parent, make_child):
+    first = BomDataset(parent, make_child())
+    same = BomDataset(parent.copy(), make_child())
+    changed = BomDataset(parent, make_child(extra=[("B003", "螺丝", "M3", 1.0, 0.1, "乙厂", "物料仓")]))
+    assert first.content_key == same.content_key
+    assert first.content_key != changed.content_key
+
+
+def test_quality_and_rollup_see_raw_data(parent, make_child):
+    class Master:
+        # 只补齐成本单价的最小商品档案
+        def fill_child(self, child):
+            filled = child.assign(成本单价=child["成本单价"].fillna(1.0))
+            return filled, {"成本单价": int(child["成本单价"].isna().sum())}
+
+    child = make_child()
+    child.loc[1, ["成本单价", "成本金额"]] = None
+    dataset = BomDataset(parent.assign(成本金额=[11.8, 1.7, 15.4]), child, Master())
+    assert dataset.filled == {"成本单价": 1}
+    assert dataset.child["成本单价"].notna().all()
+    summary = dataset.quality_report().summary.set_index("检查项")["问题行数"]
+    assert summary["缺少成本"] == 1
+    rollup = dataset.cost_rollup().set_index("物料清单编码")
+    # 原始数据中电磁炉A 缺少外壳的成本，展开成本为 1.7 + 0.4
+    assert rollup.loc["B001", "展开成本"] == pytest.approx(2.1)
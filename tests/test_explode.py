@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from bom import BomDataset
+from bom.explode import BomCycleError, part_keys
+
+
+def naive_flatten(parent, child, code, quantity=1.0):
+    """逐层递归展开，作为向量化实现的对照：{零件键: 需用数量}。"""
+    products = dict(zip(parent["父件商品"], parent["物料清单编码"]))
+    rows = child[child["物料清单编码"] == code]
+    totals = {}
+    for key, (_, row) in zip(part_keys(rows), rows.iterrows()):
+        sub = products.get(row["子件商品"])
+        if sub is not None and sub != code:
+            parts = naive_flatten(parent, child, sub, quantity * row["需用数量"])
+        else:
+            parts = {key: quantity * row["需用数量"]}
+        for part, qty in parts.items():
+            totals[part] = totals.get(part, 0.0) + qty
+    return totals
+
+
+@pytest.mark.parametrize("code", ["B001", "B002", "B003"])
+def test_flatten_matches_naive_recursion(dataset, parent, child, code):
+    ids, qty, _ = dataset.explosion.flatten(code)
+    keys = dataset.explosion.parts.index[ids]
+    assert dict(zip(keys, qty)) == pytest.approx(naive_flatten(parent, child, code))
+
+
+def test_flatten_rolls_up_cost(dataset):
+    # 电磁炉B = 2 × (3 × 0.5 + 2 × 0.1) + 12
+    _, _, amount = dataset.explosion.flatten("B003")
+    assert amount.sum() == pytest.approx(2 * (1.5 + 0.2) + 12)
+
+
+def test_matrix_requirements_match_naive_recursion(dataset, parent, child):
+    matrix = dataset.matrix(True)
+    demand = np.zeros(len(matrix.codes))
+    demand[matrix.row_of["B001"]] = 10
+    demand[matrix.row_of["B003"]] = 5
+    quantity, _ = matrix.requirements(demand)
+
+    expected = {}
+    for code, count in (("B001", 10), ("B003", 5)):
+        for key, qty in naive_flatten(parent, child, code, count).items():
+            expected[key] = expected.get(key, 0.0) + qty
+    result = {key: q for key, q in zip(matrix.part_keys, quantity) if q}
+    assert result == pytest.approx(expected)
+
+
+def test_single_level_matrix_keeps_subassembly_column(dataset):
+    matrix = dataset.matrix(False)
+    ids, qty, _ = matrix.row_entries(matrix.row_of["B003"])
+    assert dict(zip(matrix.part_keys[ids], qty)) == {"主板组件|": 2.0, "外壳|白色": 1.0}
+
+
+def test_cyclic_bom_is_isolated(parent, make_child):
+    # 主板组件反过来引用电磁炉A，形成循环；电磁炉B 经由主板组件也无法展开
+    dataset = BomDataset(parent, make_child(extra=[("B002", "电磁炉A", None, 1.0, 0.0, None, None)]))
+    with pytest.raises(BomCycleError):
+        dataset.explosion.flatten("B001")
+    matrix = dataset.matrix(True)
+    assert set(matrix.cyclic) == {"B001", "B002", "B003"}
+    assert np.isnan(matrix.row_cost()).all()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bom import Inventory, net_plan
+from bom.plan import MaterialPlan
+
+
+def stock(rows):
+    return pd.DataFrame(rows, columns=["子件商品", "规格型号", "子件预出仓库", "现存量"])
+
+
+def plan(rows):
+    lines = pd.DataFrame(rows, columns=["子件商品", "规格型号", "子件预出仓库", "需用数量_总计", "成本单价"])
+    lines["成本金额_总计"] = lines["需用数量_总计"] * lines["成本单价"]
+    return MaterialPlan("测试", 1, lines)
+
+
+def test_net_plan_subtracts_stock():
+    inventory = Inventory(stock([("外壳", "白色", "物料仓", 3.0), ("螺丝", "M3", "物料仓", 100.0)]))
+    gross = plan([("外壳", "白色", "物料仓", 10.0, 10.0), ("螺丝", "M3", "物料仓", 40.0, 0.1)])
+    netted = net_plan(gross, inventory).lines
+    assert netted["需用数量_总计"].tolist() == [7.0, 0.0]
+    assert netted["成本金额_总计"].tolist() == pytest.approx([70.0, 0.0])
+    assert netted["毛需求数量"].tolist() == [10.0, 40.0]
+
+
+def test_net_plan_uses_shared_stock_once():
+    # 同一零件两行，库存 10 只能满足一次
+    inventory = Inventory(stock([("螺丝", "M3", "物料仓", 10.0)]))
+    gross = plan([("螺丝", "M3", "物料仓", 8.0, 0.1), ("螺丝", "M3", "物料仓", 8.0, 0.1)])
+    netted = net_plan(gross, inventory).lines
+    assert netted["需用数量_总计"].tolist() == [0.0, 6.0]
+
+
+def test_stock_without_warehouse_counts_for_any_warehouse():
+    inventory = Inventory(stock([("外壳", "白色", None, 5.0), ("外壳", "白色", "物料仓", 2.0)]))
+    keys = np.array(["外壳|白色"] * 3, dtype=object)
+    assert inventory.on_hand(keys).tolist() == [7.0] * 3
+    assert inventory.on_hand(keys, ["物料仓", "成品仓", None]).tolist() == [7.0, 5.0, 7.0]
+
+
+def test_unknown_part_has_no_stock():
+    inventory = Inventory.empty()
+    assert inventory.on_hand(np.array(["无|"], dtype=object)).tolist() == [0.0]
+
+
+def test_stock_is_consumed_per_warehouse():
+    # 同一零件从两个仓库领用，各仓库的库存各自够用
+    inventory = Inventory(stock([("螺丝", "M3", "物料仓", 10.0), ("螺丝", "M3", "主板配件物料仓", 5.0)]))
+    gross = plan([("螺丝", "M3", "物料仓", 10.0, 0.1), ("螺丝", "M3", "主板配件物料仓", 5.0, 0.1)])
+    netted = net_plan(gross, inventory).lines
+    assert netted["需用数量_总计"].tolist() == [0.0, 0.0]
+    assert netted["现存量"].tolist() == [10.0, 5.0]
+
+
+def test_stock_without_warehouse_is_shared_once():
+    # 没有写仓库的 6 个由两个仓库的行共用，不在每个仓库各算一次
+    inventory = Inventory(stock([("螺丝", "M3", None, 6.0), ("螺丝", "M3", "物料仓", 2.0)]))
+    gross = plan([("螺丝", "M3", "物料仓", 5.0, 0.1), ("螺丝", "M3", "成品仓", 5.0, 0.1)])
+    netted = net_plan(gross, inventory).lines
+    assert netted["现存量"].tolist() == [5.0, 3.0]
+    assert netted["需用数量_总计"].tolist() == [0.0, 2.0]
+
+
+def test_line_without_warehouse_uses_what_warehouses_left():
+    inventory = Inventory(stock([("螺丝", "M3", "物料仓", 10.0), ("螺丝", "M3", None, 1.0)]))
+    gross = plan([("螺丝", "M3", None, 6.0, 0.1), ("螺丝", "M3", "物料仓", 7.0, 0.1)])
+    # 物料仓的行先用本仓 7 个；没有写仓库的行用共用的 1 个和物料仓剩下的 3 个
+    assert inventory.allocate(gross.lines).tolist() == [4.0, 7.0]
+
+
+def test_allocated_array_is_used_as_is():
+    gross = plan([("螺丝", "M3", "物料仓", 8.0, 0.1), ("螺丝", "M3", "物料仓", 8.0, 0.1)])
+    assert net_plan(gross, [8.0, 3.0]).lines["需用数量_总计"].tolist() == [0.0, 5.0]
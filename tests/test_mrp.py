@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def model(dataset):
+    return dataset.mrp()
+
+
+def run(model, orders, lead, **options):
+    mps = np.zeros((model.size, 6))
+    for code, period, qty in orders:
+        mps[model.item_of(code), period] = qty
+    return model.run(mps, "2024-01-01", lead=lead, **options)
+
+
+def part_item(model, key):
+    return model.n_codes + model.parts.index.get_loc(key)
+
+
+def test_release_is_shifted_by_lead_time(model):
+    lead = np.zeros(model.size, dtype=np.int64)
+    lead[model.item_of("B001")] = 1
+    lead[part_item(model, "电容|10uF")] = 2
+    result = run(model, [("B001", 4, 10)], lead)
+    # 成品第 4 期完工、提前 1 期投产；半成品按成品的投产期需求，电容再提前 2 期
+    assert np.flatnonzero(result.release[model.item_of("B001")]).tolist() == [3]
+    assert result.gross[model.item_of("B002"), 3] == 10
+    capacitor = part_item(model, "电容|10uF")
+    assert result.planned[capacitor, 3] == 30
+    assert result.release[capacitor, 1] == 30
+
+
+def test_release_before_horizon_is_past_due(model):
+    lead = np.zeros(model.size, dtype=np.int64)
+    lead[part_item(model, "外壳|白色")] = 3
+    result = run(model, [("B003", 1, 4)], lead)
+    shell = part_item(model, "外壳|白色")
+    assert result.past_due[shell] == 4
+    assert result.release[shell, 0] == 4
+
+
+def test_on_hand_and_lot_sizing(model):
+    lead = np.zeros(model.size, dtype=np.int64)
+    screw = part_item(model, "螺丝|M3")
+    on_hand = np.zeros(model.size)
+    on_hand[screw] = 15
+    result = run(model, [("B001", 0, 5)], lead, on_hand=on_hand, lot_multiple=100)
+    # 螺丝毛需求 5 × 4 + 5 × 2 = 30，库存 15，缺 15，按 100 取整
+    assert result.net[screw, 0] == 15
+    assert result.planned[screw, 0] == 100
+    assert result.projected[screw, 0] == 85
+
+
+def test_scalar_options_do_not_plan_unordered_boms(model):
+    lead = np.zeros(model.size, dtype=np.int64)
+    result = run(model, [("B001", 0, 1)], lead, safety_stock=5, min_lot=10)
+    assert result.planned[model.item_of("B003")].sum() == 0
+    assert result.planned[model.item_of("B001"), 0] == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from bom import ModelIndex, chinese_number, split_order_text
+from bom.orderparse import name_pattern
+
+
+@pytest.mark.parametrize("text, value", [("十", 10), ("二十五", 25), ("两百", 200), ("一万二千", 12000), ("12", 12)])
+def test_chinese_number(text, value):
+    assert chinese_number(text) == value
+
+
+@pytest.mark.parametrize("text, mentions", [
+    ("我要做 10 台商用电磁炉", [("商用电磁炉", 10)]),
+    ("商用电磁炉 5台", [("商用电磁炉", 5)]),
+    ("做二十台A和三台B", [("a", 20), ("b", 3)]),
+    ("5KW双平 x 30，家用双灶两台", [("5kw双平", 30), ("家用双灶", 2)]),
+    ("商用电磁炉", [("商用电磁炉", None)]),
+])
+def test_split_order_text(text, mentions):
+    assert split_order_text(text) == mentions
+
+
+def test_model_names_are_not_read_as_quantities():
+    names = name_pattern(["抖音 12套件", "英文版 双电磁 AK 750*430", "锅具十件套"])
+    assert split_order_text("我要做 10 台抖音 12套件", names) == [("抖音12套件", 10)]
+    assert split_order_text("英文版 双电磁 AK 750*430 ×20", names) == [("英文版双电磁ak750*430", 20)]
+    assert split_order_text("锅具十件套 3 个", names) == [("锅具十件套", 3)]
+
+
+def test_orders_pick_best_model():
+    index = ModelIndex(["商用电磁炉 3500W", "家用双灶", "抖音 12套件"])
+    orders, unmatched = index.orders("做 10 台商用电磁炉，抖音12套件两套")
+    assert orders == [("商用电磁炉 3500W", 10), ("抖音 12套件", 2)]
+    assert unmatched == []
+
+
+@pytest.mark.parametrize("text, mentions", [
+    ("做十台，商用电磁炉", [("商用电磁炉", 10)]),
+    ("商用电磁炉，十台", [("商用电磁炉", 10)]),
+    ("我要做十台", [("", 10)]),
+])
+def test_quantity_without_description(text, mentions):
+    assert split_order_text(text) == mentions
+
+
+def test_quantity_without_model_is_reported():
+    index = ModelIndex(["商用电磁炉 3500W"])
+    orders, unmatched = index.orders("我要做十台")
+    assert orders == []
+    assert unmatched == ["（未写型号） × 10"]
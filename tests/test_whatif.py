@@ -0,0 +1,20 @@
+import pytest
+
+
+def test_factor_updates_rows_using_part(dataset):
+    scenario = dataset.price_scenario()
+    matrix = scenario.matrix
+    scenario.set_factor("电容|10uF", 2.0)
+    impact = scenario.impact().set_index("物料清单编码")
+    # 电容经由主板组件进入全部三个物料清单：A +1.5，B +3，主板组件 +1.5
+    assert impact["差额"].to_dict() == pytest.approx({"B001": 1.5, "B002": 1.5, "B003": 3.0})
+    scenario.reset()
+    assert scenario.cost == pytest.approx(matrix.row_cost())
+
+
+def test_subassembly_cannot_be_repriced(dataset):
+    scenario = dataset.price_scenario()
+    assert scenario.priceable(["主板组件|", "外壳|白色", "不存在|"]) == ["外壳|白色"]
+    with pytest.raises(KeyError):
+        scenario.set_factor("主板组件|", 1.1)
+    assert not scenario.changes